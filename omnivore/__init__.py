@@ -2,6 +2,71 @@ api_base = 'https://api.omnivore.io/'
 api_key = None
 api_version = '0.1'
 
+# Connection pooling. `pool_connections` is the number of per-host pools to
+# keep around and `pool_maxsize` the number of keep-alive connections held
+# open to each host. With `pool_block` set, requests wait for a free
+# connection instead of opening extra, non-pooled ones.
+pool_connections = 10
+pool_maxsize = 10
+pool_block = False
+
+# Transport sending requests, e.g. omnivore.transport.HTTP2Transport() or
+# omnivore.transport.MemoryTransport() in tests. None for a pooled HTTP/1.1
+# transport built from the settings above
+http_transport = None
+
+# Retries of failed requests. Set to None to disable retries entirely.
+from omnivore.retry import RetryPolicy  # noqa
+retry_policy = RetryPolicy()
+
+# Seconds allowed to connect and to wait for the server between bytes of a
+# response, as a (connect, read) tuple or a single number for both. Retries
+# are also cut short to what is left of the retry policy's budget
+request_timeout = (3.05, 30)
+
+# Default number of threads used to fetch resources concurrently
+max_workers = 8
+
+# Build embedded objects (ticket items, payments, ...) only when they are
+# first accessed, instead of whenever a response is parsed
+lazy_embedded = False
+
+# JSON module used to encode requests and decode responses: a module name
+# such as 'ujson', 'simplejson' or 'json', any object with `loads` and
+# `dumps`, or None for the fastest one installed
+json_codec = None
+
+# Parse list responses incrementally with ijson, if installed, yielding each
+# resource as soon as it has been received rather than once the whole page
+# has been downloaded and decoded
+stream_lists = False
+
+# Objects notified of every request, see omnivore.stats.run_hooks and
+# omnivore.stats.LatencyHistogram
+request_hooks = []
+
+# Client-side rate limiting, see omnivore.ratelimit.RateLimiter
+rate_limiter = None
+
+# Cache of GET responses, see omnivore.cache.ResponseCache
+response_cache = None
+
+# Sharing of identical GETs in flight at the same time, see
+# omnivore.coalesce.RequestCoalescer
+request_coalescer = None
+
+# On-disk menu snapshots used by Menu.load_full, see
+# omnivore.snapshot.MenuSnapshotStore
+menu_snapshots = None
+
+# Reference data shared by all Location instances, see
+# omnivore.registry.Registry. Not named `registry`, which would clash with
+# the omnivore.registry module once it is imported
+resource_registry = None
+
+from omnivore.client import OmnivoreClient  # noqa
+from omnivore.identity import IdentityMap  # noqa
+
 from omnivore.resource.base import (  # noqa
     Location,
     Table,
@@ -14,6 +79,7 @@ from omnivore.resource.base import (  # noqa
 
 from omnivore.resource.menu import (  # noqa
     Menu,
+    MenuIndex,
     Category,
     MenuItem,
     Modifier,
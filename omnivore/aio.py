@@ -0,0 +1,314 @@
+"""
+Non-blocking variants of the resource API, built on tornado coroutines.
+
+Every function here is a coroutine, to be yielded from a `gen.coroutine`
+running on the tornado IOLoop. Responses are parsed into the regular
+resource classes, so objects returned here behave exactly like the ones
+returned by the blocking API. Fetched relations are stored the same way
+`cached_property` stores them, so e.g. `location.tickets` does not refetch
+after `get_related(location, 'tickets')`.
+
+Retries, rate limits, request hooks and coalescing follow the same settings
+as the blocking API, but responses are never read from or stored in
+`omnivore.response_cache`.
+
+    @gen.coroutine
+    def sync(location_id):
+        location = yield aio.get_location(location_id)
+        tickets = yield aio.get_related(location, 'tickets')
+        items = yield aio.get_related(location.menu, 'items')
+"""
+from __future__ import unicode_literals
+
+import sys
+
+from datetime import timedelta
+
+try:
+    from tornado import gen, httpclient
+except ImportError:
+    raise ImportError(
+        'omnivore.aio requires tornado. Install it with '
+        '"pip install omnivore[aio]".'
+    )
+
+from omnivore import client, codec
+from omnivore.coalesce import raise_timeout
+from omnivore.transport import split_timeout
+from omnivore.resource.base import Location
+from omnivore.resource.ticket import Ticket, TicketItem, Payment
+from omnivore.util import call_bound, call_with, get_link
+
+
+@gen.coroutine
+def request(method, url, data=None, idempotent=None):
+    # The client is looked up before anything is yielded, while the caller's
+    # `with client:` block, if any, is still active
+    omnivore_client = client.get_client()
+    request_coalescer = omnivore_client.request_coalescer
+
+    if method != 'GET' or request_coalescer is None:
+        result = yield send(method, url, data, idempotent, omnivore_client)
+        raise gen.Return(result)
+
+    future, leader = request_coalescer.call_future(
+        client.get_request_key(omnivore_client, url),
+        send,
+        method,
+        url,
+        None,
+        None,
+        omnivore_client
+    )
+
+    if leader or request_coalescer.timeout is None:
+        result = yield future
+        raise gen.Return(result)
+
+    try:
+        result = yield gen.with_timeout(
+            timedelta(seconds=request_coalescer.timeout),
+            future
+        )
+    except gen.TimeoutError:
+        raise_timeout()
+
+    raise gen.Return(result)
+
+
+@gen.coroutine
+def send(method, url, data=None, idempotent=None, omnivore_client=None):
+    omnivore_client = omnivore_client or client.get_client()
+
+    body = None
+
+    if data is not None:
+        body = codec.dumps(data)
+
+    attempts = client.RequestAttempts(
+        omnivore_client,
+        method,
+        url,
+        body,
+        idempotent
+    )
+
+    try:
+        res = yield fetch_with_retries(attempts, body)
+
+        if res.code == 599:
+            client.handle_request_error(res.error)
+    except Exception, e:
+        exc_info = sys.exc_info()
+        attempts.failed(e)
+        raise exc_info[0], exc_info[1], exc_info[2]
+
+    attempts.completed(res.code, len(res.body or b''))
+
+    raise gen.Return(handle_response(res))
+
+
+@gen.coroutine
+def fetch_with_retries(attempts, body):
+    rate_limiter = attempts.omnivore_client.rate_limiter
+
+    while True:
+        headers = attempts.next_attempt()
+
+        if rate_limiter is not None:
+            yield acquire_rate_limit(
+                rate_limiter,
+                headers['Api-Key'],
+                attempts.url
+            )
+
+        # Tornado only has a timeout for the whole request, which is given
+        # the read timeout
+        connect_timeout, request_timeout = split_timeout(
+            attempts.get_timeout()
+        )
+
+        req = httpclient.HTTPRequest(
+            attempts.url,
+            method=attempts.method,
+            headers=headers,
+            body=body,
+            connect_timeout=connect_timeout,
+            request_timeout=request_timeout
+        )
+
+        try:
+            res = yield httpclient.AsyncHTTPClient().fetch(
+                req,
+                raise_error=False
+            )
+        except Exception, e:
+            client.handle_request_error(e)
+
+        # Tornado reports connection failures and timeouts as a 599
+        if res.code == 599:
+            delay = attempts.retry_delay(exception=res.error)
+        else:
+            delay = attempts.retry_delay(res.code, res.headers)
+
+        if delay is None:
+            raise gen.Return(res)
+
+        yield gen.sleep(delay)
+
+
+@gen.coroutine
+def acquire_rate_limit(rate_limiter, api_key, url):
+    location_id = client.get_location_id(url)
+    deadline = rate_limiter.get_deadline()
+
+    while True:
+        wait = rate_limiter.get_wait(api_key, location_id, deadline)
+
+        if wait == 0:
+            return
+
+        if wait is None:
+            client.raise_rate_limit_timeout()
+
+        yield gen.sleep(wait)
+
+
+def handle_response(res):
+    try:
+        data = codec.loads(res.body)
+    except ValueError, e:
+        client.handle_parse_error(e, res.code, res.headers)
+
+    if not (200 <= res.code < 300):
+        client.handle_error_code(data, res.code, res.headers)
+
+    return data
+
+
+def get(url):
+    return request('GET', url)
+
+
+def post(url, data, idempotent=False):
+    return request('POST', url, data, idempotent)
+
+
+def delete(url):
+    return request('DELETE', url)
+
+
+# Locations
+
+@gen.coroutine
+def get_pages(url, build):
+    """
+    Fetch every page of a list endpoint, following HAL `next` links, and
+    return the concatenation of `build(page)` over all pages.
+    """
+    omnivore_client = client.OmnivoreClient.current()
+    objs = []
+
+    while url:
+        res = yield call_with(omnivore_client, get, url)
+        objs.extend(call_with(omnivore_client, build, res))
+        url = get_link(res, 'next')
+
+    raise gen.Return(objs)
+
+
+@gen.coroutine
+def get_locations():
+    locations = yield get_pages(Location.list_url(), Location.build_list)
+    raise gen.Return(locations)
+
+
+@gen.coroutine
+def get_location(location_id):
+    omnivore_client = client.OmnivoreClient.current()
+
+    res = yield get(Location.retrieve_url(location_id))
+    raise gen.Return(call_with(omnivore_client, Location, **res))
+
+
+@gen.coroutine
+def get_related(obj, name):
+    """
+    Fetch a relation such as `location.tickets`, `menu.items` or
+    `menu_item.modifier_groups`, caching it on the object.
+    """
+    if getattr(obj.__class__, name).is_fresh(obj):
+        raise gen.Return(getattr(obj, name))
+
+    value = yield call_bound(
+        obj,
+        get_pages,
+        call_bound(obj, obj.related_url, name),
+        lambda res: obj.build_related(name, res)
+    )
+
+    setattr(obj, name, value)
+    raise gen.Return(value)
+
+
+# Tickets
+
+@gen.coroutine
+def open_ticket(location_id, employee_id, order_type_id, revenue_center_id,
+                table_id, guest_count=None, name=None, auto_send=None):
+    omnivore_client = client.OmnivoreClient.current()
+    data = Ticket.build_open_data(
+        employee_id,
+        order_type_id,
+        revenue_center_id,
+        table_id,
+        guest_count,
+        name,
+        auto_send
+    )
+
+    res = yield post(Ticket.list_url(location_id), data)
+    raise gen.Return(
+        call_with(omnivore_client, Ticket, location_id, **res)
+    )
+
+
+@gen.coroutine
+def void(ticket):
+    res = yield call_bound(
+        ticket,
+        lambda: post(ticket.instance_url, {'void': True}, idempotent=True)
+    )
+    call_bound(ticket, ticket.refresh_from, **res)
+
+
+@gen.coroutine
+def add_item(ticket, menu_item, quantity, price_level=None, comment=None,
+             modifiers=None, discounts=None):
+    data = Ticket.build_item_data(
+        menu_item,
+        quantity,
+        price_level,
+        comment,
+        modifiers,
+        discounts
+    )
+
+    res = yield call_bound(
+        ticket,
+        lambda: post(TicketItem.list_url(ticket.location_id, ticket.id), data)
+    )
+    call_bound(ticket, ticket.refresh_from, **res)
+
+
+@gen.coroutine
+def pay(ticket, type, amount, tip, **kwargs):
+    data = Ticket.build_payment_data(type, amount, tip, **kwargs)
+
+    res = yield call_bound(
+        ticket,
+        lambda: post(Payment.list_url(ticket.location_id, ticket.id), data)
+    )
+
+    call_bound(ticket, ticket.refresh_from, **res.pop('ticket'))
+    raise gen.Return(res)
@@ -0,0 +1,182 @@
+"""
+Benchmarks of the library's hot paths against a local `FakeOmnivore`
+server. Run them with:
+
+    python -m omnivore.benchmark --iterations 20 --output results.json
+
+which writes a JSON document with the timings of each benchmark, so that
+results can be compared between versions.
+"""
+from __future__ import unicode_literals
+
+import math
+import platform
+import time
+
+from collections import OrderedDict
+
+import omnivore
+
+from omnivore.benchmark.server import FakeOmnivore
+from omnivore.order import place_order
+from omnivore.resource.base import Location
+from omnivore.resource.menu import Menu
+from omnivore.resource.ticket import Ticket
+from omnivore.stats import RequestCounter
+from omnivore.version import VERSION
+
+
+# Settings reset for the duration of a run, so that every iteration really
+# goes over the network
+SETTINGS = {
+    'api_key': 'benchmark',
+    'lazy_embedded': False,
+    'menu_snapshots': None,
+    'rate_limiter': None,
+    'request_hooks': [],
+    'resource_registry': None,
+    'response_cache': None
+}
+
+TICKET = {
+    'employee_id': 'e0',
+    'order_type_id': 'o0',
+    'revenue_center_id': 'r0',
+    'table_id': None
+}
+
+PAYMENT = {
+    'type': '3rd_party',
+    'tender_type': 't0',
+    'payment_source': 'benchmark',
+    'tip': 0
+}
+
+
+def location_all(context):
+    Location.all()
+
+
+def menu_items(context):
+    Menu(context['location_id']).items
+
+
+def menu_load_full(context):
+    Menu(context['location_id']).load_full(workers=context['workers'])
+
+
+def order_stepwise(context):
+    ticket = Ticket.open(context['location_id'], **TICKET)
+
+    for item in context['cart']:
+        ticket.add_item(**item)
+
+    ticket.pay(amount=ticket.totals['due'], **PAYMENT)
+
+
+def order_place(context):
+    place_order(context['location_id'], TICKET, context['cart'], PAYMENT)
+
+
+def ticket_hydration(context):
+    location_id = context['location_id']
+    list(Ticket.iter_list(Ticket.list_url(location_id), location_id))
+
+
+BENCHMARKS = OrderedDict([
+    ('location_all', location_all),
+    ('menu_items', menu_items),
+    ('menu_load_full', menu_load_full),
+    ('order_stepwise', order_stepwise),
+    ('order_place', order_place),
+    ('ticket_hydration', ticket_hydration)
+])
+
+
+def run(names=None, iterations=10, warmup=1, workers=None, **server_options):
+    """
+    Start a `FakeOmnivore` with `server_options`, run the named benchmarks
+    (all of them by default) `warmup` times unmeasured and `iterations`
+    times measured, and return the results as a JSON-serializable dict.
+    """
+    names = names or list(BENCHMARKS)
+    saved = {name: getattr(omnivore, name) for name in SETTINGS}
+    saved['api_base'] = omnivore.api_base
+
+    with FakeOmnivore(**server_options) as server:
+        try:
+            omnivore.api_base = server.base_url
+            for name, value in SETTINGS.items():
+                setattr(omnivore, name, value)
+
+            context = get_context(workers or omnivore.max_workers)
+            results = [
+                measure(name, BENCHMARKS[name], context, iterations, warmup)
+                for name
+                in names
+            ]
+        finally:
+            for name, value in saved.items():
+                setattr(omnivore, name, value)
+
+    return {
+        'omnivore': VERSION,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'timestamp': time.time(),
+        'iterations': iterations,
+        'workers': context['workers'],
+        'server': server.config,
+        'results': results
+    }
+
+
+def get_context(workers):
+    location_id = Location.all()[0].id
+    items = Menu(location_id).items
+
+    return {
+        'location_id': location_id,
+        'workers': workers,
+        'cart': [
+            {'menu_item': items[0], 'quantity': 1},
+            {'menu_item': items[1], 'quantity': 2, 'price_level': 'pl2'},
+            {'menu_item': items[2], 'quantity': 1}
+        ]
+    }
+
+
+def measure(name, func, context, iterations, warmup):
+    for _ in range(warmup):
+        func(context)
+
+    durations = []
+
+    with RequestCounter() as counter:
+        for _ in range(iterations):
+            start = time.time()
+            func(context)
+            durations.append(time.time() - start)
+
+    durations.sort()
+    total = sum(durations)
+
+    return {
+        'name': name,
+        'iterations': iterations,
+        'requests_per_op': counter.count / float(iterations),
+        'mean': total / iterations,
+        'min': durations[0],
+        'p50': percentile(durations, 50),
+        'p95': percentile(durations, 95),
+        'max': durations[-1],
+        'ops_per_second': iterations / total if total else None
+    }
+
+
+def percentile(values, percent):
+    """
+    Nearest-rank percentile of sorted `values`.
+    """
+    rank = int(math.ceil(percent / 100.0 * len(values))) - 1
+    return values[max(0, rank)]
@@ -0,0 +1,64 @@
+from __future__ import unicode_literals
+
+import argparse
+import json
+import sys
+
+from omnivore.benchmark import BENCHMARKS, run
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m omnivore.benchmark',
+        description='Benchmark the Omnivore client against a local server.'
+    )
+    parser.add_argument('names', nargs='*', metavar='name',
+                        help='benchmarks to run: {} (default: all)'.format(
+                            ', '.join(BENCHMARKS)))
+    parser.add_argument('--iterations', type=int, default=10)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='seconds added to every response')
+    parser.add_argument('--locations', type=int, default=5)
+    parser.add_argument('--menu-items', type=int, default=200)
+    parser.add_argument('--modifier-groups', type=int, default=2)
+    parser.add_argument('--tickets', type=int, default=200)
+    parser.add_argument('--ticket-items', type=int, default=4)
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--output', help='file to write results to '
+                                         '(default: standard output)')
+    args = parser.parse_args(argv)
+
+    for name in args.names:
+        if name not in BENCHMARKS:
+            parser.error('unknown benchmark: {}'.format(name))
+
+    if args.iterations < 1:
+        parser.error('--iterations must be at least 1')
+
+    results = run(
+        args.names,
+        iterations=args.iterations,
+        warmup=args.warmup,
+        workers=args.workers,
+        latency=args.latency,
+        locations=args.locations,
+        menu_items=args.menu_items,
+        modifier_groups=args.modifier_groups,
+        tickets=args.tickets,
+        ticket_items=args.ticket_items,
+        page_size=args.page_size
+    )
+
+    out = json.dumps(results, indent=2, sort_keys=True)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(out + '\n')
+    else:
+        sys.stdout.write(out + '\n')
+
+
+if __name__ == '__main__':
+    main()
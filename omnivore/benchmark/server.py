@@ -0,0 +1,502 @@
+"""
+Local stand-in for the Omnivore API, serving generated HAL payloads for
+benchmarks. It runs in a child process so that serving requests does not
+compete with the client being measured for the interpreter lock.
+"""
+from __future__ import unicode_literals
+
+import BaseHTTPServer
+import SocketServer
+import itertools
+import json
+import multiprocessing
+import threading
+import time
+import urlparse
+
+
+RELATIONS = (
+    'discounts',
+    'employees',
+    'order_types',
+    'revenue_centers',
+    'tables',
+    'tender_types'
+)
+
+
+class FakeOmnivore(object):
+    """
+    Serves `locations` locations, each with a menu of `categories`
+    categories, `menu_items` items having `modifier_groups` modifier groups
+    of `options` options each (out of `modifiers` modifiers), and `tickets`
+    tickets with `ticket_items` items and one payment each.
+
+    Lists are split in pages of `page_size` objects linked with HAL `next`
+    links, and every response is delayed by `latency` seconds.
+    """
+
+    def __init__(self, locations=5, categories=10, menu_items=200,
+                 modifiers=50, modifier_groups=2, options=5, tickets=200,
+                 ticket_items=4, page_size=100, latency=0.0):
+        self.config = {
+            'locations': locations,
+            'categories': categories,
+            'menu_items': menu_items,
+            'modifiers': modifiers,
+            'modifier_groups': modifier_groups,
+            'options': options,
+            'tickets': tickets,
+            'ticket_items': ticket_items,
+            'page_size': page_size,
+            'latency': latency
+        }
+
+        self.process = None
+        self.base_url = None
+
+    def start(self):
+        """
+        Start the server on a free local port and return its base URL.
+        """
+        parent, child = multiprocessing.Pipe()
+
+        self.process = multiprocessing.Process(
+            target=serve,
+            args=(self.config, child)
+        )
+        self.process.daemon = True
+        self.process.start()
+
+        self.base_url = parent.recv()
+        return self.base_url
+
+    def stop(self):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.join()
+            self.process = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def serve(config, conn):
+    server = FakeServer(('127.0.0.1', 0), FakeRequestHandler)
+    server.api = FakeAPI(**config)
+    server.api.host = '127.0.0.1:{}'.format(server.server_address[1])
+
+    conn.send('http://{}/'.format(server.api.host))
+    server.serve_forever()
+
+
+class FakeServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class FakeRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    # Send headers and body in one segment, so that delayed ACKs do not add
+    # 40ms to every response on a keep-alive connection
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.respond('GET')
+
+    def do_POST(self):
+        self.respond('POST')
+
+    def do_DELETE(self):
+        self.respond('DELETE')
+
+    def respond(self, method):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length)) if length else None
+
+        url = urlparse.urlsplit(self.path)
+        query = dict(urlparse.parse_qsl(url.query))
+        parts = [part for part in url.path.split('/') if part][1:]
+
+        status, data = self.server.api.handle(method, parts, query, body)
+        out = data if isinstance(data, bytes) else json.dumps(data)
+
+        if self.server.api.latency:
+            time.sleep(self.server.api.latency)
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(out)))
+        self.end_headers()
+        self.wfile.write(out)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeAPI(object):
+
+    def __init__(self, locations, categories, menu_items, modifiers,
+                 modifier_groups, options, tickets, ticket_items, page_size,
+                 latency):
+        self.page_size = page_size
+        self.latency = latency
+        self.counts = {
+            'categories': categories,
+            'menu_items': menu_items,
+            'modifiers': modifiers,
+            'modifier_groups': modifier_groups,
+            'options': options,
+            'tickets': tickets,
+            'ticket_items': ticket_items
+        }
+
+        self.location_ids = ['loc{}'.format(i) for i in range(locations)]
+        self.host = None
+        self.pages = {}
+        self.opened = {}
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+
+    def handle(self, method, parts, query, body):
+        if not parts or parts[0] != 'locations':
+            return 404, {'error': 'Not found'}
+
+        if len(parts) == 1:
+            return 200, self.page(parts, query, 'locations', self.locations)
+
+        location_id = parts[1]
+        if location_id not in self.location_ids:
+            return 404, {'error': 'Location not found'}
+
+        rest = parts[2:]
+
+        if not rest:
+            return 200, location(location_id)
+
+        if rest[0] == 'tickets' and (method != 'GET' or len(rest) > 1):
+            return self.handle_ticket(method, location_id, rest[1:], body)
+
+        key, build = self.get_list(rest)
+        if key is None or method != 'GET':
+            return 404, {'error': 'Not found'}
+
+        return 200, self.page(parts, query, key, build)
+
+    def get_list(self, rest):
+        if len(rest) == 1 and rest[0] in RELATIONS:
+            return rest[0], lambda: [reference(rest[0], i) for i in range(5)]
+
+        if rest == ['tickets']:
+            return 'tickets', lambda: [
+                ticket('t{}'.format(i), self.counts['ticket_items'])
+                for i
+                in range(self.counts['tickets'])
+            ]
+
+        if rest == ['menu', 'categories']:
+            return 'categories', lambda: [
+                category(i, self.counts['menu_items'])
+                for i
+                in range(self.counts['categories'])
+            ]
+
+        if rest == ['menu', 'items']:
+            return 'menu_items', lambda: [
+                menu_item(i, self.counts['modifier_groups'])
+                for i
+                in range(self.counts['menu_items'])
+            ]
+
+        if rest == ['menu', 'modifiers']:
+            return 'modifiers', lambda: [
+                modifier(i)
+                for i
+                in range(self.counts['modifiers'])
+            ]
+
+        if len(rest) == 4 and rest[3] == 'modifier_groups':
+            return 'modifier_groups', lambda: [
+                modifier_group(
+                    i,
+                    self.counts['options'],
+                    self.counts['modifiers']
+                )
+                for i
+                in range(self.counts['modifier_groups'])
+            ]
+
+        return None, None
+
+    def locations(self):
+        return [location(location_id) for location_id in self.location_ids]
+
+    def page(self, parts, query, key, build):
+        """
+        Encoded page of a list, generated once and served from memory
+        afterwards.
+        """
+        start = int(query.get('start', 0))
+        cache_key = (tuple(parts), start)
+
+        if cache_key not in self.pages:
+            objs = build()
+            data = {
+                '_embedded': {key: objs[start:start + self.page_size]},
+                '_links': {}
+            }
+
+            if start + self.page_size < len(objs):
+                data['_links']['next'] = {
+                    'href': 'http://{}/{}?start={}'.format(
+                        self.host,
+                        '/'.join(['0.1'] + list(parts)) + '/',
+                        start + self.page_size
+                    )
+                }
+
+            self.pages[cache_key] = json.dumps(data)
+
+        return self.pages[cache_key]
+
+    def handle_ticket(self, method, location_id, rest, body):
+        if method == 'POST' and not rest:
+            ticket_id = 'new{}'.format(next(self.ids))
+            data = ticket(ticket_id, 0, open=True)
+
+            with self.lock:
+                self.opened[ticket_id] = data
+
+            return 201, data
+
+        ticket_id = rest[0]
+
+        with self.lock:
+            data = self.opened.get(ticket_id)
+
+        if data is None:
+            data = ticket(ticket_id, self.counts['ticket_items'])
+
+        if method == 'GET':
+            if rest[1:] == ['payments']:
+                payments = data['_embedded']['payments']
+                return 200, {'_embedded': {'payments': payments}}
+
+            return 200, data
+
+        if rest[1:] == ['items']:
+            for item in body if isinstance(body, list) else [body]:
+                add_ticket_item(data, item)
+            return 201, data
+
+        if rest[1:] == ['payments']:
+            payments = data['_embedded']['payments']
+            payments.append(payment(len(payments), body))
+            data['totals']['paid'] = data['totals']['total']
+            data['totals']['due'] = 0
+            data['open'] = False
+
+            with self.lock:
+                self.opened.pop(ticket_id, None)
+
+            return 201, dict(payments[-1], accepted=True, ticket=data)
+
+        if not rest[1:] and body.get('void'):
+            data['open'] = False
+            return 200, data
+
+        return 404, {'error': 'Not found'}
+
+
+def location(location_id):
+    return {
+        'id': location_id,
+        'address': {'city': 'San Francisco', 'street1': '1 Market St'},
+        'name': 'Location {}'.format(location_id),
+        'phone': '4155550100',
+        'website': 'https://example.com'
+    }
+
+
+def reference(relation, i):
+    """
+    Minimal object of one of the `RELATIONS` lists.
+    """
+    data = {'id': '{}{}'.format(relation[0], i), 'name': 'Name {}'.format(i)}
+
+    data.update({
+        'discounts': {
+            'applies_to': {'ticket': True, 'item': False},
+            'available': True,
+            'max_value': 500,
+            'min_ticket_total': 0,
+            'min_value': 0,
+            'open': False,
+            'type': 'percent',
+            'value': 10
+        },
+        'employees': {
+            'check_name': 'Emp {}'.format(i),
+            'first_name': 'First',
+            'last_name': 'Last',
+            'login': 'emp{}'.format(i)
+        },
+        'order_types': {'available': True},
+        'revenue_centers': {'default': i == 0},
+        'tables': {'available': True, 'number': i, 'seats': 4},
+        'tender_types': {}
+    }[relation])
+
+    return data
+
+
+def menu_item(i, modifier_groups):
+    return {
+        'id': 'i{}'.format(i),
+        'name': 'Menu Item {}'.format(i),
+        'price': 100 + i,
+        'price_levels': [
+            {'id': 'pl1', 'price': 100 + i},
+            {'id': 'pl2', 'price': 150 + i}
+        ],
+        'in_stock': True,
+        'modifier_groups_count': modifier_groups
+    }
+
+
+def category(i, menu_items):
+    return {
+        'id': 'c{}'.format(i),
+        'name': 'Category {}'.format(i),
+        '_embedded': {
+            'items': [menu_item(j, 0) for j in range(i, menu_items, 10)]
+        }
+    }
+
+
+def modifier(i):
+    return {
+        'id': 'm{}'.format(i),
+        'name': 'Modifier {}'.format(i),
+        'price_per_unit': 25,
+        'price_levels': [{'id': 'pl1', 'price': 25}]
+    }
+
+
+def modifier_group(i, options, modifiers):
+    return {
+        'id': 'g{}'.format(i),
+        'name': 'Group {}'.format(i),
+        'minimum': 0,
+        'maximum': options,
+        'required': False,
+        '_embedded': {
+            'options': [
+                modifier((i * options + j) % modifiers)
+                for j
+                in range(options)
+            ]
+        }
+    }
+
+
+def ticket(ticket_id, items, open=False):
+    data = {
+        'id': ticket_id,
+        'auto_send': True,
+        'closed_at': None if open else 1500000000,
+        'guest_count': 2,
+        'name': 'Ticket {}'.format(ticket_id),
+        'open': open,
+        'opened_at': 1500000000,
+        'ticket_number': 1,
+        'totals': {
+            'discounts': 0,
+            'due': 0,
+            'items': 0,
+            'other_charges': 0,
+            'paid': 0,
+            'service_charges': 0,
+            'sub_total': 0,
+            'tax': 0,
+            'tips': 0,
+            'total': 0
+        },
+        '_embedded': {
+            'employee': reference('employees', 0),
+            'discounts': [],
+            'items': [],
+            'order_type': reference('order_types', 0),
+            'payments': [],
+            'revenue_center': reference('revenue_centers', 0),
+            'table': None,
+            'voided_items': []
+        }
+    }
+
+    for i in range(items):
+        add_ticket_item(data, {'menu_item': 'i{}'.format(i), 'quantity': 1})
+
+    if not open and items:
+        total = data['totals']['total']
+        data['_embedded']['payments'].append(payment(0, {
+            'type': '3rd_party',
+            'amount': total,
+            'tip': 0
+        }))
+        data['totals']['paid'] = total
+        data['totals']['due'] = 0
+
+    return data
+
+
+def add_ticket_item(ticket, item):
+    items = ticket['_embedded']['items']
+    i = int(item['menu_item'].lstrip('i') or 0)
+    price = menu_item(i, 0)['price'] * item['quantity']
+
+    items.append({
+        'id': 'ti{}'.format(len(items)),
+        'comment': item.get('comment'),
+        'name': 'Menu Item {}'.format(i),
+        'price_per_unit': price,
+        'quantity': item['quantity'],
+        'sent': True,
+        '_embedded': {
+            'menu_item': menu_item(i, 0),
+            'modifiers': [
+                {
+                    'id': 'tm{}'.format(j),
+                    'comment': None,
+                    'name': 'Modifier {}'.format(j),
+                    'price_per_unit': 25,
+                    'quantity': 1
+                }
+                for j
+                in range(2)
+            ]
+        }
+    })
+
+    totals = ticket['totals']
+    totals['items'] += price
+    totals['sub_total'] += price
+    totals['total'] += price
+    totals['due'] = totals['total'] - totals['paid']
+
+
+def payment(i, data):
+    return {
+        'id': 'p{}'.format(i),
+        'type': data['type'],
+        'amount': data['amount'],
+        'tip': data['tip']
+    }
@@ -0,0 +1,152 @@
+from __future__ import unicode_literals
+
+import threading
+
+from collections import deque
+
+from omnivore.identity import bind
+from omnivore.resource.base import Location
+
+
+class BulkResult(object):
+
+    def __init__(self):
+        self.locations = []
+        self.errors = {}
+
+    @property
+    def failed(self):
+        return sorted(self.errors)
+
+    def add_error(self, location_id, relation, e):
+        self.errors.setdefault(location_id, {})[relation] = e
+
+
+class FairQueue(object):
+    """
+    Task queue shared by a pool of workers, where tasks are grouped by key.
+    Keys take turns, and no more than `per_key` tasks of the same key are
+    handed out at once.
+    """
+
+    def __init__(self, per_key):
+        self.per_key = per_key
+        self.pending = {}
+        self.running = {}
+        self.ready = deque()
+        self.queued = set()
+        self.unfinished = 0
+        self.cond = threading.Condition()
+
+    def put(self, key, task):
+        with self.cond:
+            if key not in self.pending:
+                self.pending[key] = deque()
+                self.running[key] = 0
+
+            self.pending[key].append(task)
+            self.unfinished += 1
+
+            if len(self.pending[key]) == 1:
+                self.mark_ready(key)
+
+    def get(self):
+        """
+        Return the next `(key, task)`, or None once every task is done.
+        """
+        with self.cond:
+            while not self.ready:
+                if not self.unfinished:
+                    return None
+                self.cond.wait()
+
+            key = self.ready.popleft()
+            self.queued.discard(key)
+            self.running[key] += 1
+            task = self.pending[key].popleft()
+
+            self.mark_ready(key)
+            return key, task
+
+    def task_done(self, key):
+        with self.cond:
+            self.running[key] -= 1
+            self.unfinished -= 1
+            self.mark_ready(key)
+
+            if not self.unfinished:
+                self.cond.notify_all()
+
+    def mark_ready(self, key):
+        if self.pending[key] and self.running[key] < self.per_key:
+            if key not in self.queued:
+                self.ready.append(key)
+                self.queued.add(key)
+                self.cond.notify()
+
+
+def load_locations(locations, relations=None, workers=None, per_location=2):
+    """
+    Load `relations` (as accepted by `Location.prefetch`, every relation by
+    default) for many locations, given as `Location` objects or ids.
+
+    Requests run on `workers` threads (`omnivore.max_workers` by default),
+    with locations taking turns and at most `per_location` requests in
+    flight for any one location. Failures are collected per location and
+    relation in the returned `BulkResult` instead of aborting the run.
+    """
+    from omnivore import max_workers
+
+    workers = workers or max_workers
+    result = BulkResult()
+    queue = FairQueue(per_location)
+    slots = {}
+    order = []
+
+    def schedule(location):
+        names = relations or sorted(location.related) + ['menu']
+
+        for obj, name in location.prefetch_tasks(names):
+            relation = name if obj is location else 'menu.' + name
+            queue.put(location.id, (location, obj, name, relation))
+
+    def run():
+        while True:
+            item = queue.get()
+            if item is None:
+                return
+
+            location_id, (location, obj, name, relation) = item
+
+            try:
+                if location is None:
+                    location = Location.get(location_id)
+                    slots[location_id] = location
+                    schedule(location)
+                else:
+                    getattr(obj, name)
+            except Exception, e:
+                result.add_error(location_id, relation, e)
+            finally:
+                queue.task_done(location_id)
+
+    for location in locations:
+        if isinstance(location, Location):
+            slots[location.id] = location
+            order.append(location.id)
+            schedule(location)
+        else:
+            order.append(location)
+            queue.put(location, (None, None, None, 'location'))
+
+    threads = [threading.Thread(target=bind(run)) for _ in range(workers)]
+
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    result.locations = [slots[lid] for lid in order if lid in slots]
+    return result
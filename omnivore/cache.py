@@ -0,0 +1,139 @@
+from __future__ import unicode_literals
+
+import threading
+import time
+
+from collections import OrderedDict
+
+
+class LRUCache(object):
+    """
+    Entries with a `size`, kept in least recently used order and evicted
+    beyond `max_entries` entries or, if set, `max_bytes` bytes. Subclasses
+    hold `lock` while calling `touch`, `put` and `remove`.
+    """
+
+    def __init__(self, max_entries, max_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def touch(self, key):
+        """
+        Return the entry of `key`, if any, marking it as the most recently
+        used.
+        """
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.entries[key] = entry
+
+        return entry
+
+    def put(self, key, entry):
+        self.remove(key)
+        self.entries[key] = entry
+        self.size += entry.size
+        self.evict()
+
+    def remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry.size
+
+    def evict(self):
+        while self.entries and (
+            len(self.entries) > self.max_entries or
+            (self.max_bytes is not None and self.size > self.max_bytes)
+        ):
+            _, entry = self.entries.popitem(last=False)
+            self.size -= entry.size
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+
+class CacheEntry(object):
+
+    def __init__(self, data, etag, last_modified, expires_at, size):
+        self.data = data
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+        self.size = size
+
+    @property
+    def fresh(self):
+        return time.time() < self.expires_at
+
+    @property
+    def validators(self):
+        headers = {}
+
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+
+        return headers
+
+
+class ResponseCache(LRUCache):
+    """
+    LRU cache of parsed GET responses.
+
+    A cached response is served without any request for `ttl` seconds,
+    looked up in `ttls` by templated endpoint (see `client.get_endpoint`,
+    e.g. `'locations/{id}/menu/items/'`) and falling back to `default_ttl`.
+    Once expired, it is revalidated with `If-None-Match`/`If-Modified-Since`
+    and reused as-is if the server answers `304 Not Modified`.
+
+    The cache holds at most `max_entries` responses and, if `max_bytes` is
+    set, at most that many bytes of response bodies. Cached data is shared
+    between callers and must not be modified.
+    """
+
+    def __init__(self, max_entries=1000, max_bytes=None, default_ttl=0,
+                 ttls=None):
+        super(ResponseCache, self).__init__(max_entries, max_bytes)
+        self.default_ttl = default_ttl
+        self.ttls = ttls or {}
+
+    def get_ttl(self, url):
+        from omnivore.client import get_endpoint
+        return self.ttls.get(get_endpoint(url), self.default_ttl)
+
+    def get(self, key):
+        with self.lock:
+            return self.touch(key)
+
+    def set(self, key, url, data, headers, size):
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        ttl = self.get_ttl(url)
+
+        if not (ttl or etag or last_modified):
+            return
+
+        entry = CacheEntry(data, etag, last_modified, time.time() + ttl, size)
+
+        with self.lock:
+            self.put(key, entry)
+
+    def revalidated(self, key, url, entry):
+        entry.expires_at = time.time() + self.get_ttl(url)
+        self.get(key)
+
+    def invalidate(self, prefix):
+        """
+        Drop every cached response whose URL starts with `prefix`.
+        """
+        with self.lock:
+            for key in list(self.entries):
+                if key[1].startswith(prefix):
+                    self.remove(key)
@@ -1,13 +1,153 @@
 from __future__ import unicode_literals
 
-import requests
+import sys
 import textwrap
+import threading
+import time
 
-from omnivore import api_base, api_version, error
+from omnivore import codec, error
+from omnivore.retry import IDEMPOTENT_METHODS
+from omnivore.scope import ThreadScope
+from omnivore.stats import RequestCounter, RequestEvent, run_hooks
+from omnivore.transport import RequestsTransport
+from omnivore.util import BackgroundCall, get_embedded_object, get_link
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+# Settings that each OmnivoreClient holds, and that requests made outside of
+# any client read from the module globals of `omnivore`
+SETTINGS = (
+    'api_key',
+    'api_base',
+    'api_version',
+    'retry_policy',
+    'request_timeout',
+    'rate_limiter',
+    'response_cache',
+    'request_coalescer'
+)
+
+INHERIT = object()
+
+
+class OmnivoreClient(ThreadScope):
+    """
+    Connection to the API with its own key, base URL, connection pool and
+    limits, so that clients for several API keys can be used side by side
+    from any number of threads.
+
+    Requests made inside `with client:` go through the client, and so does
+    everything done later with the resources loaded there, such as fetching
+    `location.tickets` or paying a ticket, from whichever thread. Resources
+    loaded outside of any client use the module-level settings, or the
+    client in use when they make a request.
+
+    Settings that are not given are copied from the module globals when the
+    client is created, except for `transport`, which defaults to a new
+    pool of its own. Response caches, rate limiters and coalescers key
+    everything by API key, so they can safely be shared between clients.
+    """
+
+    local = threading.local()
+
+    def __init__(self, api_key, api_base=None, api_version=None,
+                 transport=None, retry_policy=INHERIT,
+                 request_timeout=INHERIT, rate_limiter=INHERIT,
+                 response_cache=INHERIT, request_coalescer=INHERIT):
+        import omnivore
+
+        self.api_key = api_key
+        self.api_base = api_base or omnivore.api_base
+        self.api_version = api_version or omnivore.api_version
+        self.transport = transport or RequestsTransport()
+
+        settings = {
+            'retry_policy': retry_policy,
+            'request_timeout': request_timeout,
+            'rate_limiter': rate_limiter,
+            'response_cache': response_cache,
+            'request_coalescer': request_coalescer
+        }
+
+        for name, value in settings.items():
+            if value is INHERIT:
+                value = getattr(omnivore, name)
+            setattr(self, name, value)
+
+    def __repr__(self):
+        return '<OmnivoreClient {}>'.format(self.api_base)
+
+    def iterate(self, iterable):
+        """
+        Yield the items of `iterable`, producing each one inside the client.
+        """
+        iterator = iter(iterable)
+
+        while True:
+            with self:
+                item = next(iterator)
+
+            yield item
+
+    def close(self):
+        """
+        Close the pooled connections of the client.
+        """
+        self.transport.close()
+
+
+class DefaultClient(object):
+    """
+    Settings of requests made outside of any `OmnivoreClient`, read from
+    the module globals of `omnivore` on every access.
+    """
+
+    def __getattr__(self, name):
+        import omnivore
+
+        if name == 'transport':
+            return get_transport()
+
+        if name not in SETTINGS:
+            raise AttributeError(name)
+
+        return getattr(omnivore, name)
+
+
+default_client = DefaultClient()
+
+
+def get_client():
+    """
+    Return the `OmnivoreClient` in use by the current thread, or the
+    `DefaultClient` if there is none.
+    """
+    return OmnivoreClient.current() or default_client
+
+
+def get_scope():
+    """
+    Identify whose data a loaded resource is: the current `OmnivoreClient`
+    (None outside of any), with the API key and base URL in use. Resources
+    shared between callers, e.g. through `omnivore.resource_registry`, are
+    only shared within a scope, so that no client is handed resources bound
+    to another one.
+    """
+    omnivore_client = get_client()
+
+    return (
+        OmnivoreClient.current(),
+        omnivore_client.api_key,
+        omnivore_client.api_base
+    )
 
 
 def build_url(endpoint):
-    url = api_base + api_version + '/'
+    omnivore_client = get_client()
+
+    url = omnivore_client.api_base + omnivore_client.api_version + '/'
 
     if endpoint:
         url += endpoint
@@ -15,8 +155,56 @@ def build_url(endpoint):
     return url
 
 
-def get_headers():
-    from omnivore import api_key
+ENDPOINT_NAMES = frozenset([
+    'categories',
+    'discounts',
+    'employees',
+    'items',
+    'locations',
+    'menu',
+    'modifier_groups',
+    'modifiers',
+    'order_types',
+    'payments',
+    'revenue_centers',
+    'tables',
+    'tender_types',
+    'tickets'
+])
+
+
+def get_endpoint(url):
+    """
+    Return the path of an API URL with ids replaced by a placeholder, e.g.
+    'locations/{id}/tickets/{id}/items/'.
+    """
+    path = url.split('?', 1)[0]
+    prefix = build_url('')
+
+    if path.startswith(prefix):
+        path = path[len(prefix):]
+
+    parts = [
+        part if part in ENDPOINT_NAMES else '{id}'
+        for part
+        in path.split('/')
+        if part
+    ]
+
+    return '/'.join(parts) + '/'
+
+
+def get_location_id(url):
+    prefix = build_url('locations/')
+
+    if not url.startswith(prefix):
+        return None
+
+    return url[len(prefix):].split('/', 1)[0] or None
+
+
+def get_headers(omnivore_client=None):
+    api_key = (omnivore_client or get_client()).api_key
 
     if api_key is None:
         raise error.AuthenticationError(
@@ -31,36 +219,347 @@ def get_headers():
     }
 
 
-def get(url):
-    try:
-        res = requests.get(url, headers=get_headers())
-    except Exception, e:
-        handle_request_error(e)
+def get_transport():
+    """
+    Return `omnivore.http_transport`, or by default a shared pooled HTTP/1.1
+    transport built from the `omnivore.pool_*` settings.
+    """
+    from omnivore import http_transport
 
-    return handle_response(res)
+    if http_transport is not None:
+        return http_transport
 
+    global _transport
 
-def post(url, json):
-    try:
-        res = requests.post(url, headers=get_headers(), json=json)
-    except Exception, e:
-        handle_request_error(e)
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = RequestsTransport()
 
-    return handle_response(res)
+    return _transport
 
 
-def delete(url):
+def reset_session():
+    """
+    Close all pooled connections of the default transport. The next request
+    builds a new pool using the current `omnivore.pool_*` settings.
+    """
+    global _transport
+
+    with _transport_lock:
+        transport, _transport = _transport, None
+
+    if transport is not None:
+        transport.close()
+
+
+def request(method, url, json=None, idempotent=None):
+    omnivore_client = get_client()
+    request_coalescer = omnivore_client.request_coalescer
+
+    if method != 'GET':
+        return handle_response(send(method, url, json, idempotent))
+
+    if request_coalescer is None:
+        return fetch(url)
+
+    key = get_request_key(omnivore_client, url)
+    return request_coalescer.call(key, fetch, url)
+
+
+def get_request_key(omnivore_client, url):
+    """
+    Key of a GET in response caches and coalescers, which are shared between
+    clients.
+    """
+    return (get_headers(omnivore_client)['Api-Key'], url)
+
+
+def fetch(url):
+    """
+    GET a URL, going through the client's response cache if it has one.
+    """
+    omnivore_client = get_client()
+    response_cache = omnivore_client.response_cache
+
+    if response_cache is None:
+        return handle_response(send('GET', url))
+
+    cache_key = get_request_key(omnivore_client, url)
+    entry = response_cache.get(cache_key)
+
+    if entry is not None and entry.fresh:
+        return entry.data
+
+    res = send('GET', url, validators=entry and entry.validators)
+
+    if res.status_code == 304 and entry is not None:
+        response_cache.revalidated(cache_key, url, entry)
+        return entry.data
+
+    data = handle_response(res)
+    response_cache.set(cache_key, url, data, res.headers, len(res.content))
+
+    return data
+
+
+def send(method, url, json=None, idempotent=None, validators=None,
+         stream=False):
+    """
+    Make a request, retrying it according to the client's retry policy, and
+    return the raw response. With `stream` set, the body is left unread.
+    """
+    data = None
+    if json is not None:
+        data = codec.dumps(json)
+
+    attempts = RequestAttempts(get_client(), method, url, data, idempotent)
+
     try:
-        res = requests.delete(url, headers=get_headers())
+        res = send_with_retries(attempts, data, validators, stream)
     except Exception, e:
-        handle_request_error(e)
+        exc_info = sys.exc_info()
+        attempts.failed(e)
+        raise exc_info[0], exc_info[1], exc_info[2]
+
+    if stream:
+        length = res.headers.get('Content-Length')
+        response_bytes = int(length) if length else None
+    else:
+        response_bytes = len(res.content)
+
+    attempts.completed(res.status_code, response_bytes)
+    return res
+
+
+def send_with_retries(attempts, data, validators, stream):
+    omnivore_client = attempts.omnivore_client
+    rate_limiter = omnivore_client.rate_limiter
+    transport = omnivore_client.transport
+
+    while True:
+        headers = attempts.next_attempt(validators)
+
+        if rate_limiter is not None:
+            acquire_rate_limit(rate_limiter, headers['Api-Key'], attempts.url)
+
+        RequestCounter.record()
+
+        try:
+            res = transport.request(
+                attempts.method,
+                attempts.url,
+                headers,
+                data=data,
+                stream=stream,
+                timeout=attempts.get_timeout()
+            )
+        except Exception, e:
+            delay = attempts.retry_delay(exception=e)
+
+            if delay is None:
+                handle_request_error(e, transport.errors)
+
+            time.sleep(delay)
+            continue
+
+        delay = attempts.retry_delay(res.status_code, res.headers)
+
+        if delay is not None:
+            res.close()
+            time.sleep(delay)
+            continue
+
+        return res
+
+
+class RequestAttempts(object):
+    """
+    Everything about making a request that does not depend on how it is
+    sent, shared by the blocking client and `omnivore.aio`: the request
+    hooks, the headers and timeout of each attempt, and whether and when a
+    failed attempt is retried.
+    """
+
+    def __init__(self, omnivore_client, method, url, data=None,
+                 idempotent=None):
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+
+        self.omnivore_client = omnivore_client
+        self.method = method
+        self.url = url
+        self.idempotent = idempotent
+        self.attempt = 0
+
+        self.event = RequestEvent(
+            method,
+            url,
+            get_endpoint(url),
+            get_location_id(url),
+            len(data or b'')
+        )
+        run_hooks('before_request', self.event)
+
+        self.start = time.time()
+
+    def next_attempt(self, validators=None):
+        """
+        Start a new attempt and return its headers.
+        """
+        self.attempt += 1
+        self.event.retries = self.attempt - 1
+
+        headers = get_headers(self.omnivore_client)
+
+        if validators:
+            headers.update(validators)
+
+        return headers
+
+    def get_timeout(self):
+        retry_policy = self.omnivore_client.retry_policy
+        timeout = self.omnivore_client.request_timeout
+
+        if retry_policy is not None and self.attempt > 1:
+            timeout = retry_policy.cap_timeout(
+                timeout,
+                time.time() - self.start
+            )
+
+        return timeout
+
+    def retry_delay(self, status_code=None, headers=None, exception=None):
+        """
+        Return how long to wait before retrying the current attempt, which
+        got a response with `status_code` or failed with `exception`, or
+        None if it is final.
+        """
+        retry_policy = self.omnivore_client.retry_policy
+
+        if retry_policy is None:
+            return None
 
-    return handle_response(res)
+        if exception is None and 200 <= status_code < 300:
+            return None
+
+        return retry_policy.retry_delay(
+            self.attempt,
+            time.time() - self.start,
+            self.idempotent,
+            status_code=status_code,
+            headers=headers,
+            exception=exception
+        )
+
+    def completed(self, status_code, response_bytes):
+        self.event.latency = time.time() - self.start
+        self.event.status_code = status_code
+        self.event.response_bytes = response_bytes
+        run_hooks('after_response', self.event)
+
+    def failed(self, e):
+        self.event.latency = time.time() - self.start
+        run_hooks('on_error', self.event, e)
+
+
+def acquire_rate_limit(rate_limiter, api_key, url):
+    if not rate_limiter.acquire(api_key, get_location_id(url)):
+        raise_rate_limit_timeout()
+
+
+def raise_rate_limit_timeout():
+    raise error.RateLimitError(
+        'Timed out waiting for the client-side rate limit.'
+    )
+
+
+def get(url):
+    return request('GET', url)
+
+
+def iter_pages(url):
+    """
+    Yield each page of a list endpoint, following HAL `next` links. The
+    next page is fetched in the background while the current one is being
+    consumed, so at most two pages are held at a time.
+    """
+    res = get(url)
+
+    while True:
+        next_url = get_link(res, 'next')
+        next_page = BackgroundCall(get, next_url) if next_url else None
+
+        yield res
+
+        if next_page is None:
+            return
+
+        res = next_page.result()
+
+
+def iter_list(url, key):
+    """
+    Yield the raw objects of a list endpoint, parsed incrementally if
+    `omnivore.stream_lists` is set.
+    """
+    from omnivore import stream_lists
+
+    if stream_lists:
+        return iter_objects(url, key)
+
+    return (
+        obj
+        for res in iter_pages(url)
+        for obj in get_embedded_object(res, key)
+    )
+
+
+def iter_objects(url, key):
+    """
+    Yield the objects of a list endpoint, following HAL `next` links. If
+    ijson is installed, each page is parsed incrementally and objects are
+    yielded while the rest of the page is still being received; otherwise
+    this falls back to `iter_pages`.
+    """
+    if codec.get_ijson() is None:
+        for res in iter_pages(url):
+            for obj in get_embedded_object(res, key):
+                yield obj
+        return
+
+    while url:
+        res = send('GET', url, stream=True)
+
+        try:
+            if not (200 <= res.status_code < 300):
+                handle_response(res)
+
+            res.raw.decode_content = True
+            page = codec.StreamedList(res.raw, key)
+
+            try:
+                for obj in page:
+                    yield obj
+            except ValueError, e:
+                handle_parse_error(e, res.status_code, res.headers)
+
+            url = page.next_url
+        finally:
+            res.close()
+
+
+def post(url, json, idempotent=False):
+    return request('POST', url, json=json, idempotent=idempotent)
+
+
+def delete(url):
+    return request('DELETE', url)
 
 
 def handle_response(res):
     try:
-        json = res.json()
+        json = codec.loads(res.content)
     except ValueError, e:
         handle_parse_error(e)
 
@@ -70,8 +569,8 @@ def handle_response(res):
     return json
 
 
-def handle_request_error(e):
-    if isinstance(e, requests.exceptions.RequestException):
+def handle_request_error(e, errors=RequestsTransport.errors):
+    if isinstance(e, errors):
         msg = 'Unexpected error communicating with Omnivore.'
         err = '{}: {}'.format(type(e).__name__, unicode(e))
     else:
@@ -98,6 +597,9 @@ def handle_error_code(json, status_code, headers):
     elif status_code == 404:
         err = json.get('error', 'Not found')
         raise error.InvalidRequestError(err, status_code, headers)
+    elif status_code == 429:
+        err = json.get('error', 'Too many requests')
+        raise error.RateLimitError(err, status_code, headers)
     elif status_code == 500:
         err = json.get('error', 'Internal server error')
         raise error.APIError(err, status_code, headers)
@@ -0,0 +1,107 @@
+from __future__ import unicode_literals
+
+import sys
+import threading
+
+from omnivore import error
+
+
+class Call(object):
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.exc_info = None
+
+    def result(self):
+        if self.exc_info is not None:
+            raise self.exc_info[0], self.exc_info[1], self.exc_info[2]
+
+        return self.value
+
+
+class RequestCoalescer(object):
+    """
+    Collapses identical GETs made at the same time, from any number of
+    threads (or coroutines, see `omnivore.aio`), into a single request
+    whose parsed response is shared by every caller.
+
+    The first caller makes the request; callers asking for the same URL
+    with the same API key while it is in flight wait for it for up to
+    `timeout` seconds, then raise an `APIConnectionError` while the request
+    carries on for the others. If the request fails, each waiter raises its
+    error. Shared responses must not be modified.
+
+    `coalesced` counts the requests that were saved.
+    """
+
+    def __init__(self, timeout=None):
+        self.timeout = timeout
+        self.calls = {}
+        self.futures = {}
+        self.coalesced = 0
+        self.lock = threading.Lock()
+
+    def call(self, key, func, *args):
+        """
+        Return `func(*args)`, or the result of the call in flight for `key`.
+        """
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+
+            if leader:
+                call = self.calls[key] = Call()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            if not call.done.wait(self.timeout):
+                raise_timeout()
+
+            return call.result()
+
+        try:
+            call.value = func(*args)
+        except Exception:
+            call.exc_info = sys.exc_info()
+        finally:
+            with self.lock:
+                del self.calls[key]
+
+            call.done.set()
+
+        return call.result()
+
+    def call_future(self, key, func, *args):
+        """
+        Like `call`, for a `func` returning a future, such as a tornado
+        coroutine: return `(future, leader)`, where `future` is the one in
+        flight for `key`, or else `func(*args)`. Waiting for it, and giving up
+        after `timeout` if not the leader, is left to the caller.
+        """
+        with self.lock:
+            future = self.futures.get(key)
+
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+
+        future = func(*args)
+
+        with self.lock:
+            self.futures[key] = future
+
+        future.add_done_callback(lambda f: self.forget_future(key, f))
+        return future, True
+
+    def forget_future(self, key, future):
+        with self.lock:
+            if self.futures.get(key) is future:
+                del self.futures[key]
+
+
+def raise_timeout():
+    raise error.APIConnectionError(
+        'Timed out waiting for an identical request in flight.'
+    )
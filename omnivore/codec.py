@@ -0,0 +1,117 @@
+from __future__ import unicode_literals
+
+import importlib
+
+from decimal import Decimal
+
+try:
+    from ijson.common import JSONError, ObjectBuilder
+except ImportError:
+    JSONError = ObjectBuilder = None
+
+
+# JSON modules tried, fastest first, when `omnivore.json_codec` is None
+CODECS = ('ujson', 'simplejson', 'json')
+
+# ijson backends tried, fastest first. The pure Python one is slower than
+# parsing a whole page with the stdlib, so it is only used as a last resort.
+IJSON_BACKENDS = ('yajl2_c', 'yajl2_cffi', 'yajl2', 'python')
+
+_codecs = {}
+_ijson = []
+
+
+def get_codec(codec=None):
+    """
+    Return the module used to encode and decode JSON: `codec` itself if it
+    is an object with `loads` and `dumps`, the module of that name, or the
+    fastest installed one of `CODECS` if it is None.
+    """
+    if codec is not None and not isinstance(codec, basestring):
+        return codec
+
+    if codec not in _codecs:
+        for name in [codec] if codec else CODECS:
+            try:
+                _codecs[codec] = importlib.import_module(name)
+                break
+            except ImportError:
+                if codec:
+                    raise
+
+    return _codecs[codec]
+
+
+def loads(data):
+    from omnivore import json_codec
+    return get_codec(json_codec).loads(data)
+
+
+def dumps(obj):
+    from omnivore import json_codec
+    return get_codec(json_codec).dumps(obj)
+
+
+def get_ijson():
+    """
+    Return the fastest available ijson backend, or None if ijson is not
+    installed.
+    """
+    if ObjectBuilder is None:
+        return None
+
+    if not _ijson:
+        backend = None
+
+        for name in IJSON_BACKENDS:
+            try:
+                backend = importlib.import_module('ijson.backends.' + name)
+                break
+            except Exception:
+                # yajl backends raise their own error when yajl is missing
+                continue
+
+        _ijson.append(backend)
+
+    return _ijson[0]
+
+
+class StreamedList(object):
+    """
+    Incrementally parsed page of a HAL list response, read from the
+    file-like `stream`. Iterating over it yields each object of
+    `_embedded.<key>` as soon as it has been read off the wire, after which
+    `next_url` holds the page's `next` link, if any.
+    """
+
+    def __init__(self, stream, key):
+        self.stream = stream
+        self.key = key
+        self.next_url = None
+
+    def __iter__(self):
+        backend = get_ijson()
+        prefix = '_embedded.{}.item'.format(self.key)
+        events = backend.parse(self.stream)
+        builder = None
+        end = None
+
+        try:
+            for path, event, value in events:
+                if isinstance(value, Decimal):
+                    value = float(value)
+
+                if builder is not None:
+                    if path == prefix and event == end:
+                        yield builder.value
+                        builder = None
+                    else:
+                        builder.event(event, value)
+                elif path == prefix and event in ('start_map', 'start_array'):
+                    builder = ObjectBuilder()
+                    builder.event(event, value)
+                    end = event.replace('start', 'end')
+                elif path == '_links.next.href' and event == 'string':
+                    self.next_url = value
+        except JSONError as e:
+            raise ValueError(unicode(e))
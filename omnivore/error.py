@@ -24,3 +24,29 @@ class InvalidRequestError(OmnivoreError):
 
 class AuthenticationError(OmnivoreError):
     pass
+
+
+class RateLimitError(OmnivoreError):
+    pass
+
+
+class OrderError(OmnivoreError):
+    """
+    Failure while placing an order, raised in place of the error `cause`
+    that stopped it at `stage`. If a ticket had been opened, `ticket_id` is
+    set and `voided` tells whether it was voided afterwards.
+    """
+
+    def __init__(self, error, stage, cause, ticket_id=None, voided=False,
+                 timings=None):
+        super(OrderError, self).__init__(
+            error,
+            getattr(cause, 'status_code', None),
+            getattr(cause, 'headers', None)
+        )
+
+        self.stage = stage
+        self.cause = cause
+        self.ticket_id = ticket_id
+        self.voided = voided
+        self.timings = timings
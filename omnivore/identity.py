@@ -0,0 +1,74 @@
+from __future__ import unicode_literals
+
+import threading
+
+from omnivore.scope import ThreadScope
+from omnivore.stats import RequestCounter
+
+
+class IdentityMap(ThreadScope):
+    """
+    Unit-of-work scope in which each resource exists only once. Inside
+    `with IdentityMap():`, building a resource with the same class and ids
+    (location, parent ticket or item, and its own id) as one built earlier
+    returns that same object, refreshed in place with the new data.
+    """
+
+    local = threading.local()
+
+    def __init__(self):
+        self.objects = {}
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.objects)
+
+    def get_or_add(self, key, create):
+        with self.lock:
+            obj = self.objects.get(key)
+
+            if obj is None:
+                obj = self.objects[key] = create()
+
+        return obj
+
+    def clear(self):
+        with self.lock:
+            self.objects.clear()
+
+
+def bind(func):
+    """
+    Wrap `func` to run inside the current client, identity map and request
+    counters, if any, from whichever thread it is called.
+
+    Scopes are per thread. Prefetching and concurrent loads run their work
+    through `bind`, so the scopes entered where they were started are
+    carried over to the threads doing the work.
+    """
+    from omnivore.client import OmnivoreClient
+
+    omnivore_client = OmnivoreClient.current()
+    identity_map = IdentityMap.current()
+    counters = list(RequestCounter.get_stack())
+
+    if omnivore_client is None and identity_map is None and not counters:
+        return func
+
+    def bound(*args):
+        stack = RequestCounter.get_stack()
+        stack.extend(counters)
+        clients = OmnivoreClient.get_stack()
+        clients.append(omnivore_client)
+
+        try:
+            if identity_map is None:
+                return func(*args)
+
+            with identity_map:
+                return func(*args)
+        finally:
+            clients.pop()
+            del stack[len(stack) - len(counters):]
+
+    return bound
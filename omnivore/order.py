@@ -0,0 +1,132 @@
+from __future__ import unicode_literals
+
+import time
+
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from omnivore import client, error
+from omnivore.resource.ticket import Payment, Ticket, TicketItem
+
+
+class OrderResult(object):
+
+    def __init__(self, ticket, payment, timings):
+        self.ticket = ticket
+        self.payment = payment
+        self.timings = timings
+
+
+def place_order(location_id, ticket, items, payment):
+    """
+    Open a ticket, add every item to it and pay for it in three requests.
+
+    `ticket` holds the keyword arguments of `Ticket.open`, each entry of
+    `items` those of `Ticket.add_item`, and `payment` those of `Ticket.pay`.
+    If the payment has no `amount`, the amount due after adding the items
+    is paid, and `tip` defaults to 0. All of them are validated before any
+    request is made.
+
+    Responses are only turned into a `Ticket` once, at the end. Should any
+    step fail after the ticket was opened, the ticket is voided and an
+    `OrderError` is raised, unless the payment request failed without a
+    clear answer (see `is_outcome_unknown`): the payment may then have gone
+    through, so the ticket is left as it is. Returns an `OrderResult` with
+    the ticket, the payment response and the duration of each stage.
+    """
+    timings = OrderedDict()
+    start = time.time()
+    ticket_id = None
+    stage = 'validate'
+
+    try:
+        open_data = Ticket.build_open_data(**ticket)
+        items_data = [Ticket.build_item_data(**item) for item in items]
+
+        payment = dict(payment)
+        payment.setdefault('amount', None)
+        payment.setdefault('tip', 0)
+        payment_data = Ticket.build_payment_data(**payment)
+
+        stage = 'open'
+        with timed(timings, stage):
+            res = client.post(Ticket.list_url(location_id), open_data)
+            ticket_id = res['id']
+
+        stage = 'items'
+        with timed(timings, stage):
+            res = client.post(
+                TicketItem.list_url(location_id, ticket_id),
+                items_data
+            )
+
+        stage = 'pay'
+        with timed(timings, stage):
+            if payment_data['amount'] is None:
+                payment_data['amount'] = res['totals']['due']
+
+            res = client.post(
+                Payment.list_url(location_id, ticket_id),
+                payment_data
+            )
+    except Exception, e:
+        voided = False
+        if ticket_id is not None and not (
+            stage == 'pay' and is_outcome_unknown(e)
+        ):
+            voided = void(location_id, ticket_id, timings)
+
+        timings['total'] = time.time() - start
+
+        raise error.OrderError(
+            'Placing order failed at stage \'{}\': {}'.format(stage, e),
+            stage,
+            e,
+            ticket_id,
+            voided,
+            timings
+        )
+
+    ticket = Ticket(location_id, **res.pop('ticket'))
+    timings['total'] = time.time() - start
+
+    return OrderResult(ticket, res, timings)
+
+
+def is_outcome_unknown(e):
+    """
+    Whether a request may have been carried out although it failed: the
+    connection broke or timed out, the server failed, or its response could
+    not be read.
+    """
+    if isinstance(e, error.APIConnectionError):
+        return True
+
+    if isinstance(e, error.APIError):
+        return e.status_code is None or e.status_code >= 500
+
+    return False
+
+
+def void(location_id, ticket_id, timings):
+    with timed(timings, 'void'):
+        try:
+            client.post(
+                Ticket.retrieve_url(location_id, ticket_id),
+                {'void': True},
+                idempotent=True
+            )
+        except Exception:
+            return False
+
+    return True
+
+
+@contextmanager
+def timed(timings, stage):
+    start = time.time()
+
+    try:
+        yield
+    finally:
+        timings[stage] = time.time() - start
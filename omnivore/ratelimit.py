@@ -0,0 +1,192 @@
+from __future__ import unicode_literals
+
+import fcntl
+import json
+import os
+import threading
+import time
+
+
+class RateLimiter(object):
+    """
+    Token bucket limiting the rate of requests made with an API key, and
+    optionally with an API key at a single location.
+
+    Up to `capacity` requests can be made in a burst, after which requests
+    are let through at `rate` per second. The capacity defaults to `rate`,
+    and to at least 1 so that rates below one request per second work.
+    Buckets live in `backend`, which
+    defaults to process memory; use a `FileBackend` to share them between
+    processes.
+    """
+
+    def __init__(self, rate, capacity=None, per_location=False,
+                 backend=None, timeout=None):
+        if capacity is None:
+            capacity = max(1, rate)
+
+        if capacity < 1:
+            raise ValueError('Rate limiter capacity must be at least 1')
+
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.per_location = per_location
+        self.backend = backend or MemoryBackend()
+        self.timeout = timeout
+
+    def get_key(self, api_key, location_id=None):
+        if self.per_location and location_id:
+            return '{}:{}'.format(api_key, location_id)
+
+        return api_key
+
+    def try_acquire(self, api_key, location_id=None):
+        """
+        Take a token if one is available. Returns 0 on success, otherwise
+        the number of seconds until the next token becomes available.
+        """
+        key = self.get_key(api_key, location_id)
+        return self.backend.take(key, self.rate, self.capacity)
+
+    def acquire(self, api_key, location_id=None, blocking=True,
+                timeout=None):
+        """
+        Take a token, waiting for one to become available if `blocking` is
+        set. Returns whether a token was taken before `timeout` (defaulting
+        to the limiter's own timeout) expired.
+        """
+        deadline = self.get_deadline(timeout)
+
+        while True:
+            wait = self.get_wait(api_key, location_id, deadline)
+
+            if wait == 0:
+                return True
+
+            if wait is None or not blocking:
+                return False
+
+            time.sleep(wait)
+
+    def get_deadline(self, timeout=None):
+        if timeout is None:
+            timeout = self.timeout
+
+        if timeout is None:
+            return None
+
+        return time.time() + timeout
+
+    def get_wait(self, api_key, location_id=None, deadline=None):
+        """
+        Take a token if one is available and return 0. Otherwise return how
+        long to wait before trying again, or None if no token can be taken
+        before `deadline`. Waiting is left to the caller, so that
+        `omnivore.aio` can wait without blocking the IOLoop.
+        """
+        wait = self.try_acquire(api_key, location_id)
+
+        if not wait or deadline is None:
+            return wait
+
+        remaining = deadline - time.time()
+
+        if remaining >= wait:
+            return wait
+
+        # Try one last time at the deadline
+        return remaining if remaining > 0 else None
+
+
+def take_token(state, rate, capacity, now):
+    """
+    Refill a `[tokens, updated_at]` bucket and take one token from it.
+    Returns the new bucket state and the time to wait (0 if taken).
+
+    `now` should be read once the bucket is locked. It never moves the
+    bucket back in time, so that no refill is counted twice.
+    """
+    if state is None:
+        tokens, updated_at = capacity, now
+    else:
+        tokens, updated_at = state
+
+    now = max(now, updated_at)
+    tokens = min(capacity, tokens + (now - updated_at) * rate)
+
+    if tokens >= 1:
+        return [tokens - 1, now], 0
+
+    return [tokens, now], (1 - tokens) / rate
+
+
+class MemoryBackend(object):
+    """
+    Buckets shared by all threads of the current process.
+    """
+
+    def __init__(self):
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def take(self, key, rate, capacity):
+        with self.lock:
+            self.buckets[key], wait = take_token(
+                self.buckets.get(key),
+                rate,
+                capacity,
+                time.time()
+            )
+
+        return wait
+
+
+class FileBackend(object):
+    """
+    Buckets stored in a JSON file guarded by an exclusive `flock`, shared by
+    every process (and thread) on the host that uses the same path.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def take(self, key, rate, capacity):
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+
+            buckets = self.read(fd)
+            buckets[key], wait = take_token(
+                buckets.get(key),
+                rate,
+                capacity,
+                time.time()
+            )
+            self.write(fd, buckets)
+        finally:
+            os.close(fd)
+
+        return wait
+
+    def read(self, fd):
+        os.lseek(fd, 0, os.SEEK_SET)
+
+        chunks = []
+        while True:
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+
+        try:
+            return json.loads(b''.join(chunks))
+        except ValueError:
+            return {}
+
+    def write(self, fd, buckets):
+        data = json.dumps(buckets).encode('utf-8')
+
+        os.lseek(fd, 0, os.SEEK_SET)
+        os.ftruncate(fd, 0)
+        os.write(fd, data)
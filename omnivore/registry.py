@@ -0,0 +1,100 @@
+from __future__ import unicode_literals
+
+import sys
+import time
+
+from omnivore.cache import LRUCache
+from omnivore.util import get_attribute_names
+
+
+class RegistryEntry(object):
+
+    def __init__(self, value, loaded_at, size):
+        self.value = value
+        self.loaded_at = loaded_at
+        self.size = size
+
+
+class Registry(LRUCache):
+    """
+    Process-wide LRU cache of related resources, shared by every resource
+    instance. Entries are keyed by `(scope, location_id, relation)`, e.g.
+    `(scope, 'abc', 'employees')` or `(scope, 'abc', 'menu.items')`, where
+    the scope (see `client.get_scope`) keeps the resources loaded by each
+    client and API key apart.
+
+    The registry holds at most `max_entries` entries and, if `max_bytes` is
+    set, at most roughly that many bytes of resources, as estimated by
+    `estimate_size`. Entries older than `ttl` seconds are reloaded.
+    """
+
+    def __init__(self, max_entries=1000, max_bytes=None, ttl=None):
+        super(Registry, self).__init__(max_entries, max_bytes)
+        self.ttl = ttl
+
+    def get_or_load(self, key, load, max_age=None):
+        """
+        Return the value stored under `key`, or store and return `load()`
+        if there is none or it is older than `max_age` (or the registry's
+        own ttl) seconds.
+        """
+        if max_age is None or (self.ttl is not None and self.ttl < max_age):
+            max_age = self.ttl
+
+        with self.lock:
+            entry = self.touch(key)
+
+            if entry is not None:
+                if max_age is None or time.time() - entry.loaded_at < max_age:
+                    return entry.value
+
+                self.remove(key)
+
+        value = load()
+        self.set(key, value)
+
+        return value
+
+    def set(self, key, value):
+        size = estimate_size(value)
+
+        with self.lock:
+            self.put(key, RegistryEntry(value, time.time(), size))
+
+    def invalidate(self, location_id, relation=None, scope=None,
+                   prefix=None):
+        """
+        Drop one relation of a location, the relations starting with
+        `prefix` (e.g. 'menu.'), or all of them, in one scope or in all of
+        them.
+        """
+        with self.lock:
+            for key in list(self.entries):
+                if key[1] != location_id:
+                    continue
+                if relation is not None and key[2] != relation:
+                    continue
+                if prefix is not None and not key[2].startswith(prefix):
+                    continue
+                if scope is not None and key[0] != scope:
+                    continue
+
+                self.remove(key)
+
+
+def estimate_size(value):
+    """
+    Rough memory footprint of a list of resources: the list, each resource
+    and its attribute values, not counting deeper nesting.
+    """
+    size = sys.getsizeof(value)
+
+    for obj in value:
+        size += sys.getsizeof(obj)
+        size += sum(
+            sys.getsizeof(getattr(obj, name, None))
+            for name
+            in get_attribute_names(obj.__class__)
+        )
+
+    return size
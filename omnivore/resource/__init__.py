@@ -1,9 +1,61 @@
 from __future__ import unicode_literals
 from omnivore import client
+from omnivore.identity import IdentityMap
+from omnivore.util import (
+    EmbeddedProperty,
+    bound,
+    get_attribute_names,
+    get_cached_properties,
+    get_embedded_properties,
+    get_embedded_object,
+    get_slots,
+    map_concurrently
+)
 
 
 class PrintableResource(object):
 
+    # The OmnivoreClient the resource was loaded with, see util.bound
+    __slots__ = ('_client',)
+
+    def __new__(cls, *args, **kwargs):
+        obj = super(PrintableResource, cls).__new__(cls)
+        obj._client = client.OmnivoreClient.current()
+        obj.init_cache()
+        return obj
+
+    def init_cache(self):
+        # Cached properties are set from prefetch and load_full threads, so
+        # their dict exists up front rather than being created by whichever
+        # thread sets one first
+        if hasattr(self.__class__, '_cached'):
+            self._cached = {}
+
+    def __getstate__(self):
+        # Slotted objects have no __dict__ to pickle, so their state is the
+        # slots that are set. The client is left out: an unpickled resource
+        # is bound to the current client, as when it is built
+        state = {}
+
+        for name, slot in get_slots(self.__class__):
+            if name == '_client':
+                continue
+
+            try:
+                state[name] = slot.__get__(self)
+            except AttributeError:
+                pass
+
+        return state
+
+    def __setstate__(self, state):
+        self._client = client.OmnivoreClient.current()
+        self.init_cache()
+
+        for name, slot in get_slots(self.__class__):
+            if name in state:
+                slot.__set__(self, state[name])
+
     def __unicode__(self):
         return '<Omnivore::{} {}>'.format(self.__class__.__name__, self.id)
 
@@ -11,21 +63,137 @@ class PrintableResource(object):
         return unicode(self).encode('utf-8')
 
     def __repr__(self):
-        attrs = [
-            '\'{}\': {}'.format(key, repr(getattr(self, key)))
-            for key
-            in self.__dict__
-        ]
+        cls = self.__class__
+        attrs = []
+
+        for key in get_attribute_names(cls):
+            prop = getattr(cls, key, None)
+
+            # Never fetch anything just to print it
+            if isinstance(prop, EmbeddedProperty):
+                if not (prop.is_fresh(self) or prop.is_embedded(self)):
+                    continue
+
+            if hasattr(self, key):
+                value = repr(getattr(self, key))
+                attrs.append('\'{}\': {}'.format(key, value))
 
         return '\n{{\n\t{}\n}}'.format('\n\t'.join(attrs))
 
 
+class RelatedResource(object):
+    """
+    Mixin for resources that own lists of other resources, each served from
+    its own list endpoint. `related` maps a relation name to the resource
+    class, and `related_args` gives the leading constructor (and `list_url`)
+    arguments for that class. Relations listed in `shared_related` are
+    reference data that all instances share through
+    `omnivore.resource_registry`.
+    """
+
+    __slots__ = ()
+
+    related = {}
+    shared_related = ()
+
+    @property
+    def related_args(self):
+        raise NotImplementedError
+
+    def related_url(self, name):
+        return self.related[name].list_url(*self.related_args)
+
+    def build_related(self, name, res):
+        return self.related[name].build_list(res, *self.related_args)
+
+    @bound
+    def iter_related(self, name):
+        return self.related[name].iter_list(
+            self.related_url(name),
+            *self.related_args
+        )
+
+    def get_related(self, name):
+        from omnivore import resource_registry
+
+        key = self.registry_key(name)
+
+        if resource_registry is None or key is None:
+            return list(self.iter_related(name))
+
+        return resource_registry.get_or_load(
+            (client.get_scope(),) + key,
+            lambda: list(self.iter_related(name)),
+            getattr(self.__class__, name).ttl
+        )
+
+    def registry_key(self, name):
+        """
+        Key under which a relation is shared through
+        `omnivore.resource_registry`, or None if it is not shared.
+        """
+        return None
+
+    @bound
+    def invalidate(self, *names):
+        """
+        Drop the cached values of the named properties (all of them by
+        default), so that they are fetched again on next access.
+        """
+        from omnivore import resource_registry
+
+        cls = self.__class__
+
+        for name in names or get_cached_properties(cls):
+            getattr(cls, name).invalidate(self)
+
+            key = self.registry_key(name)
+            if resource_registry is not None and key is not None:
+                resource_registry.invalidate(*key, scope=client.get_scope())
+
+    def prefetch(self, *names, **kwargs):
+        """
+        Load the named relations (all of them by default) concurrently on
+        up to `workers` threads, defaulting to `omnivore.max_workers`. The
+        results are cached exactly as if each property had been accessed.
+        """
+        from omnivore import max_workers
+
+        workers = kwargs.pop('workers', max_workers)
+        tasks = [
+            (obj, name)
+            for obj, name
+            in self.prefetch_tasks(names or sorted(self.related))
+            if not getattr(obj.__class__, name).is_fresh(obj)
+        ]
+
+        map_concurrently(lambda task: getattr(*task), tasks, workers)
+        return self
+
+    def prefetch_tasks(self, names):
+        return [(self, name) for name in names]
+
+
 class OmnivoreResource(PrintableResource):
 
+    __slots__ = ('id',)
+
+    list_key = None
+
     @classmethod
     def list_url(cls):
         return client.build_url('locations/')
 
+    @classmethod
+    def build_list(cls, res, *args):
+        objs = get_embedded_object(res, cls.list_key)
+        return [cls(*args, **obj) for obj in objs]
+
+    @classmethod
+    def iter_list(cls, url, *args):
+        for obj in client.iter_list(url, cls.list_key):
+            yield cls(*args, **obj)
+
     @classmethod
     def retrieve_url(cls, instance_id):
         return cls.list_url() + instance_id + '/'
@@ -35,10 +203,21 @@ class OmnivoreResource(PrintableResource):
         res = client.get(cls.retrieve_url(instance_id))
         return cls(**res)
 
+    def __new__(cls, *args, **kwargs):
+        identity_map = IdentityMap.current()
+        create = super(OmnivoreResource, cls).__new__
+
+        if identity_map is None or 'id' not in kwargs:
+            return create(cls)
+
+        key = (cls,) + args + (kwargs['id'],)
+        return identity_map.get_or_add(key, lambda: create(cls))
+
     def __init__(self, **kwargs):
         self.id = kwargs['id']
         self.refresh_from(**kwargs)
 
+    @bound
     def refresh(self):
         res = client.get(self.instance_url)
         return self.refresh_from(**res)
@@ -46,6 +225,28 @@ class OmnivoreResource(PrintableResource):
     def refresh_from(self, **kwargs):
         raise NotImplementedError
 
+    def set_embedded(self, embedded):
+        """
+        Replace the embedded objects of this resource. They are built right
+        away, unless `omnivore.lazy_embedded` is set, in which case the raw
+        data is kept and each object is built when first accessed.
+        """
+        from omnivore import lazy_embedded
+
+        props = get_embedded_properties(self.__class__)
+
+        for prop in props:
+            prop.invalidate(self)
+
+        self._embedded = embedded
+
+        if not lazy_embedded:
+            for prop in props:
+                if prop.key in embedded:
+                    getattr(self, prop.name)
+
+            self._embedded = None
+
     @property
     def instance_url(self):
         return self.__class__.retrieve_url(self.id)
@@ -53,6 +254,8 @@ class OmnivoreResource(PrintableResource):
 
 class OmnivoreLocationResource(OmnivoreResource):
 
+    __slots__ = ('location_id',)
+
     @classmethod
     def list_url(cls, location_id):
         return client.build_url('locations/') + location_id + '/'
@@ -1,20 +1,39 @@
-from omnivore import client
-from omnivore.resource import OmnivoreResource, OmnivoreLocationResource
+from omnivore.resource import (
+    OmnivoreResource,
+    OmnivoreLocationResource,
+    RelatedResource
+)
 from omnivore.resource.menu import Menu
 from omnivore.util import (
+    bound,
     cached_property,
     get_embedded_object,
     has_embedded_objects
 )
 
 
-class Location(OmnivoreResource):
+class Location(OmnivoreResource, RelatedResource):
+
+    __slots__ = ('address', 'name', 'phone', 'website', '_cached')
+
+    list_key = 'locations'
+
+    shared_related = (
+        'discounts',
+        'employees',
+        'order_types',
+        'revenue_centers',
+        'tables',
+        'tender_types'
+    )
 
     @classmethod
     def all(cls):
-        res = client.get(Location.list_url())
-        locations = get_embedded_object(res, 'locations')
-        return [Location(**l) for l in locations]
+        return list(cls.iter_all())
+
+    @classmethod
+    def iter_all(cls):
+        return cls.iter_list(cls.list_url())
 
     def refresh_from(self, **kwargs):
         self.address = kwargs['address']
@@ -22,8 +41,33 @@ class Location(OmnivoreResource):
         self.phone = kwargs['phone']
         self.website = kwargs['website']
 
+    @property
+    def related_args(self):
+        return (self.id,)
+
+    def registry_key(self, name):
+        if name in self.shared_related:
+            return (self.id, name)
+
+    def prefetch(self, *names, **kwargs):
+        names = names or sorted(self.related) + ['menu']
+        return super(Location, self).prefetch(*names, **kwargs)
+
+    def prefetch_tasks(self, names):
+        tasks = []
+
+        for name in names:
+            if name == 'menu':
+                menu_names = sorted(self.menu.related)
+                tasks.extend(self.menu.prefetch_tasks(menu_names))
+            else:
+                tasks.append((self, name))
+
+        return tasks
+
     # Creating related objects
 
+    @bound
     def open_ticket(self, employee_id, order_type_id, revenue_center_id,
                     table_id, guest_count, name, auto_send):
         ticket = Ticket.open(
@@ -41,19 +85,20 @@ class Location(OmnivoreResource):
 
         return ticket
 
+    @bound
+    def place_order(self, ticket, items, payment):
+        from omnivore.order import place_order
+        return place_order(self.id, ticket, items, payment)
+
     # Retrieving related objects
 
     @cached_property
     def discounts(self):
-        res = client.get(Discount.list_url(self.id))
-        discounts = get_embedded_object(res, 'discounts')
-        return [Discount(self.id, **d) for d in discounts]
+        return self.get_related('discounts')
 
     @cached_property
     def employees(self):
-        res = client.get(Employee.list_url(self.id))
-        employees = get_embedded_object(res, 'employees')
-        return [Employee(self.id, **e) for e in employees]
+        return self.get_related('employees')
 
     @cached_property
     def menu(self):
@@ -61,33 +106,26 @@ class Location(OmnivoreResource):
 
     @cached_property
     def order_types(self):
-        res = client.get(OrderType.list_url(self.id))
-        order_types = get_embedded_object(res, 'order_types')
-        return [OrderType(self.id, **ot) for ot in order_types]
+        return self.get_related('order_types')
 
     @cached_property
     def revenue_centers(self):
-        res = client.get(RevenueCenter.list_url(self.id))
-        revenue_centers = get_embedded_object(res, 'revenue_centers')
-        return [RevenueCenter(self.id, **rc) for rc in revenue_centers]
+        return self.get_related('revenue_centers')
 
     @cached_property
     def tables(self):
-        res = client.get(Table.list_url(self.id))
-        tables = get_embedded_object(res, 'tables')
-        return [Table(self.id, **t) for t in tables]
+        return self.get_related('tables')
 
     @cached_property
     def tender_types(self):
-        res = client.get(TenderType.list_url(self.id))
-        tender_types = get_embedded_object(res, 'tender_types')
-        return [TenderType(self.id, **tt) for tt in tender_types]
+        return self.get_related('tender_types')
 
     @cached_property
     def tickets(self):
-        res = client.get(Ticket.list_url(self.id))
-        tickets = get_embedded_object(res, 'tickets')
-        return [Ticket(self.id, **t) for t in tickets]
+        return self.get_related('tickets')
+
+    def iter_tickets(self):
+        return self.iter_related('tickets')
 
     def __unicode__(self):
         return '<{} {}>'.format(self.__class__.__name__, self.id)
@@ -95,6 +133,17 @@ class Location(OmnivoreResource):
 
 class Table(OmnivoreLocationResource):
 
+    __slots__ = (
+        'available',
+        'name',
+        'number',
+        'seats',
+        'open_tickets',
+        'revenue_center'
+    )
+
+    list_key = 'tables'
+
     @classmethod
     def list_url(cls, location_id):
         return super(Table, cls).list_url(location_id) + 'tables/'
@@ -122,6 +171,10 @@ class Table(OmnivoreLocationResource):
 
 class Employee(OmnivoreLocationResource):
 
+    __slots__ = ('check_name', 'first_name', 'last_name', 'login')
+
+    list_key = 'employees'
+
     @classmethod
     def list_url(cls, location_id):
         return super(Employee, cls).list_url(location_id) + 'employees/'
@@ -135,6 +188,10 @@ class Employee(OmnivoreLocationResource):
 
 class OrderType(OmnivoreLocationResource):
 
+    __slots__ = ('available', 'name')
+
+    list_key = 'order_types'
+
     @classmethod
     def list_url(cls, location_id):
         return super(OrderType, cls).list_url(location_id) + 'order_types/'
@@ -146,6 +203,10 @@ class OrderType(OmnivoreLocationResource):
 
 class TenderType(OmnivoreLocationResource):
 
+    __slots__ = ('name',)
+
+    list_key = 'tender_types'
+
     @classmethod
     def list_url(cls, location_id):
         return super(TenderType, cls).list_url(location_id) + 'tender_types/'
@@ -156,6 +217,10 @@ class TenderType(OmnivoreLocationResource):
 
 class RevenueCenter(OmnivoreLocationResource):
 
+    __slots__ = ('default', 'name', 'open_tickets', 'tables')
+
+    list_key = 'revenue_centers'
+
     @classmethod
     def list_url(cls, location_id):
         base_url = super(RevenueCenter, cls).list_url(location_id)
@@ -179,6 +244,20 @@ class RevenueCenter(OmnivoreLocationResource):
 
 class Discount(OmnivoreLocationResource):
 
+    __slots__ = (
+        'applies_to',
+        'available',
+        'max_value',
+        'min_ticket_total',
+        'min_value',
+        'name',
+        'open',
+        'type',
+        'value'
+    )
+
+    list_key = 'discounts'
+
     @classmethod
     def list_url(cls, location_id):
         return super(Discount, cls).list_url(location_id) + 'discounts/'
@@ -196,3 +275,13 @@ class Discount(OmnivoreLocationResource):
 
 
 from omnivore.resource.ticket import Ticket  # noqa - avoid circular import
+
+Location.related = {
+    'discounts': Discount,
+    'employees': Employee,
+    'order_types': OrderType,
+    'revenue_centers': RevenueCenter,
+    'tables': Table,
+    'tender_types': TenderType,
+    'tickets': Ticket
+}
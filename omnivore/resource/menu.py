@@ -1,16 +1,25 @@
 from __future__ import unicode_literals
-from omnivore import client
-from omnivore.resource import PrintableResource
+
+import re
+import time
+import unicodedata
+
+from omnivore.resource import PrintableResource, RelatedResource
 from omnivore.resource.base import OmnivoreLocationResource
+from omnivore.stats import RequestCounter
 from omnivore.util import (
+    bound,
     cached_property,
     get_embedded_object,
-    has_embedded_objects
+    has_embedded_objects,
+    map_concurrently
 )
 
 
 class OmnivoreMenuResource(OmnivoreLocationResource):
 
+    __slots__ = ()
+
     @classmethod
     def list_url(cls, location_id):
         base_url = super(OmnivoreMenuResource, cls).list_url(location_id)
@@ -19,6 +28,8 @@ class OmnivoreMenuResource(OmnivoreLocationResource):
 
 class OmnivoreMenuItemResource(OmnivoreMenuResource):
 
+    __slots__ = ('item_id',)
+
     @classmethod
     def list_url(cls, location_id, item_id):
         base_url = super(OmnivoreMenuItemResource, cls).list_url(location_id)
@@ -41,30 +52,111 @@ class OmnivoreMenuItemResource(OmnivoreMenuResource):
         )
 
 
-class Menu(PrintableResource):
+class Menu(PrintableResource, RelatedResource):
+
+    __slots__ = ('location_id', '_cached')
+
+    shared_related = ('categories', 'items', 'modifiers')
 
     def __init__(self, location_id):
         self.location_id = location_id
 
+    @property
+    def related_args(self):
+        return (self.location_id,)
+
+    def registry_key(self, name):
+        if name in self.shared_related:
+            return (self.location_id, 'menu.' + name)
+
     # Retrieving related objects
 
     @cached_property
     def categories(self):
-        res = client.get(Category.list_url(self.location_id))
-        categories = get_embedded_object(res, 'categories')
-        return [Category(self.location_id, **c) for c in categories]
+        return self.get_related('categories')
 
     @cached_property
     def items(self):
-        res = client.get(MenuItem.list_url(self.location_id))
-        menu_items = get_embedded_object(res, 'menu_items')
-        return [MenuItem(self.location_id, **mi) for mi in menu_items]
+        return self.get_related('items')
 
     @cached_property
     def modifiers(self):
-        res = client.get(Modifier.list_url(self.location_id))
-        modifiers = get_embedded_object(res, 'modifiers')
-        return [Modifier(self.location_id, **m) for m in modifiers]
+        return self.get_related('modifiers')
+
+    @cached_property
+    def index(self):
+        self.prefetch()
+        return MenuIndex(self.items, self.categories, self.modifiers)
+
+    @bound
+    def load_full(self, workers=None):
+        """
+        Load the whole menu tree on up to `workers` threads (defaulting to
+        `omnivore.max_workers`): categories, items and modifiers, then the
+        modifier groups of every item that has any. Category items and
+        modifier group options are linked to the objects in `index`.
+
+        If `omnivore.menu_snapshots` is set, the menu is read from its
+        snapshot when there is a valid one, and saved to it otherwise.
+
+        Returns a `MenuLoad` with the number of requests made and the time
+        taken.
+        """
+        from omnivore import max_workers, menu_snapshots
+
+        workers = workers or max_workers
+        start = time.time()
+
+        if menu_snapshots is not None and menu_snapshots.load(self):
+            return MenuLoad(self, 0, time.time() - start)
+
+        with RequestCounter() as counter:
+            self.prefetch(workers=workers)
+
+            items = [item for item in self.items if item.modifier_groups_count]
+            map_concurrently(
+                lambda item: item.modifier_groups,
+                items,
+                workers
+            )
+
+            self.link()
+
+        if menu_snapshots is not None:
+            menu_snapshots.save(self)
+
+        return MenuLoad(self, counter.count, time.time() - start)
+
+    def link(self):
+        """
+        Replace the options of loaded modifier groups with the menu's own
+        modifiers.
+        """
+        modifiers = self.index.modifiers
+
+        for item in self.items:
+            if not MenuItem.modifier_groups.is_fresh(item):
+                continue
+
+            for group in item.modifier_groups:
+                if hasattr(group, 'options'):
+                    group.options = [
+                        modifiers.get(option.id, option)
+                        for option
+                        in group.options
+                    ]
+
+    def invalidate(self, *names):
+        from omnivore import menu_snapshots
+
+        # The index is built from the other relations
+        if names and 'index' not in names:
+            names += ('index',)
+
+        super(Menu, self).invalidate(*names)
+
+        if menu_snapshots is not None:
+            menu_snapshots.invalidate(self.location_id)
 
     def __unicode__(self):
         return '<Omnivore::{} {}>'.format(
@@ -75,6 +167,10 @@ class Menu(PrintableResource):
 
 class Category(OmnivoreMenuResource):
 
+    __slots__ = ('name', 'items')
+
+    list_key = 'categories'
+
     @classmethod
     def list_url(cls, location_id):
         return super(Category, cls).list_url(location_id) + 'categories/'
@@ -87,7 +183,21 @@ class Category(OmnivoreMenuResource):
             self.items = [MenuItem(self.location_id, **i) for i in items]
 
 
-class MenuItem(OmnivoreMenuResource):
+class MenuItem(OmnivoreMenuResource, RelatedResource):
+
+    __slots__ = (
+        'name',
+        'price',
+        'price_levels',
+        'in_stock',
+        'modifier_groups_count',
+        'price_level_ids',
+        '_cached'
+    )
+
+    list_key = 'menu_items'
+
+    shared_related = ('modifier_groups',)
 
     @classmethod
     def list_url(cls, location_id):
@@ -97,24 +207,31 @@ class MenuItem(OmnivoreMenuResource):
         self.name = kwargs['name']
         self.price = kwargs['price']
         self.price_levels = kwargs['price_levels']
+        self.price_level_ids = frozenset(pl['id'] for pl in self.price_levels)
         self.in_stock = kwargs['in_stock']
         self.modifier_groups_count = kwargs['modifier_groups_count']
 
+    @property
+    def related_args(self):
+        return (self.location_id, self.id)
+
+    def registry_key(self, name):
+        if name in self.shared_related:
+            return (self.location_id, 'menu.items.{}.{}'.format(self.id, name))
+
     # Retrieving related objects
 
     @cached_property
     def modifier_groups(self):
-        res = client.get(ModifierGroup.list_url(self.location_id, self.id))
-        groups = get_embedded_object(res, 'modifier_groups')
-        return [
-            ModifierGroup(self.location_id, self.id, **mg)
-            for mg
-            in groups
-        ]
+        return self.get_related('modifier_groups')
 
 
 class Modifier(OmnivoreMenuResource):
 
+    __slots__ = ('name', 'price_per_unit', 'price_levels')
+
+    list_key = 'modifiers'
+
     @classmethod
     def list_url(cls, location_id):
         return super(Modifier, cls).list_url(location_id) + 'modifiers/'
@@ -141,6 +258,10 @@ class Modifier(OmnivoreMenuResource):
 
 class ModifierGroup(OmnivoreMenuItemResource):
 
+    __slots__ = ('name', 'minimum', 'maximum', 'required', 'options')
+
+    list_key = 'modifier_groups'
+
     @classmethod
     def list_url(cls, location_id, item_id):
         base_url = super(ModifierGroup, cls).list_url(location_id, item_id)
@@ -155,3 +276,71 @@ class ModifierGroup(OmnivoreMenuItemResource):
         if has_embedded_objects(kwargs):
             options = get_embedded_object(kwargs, 'options')
             self.options = [Modifier(self.location_id, **m) for m in options]
+
+
+class MenuLoad(object):
+
+    def __init__(self, menu, requests, duration):
+        self.menu = menu
+        self.requests = requests
+        self.duration = duration
+
+
+class MenuIndex(object):
+    """
+    Lookup tables over a loaded menu:
+
+    - `items`: menu item by id
+    - `items_by_name`: menu items by normalized name (see `normalize_name`)
+    - `categories`: category by id
+    - `category_items`: menu items by category id
+    - `modifiers`: modifier by id
+
+    Price levels of an item are available as `MenuItem.price_level_ids`.
+    """
+
+    def __init__(self, items, categories, modifiers):
+        self.items = {}
+        self.items_by_name = {}
+
+        for item in items:
+            self.items[item.id] = item
+            key = normalize_name(item.name)
+            self.items_by_name.setdefault(key, []).append(item)
+
+        self.categories = {}
+        self.category_items = {}
+
+        for category in categories:
+            self.categories[category.id] = category
+            self.category_items[category.id] = [
+                self.items.get(item.id, item)
+                for item
+                in getattr(category, 'items', ())
+            ]
+
+        self.modifiers = {modifier.id: modifier for modifier in modifiers}
+
+    def find_items(self, name):
+        return self.items_by_name.get(normalize_name(name), [])
+
+
+def normalize_name(name):
+    """
+    Lowercase `name`, strip accents and collapse punctuation and whitespace,
+    so that e.g. 'Fish & Chips ' and 'fish chips' match.
+    """
+    name = unicodedata.normalize('NFKD', unicode(name or ''))
+    name = ''.join(c for c in name if not unicodedata.combining(c))
+    return re.sub(r'[\W_]+', ' ', name, flags=re.UNICODE).strip().lower()
+
+
+Menu.related = {
+    'categories': Category,
+    'items': MenuItem,
+    'modifiers': Modifier
+}
+
+MenuItem.related = {
+    'modifier_groups': ModifierGroup
+}
@@ -1,6 +1,6 @@
 from __future__ import unicode_literals
 from omnivore import client, error
-from omnivore.resource import OmnivoreLocationResource
+from omnivore.resource import OmnivoreLocationResource, RelatedResource
 from omnivore.resource.base import (
     Employee,
     Discount,
@@ -10,7 +10,9 @@ from omnivore.resource.base import (
 )
 from omnivore.resource.menu import MenuItem, Modifier
 from omnivore.util import (
-    cached_property,
+    bound,
+    classmethod_and_attribute,
+    embedded,
     get_embedded_object,
     has_embedded_objects
 )
@@ -18,6 +20,8 @@ from omnivore.util import (
 
 class OmnivoreTicketResource(OmnivoreLocationResource):
 
+    __slots__ = ('ticket_id',)
+
     @classmethod
     def list_url(cls, location_id, ticket_id):
         base_url = super(OmnivoreTicketResource, cls).list_url(location_id)
@@ -42,6 +46,8 @@ class OmnivoreTicketResource(OmnivoreLocationResource):
 
 class OmnivoreTicketItemResource(OmnivoreTicketResource):
 
+    __slots__ = ('item_id',)
+
     @classmethod
     def list_url(cls, location_id, ticket_id, item_id):
         base_url = super(OmnivoreTicketItemResource, cls).list_url(
@@ -73,15 +79,55 @@ class OmnivoreTicketItemResource(OmnivoreTicketResource):
         )
 
 
-class Ticket(OmnivoreLocationResource):
+class Ticket(OmnivoreLocationResource, RelatedResource):
+
+    __slots__ = (
+        'auto_send',
+        'closed_at',
+        'guest_count',
+        'name',
+        '_open',
+        'opened_at',
+        'ticket_number',
+        'totals',
+        '_employee',
+        '_discounts',
+        '_items',
+        '_order_type',
+        '_payments',
+        '_revenue_center',
+        '_table',
+        '_voided_items',
+        '_embedded'
+    )
+
+    list_key = 'tickets'
 
     @classmethod
     def list_url(cls, location_id):
         return super(Ticket, cls).list_url(location_id) + 'tickets/'
 
-    @classmethod
+    @classmethod_and_attribute('_open')
     def open(cls, location_id, employee_id, order_type_id, revenue_center_id,
              table_id, guest_count=None, name=None, auto_send=None):
+        data = cls.build_open_data(
+            employee_id,
+            order_type_id,
+            revenue_center_id,
+            table_id,
+            guest_count,
+            name,
+            auto_send
+        )
+
+        res = client.post(cls.list_url(location_id), data)
+
+        return cls(location_id, **res)
+
+    @classmethod
+    def build_open_data(cls, employee_id, order_type_id, revenue_center_id,
+                        table_id, guest_count=None, name=None,
+                        auto_send=None):
         data = {
             'employee': employee_id,
             'order_type': order_type_id,
@@ -98,9 +144,7 @@ class Ticket(OmnivoreLocationResource):
         if auto_send is not None:
             data['auto_send'] = auto_send
 
-        res = client.post(cls.list_url(location_id), data)
-
-        return cls(location_id, **res)
+        return data
 
     def refresh_from(self, **kwargs):
         self.auto_send = kwargs['auto_send']
@@ -113,65 +157,103 @@ class Ticket(OmnivoreLocationResource):
         self.totals = kwargs['totals']
 
         if has_embedded_objects(kwargs):
-            employee = get_embedded_object(kwargs, 'employee')
-            self.employee = Employee(self.location_id, **employee)
-
-            discounts = get_embedded_object(kwargs, 'discounts')
-            self.discounts = [
-                TicketDiscount(self.location_id, **discount)
-                for discount
-                in discounts
-            ]
-
-            ticket_items = get_embedded_object(kwargs, 'items')
-            self.items = [
-                TicketItem(self.location_id, self.id, **ti)
-                for ti
-                in ticket_items
-            ]
-
-            order_type = get_embedded_object(kwargs, 'order_type')
-            self.order_type = OrderType(self.location_id, **order_type)
-
-            payments = get_embedded_object(kwargs, 'payments')
-            self.payments = [
-                Payment(self.location_id, self.id, **p)
-                for p
-                in payments
-            ]
-
-            revenue_center = get_embedded_object(kwargs, 'revenue_center')
-            self.revenue_center = RevenueCenter(
-                self.location_id,
-                **revenue_center
-            )
-
-            table = get_embedded_object(kwargs, 'table')
-            if table:
-                self.table = Table(self.location_id, **table)
+            self.set_embedded(kwargs['_embedded'])
+
+    # Embedded objects
+
+    @embedded('employee')
+    def employee(self, employee):
+        return Employee(self.location_id, **employee)
+
+    @embedded('discounts')
+    def discounts(self, discounts):
+        return [
+            TicketDiscount(self.location_id, self.id, **discount)
+            for discount
+            in discounts
+        ]
+
+    @embedded('items')
+    def items(self, ticket_items):
+        return [
+            TicketItem(self.location_id, self.id, **ti)
+            for ti
+            in ticket_items
+        ]
+
+    @embedded('order_type')
+    def order_type(self, order_type):
+        return OrderType(self.location_id, **order_type)
+
+    @embedded('payments', related=True)
+    def payments(self, payments):
+        return [
+            Payment(self.location_id, self.id, **p)
+            for p
+            in payments
+        ]
+
+    @embedded('revenue_center')
+    def revenue_center(self, revenue_center):
+        return RevenueCenter(self.location_id, **revenue_center)
+
+    @embedded('table')
+    def table(self, table):
+        if table:
+            return Table(self.location_id, **table)
+
+    @embedded('voided_items')
+    def voided_items(self, voided_items):
+        return [
+            MenuItem(self.location_id, **item)
+            for item
+            in voided_items
+        ]
 
-            voided_items = get_embedded_object(kwargs, 'voided_items')
-            self.voided_items = [
-                MenuItem(self.location_id, **item)
-                for item
-                in voided_items
-            ]
+    @property
+    def related_args(self):
+        return (self.location_id, self.id)
 
+    @bound
     def void(self):
-        res = client.post(self.instance_url, {'void': True})
+        res = client.post(
+            self.instance_url,
+            {'void': True},
+            idempotent=True
+        )
         self.refresh_from(**res)
 
+    @bound
     def add_item(self, menu_item, quantity,
                  price_level=None, comment=None,
                  modifiers=None, discounts=None):
+        data = self.build_item_data(
+            menu_item,
+            quantity,
+            price_level,
+            comment,
+            modifiers,
+            discounts
+        )
+
+        res = client.post(
+            TicketItem.list_url(self.location_id, self.id),
+            data
+        )
+
+        self.refresh_from(**res)
+
+    @classmethod
+    def build_item_data(cls, menu_item, quantity,
+                        price_level=None, comment=None,
+                        modifiers=None, discounts=None):
         data = {
             'menu_item': menu_item.id,
             'quantity': quantity
         }
 
         if price_level:
-            price_level_ids = [pl.id for pl in menu_item.price_levels]
-            if price_level not in price_level_ids:
+            if price_level not in menu_item.price_level_ids:
                 raise error.APIError(
                     'Unknown price level for item {}'.format(menu_item.id)
                 )
@@ -192,13 +274,9 @@ class Ticket(OmnivoreLocationResource):
         if discounts:
             data['discounts'] = discounts
 
-        res = client.post(
-            TicketItem.list_url(self.location_id, self.id),
-            data
-        )
-
-        self.refresh_from(**res)
+        return data
 
+    @bound
     def add_items(self, items):
         # TODO: all the stuff in add_item
         res = client.post(
@@ -208,11 +286,22 @@ class Ticket(OmnivoreLocationResource):
 
         self.refresh_from(**res)
 
+    @bound
     def void_item(self, ticket_item):
         res = client.delete(ticket_item.retrieve_url)
         self.refresh_from(**res)
 
+    @bound
     def pay(self, type, amount, tip, **kwargs):
+        data = self.build_payment_data(type, amount, tip, **kwargs)
+
+        res = client.post(Payment.list_url(self.location_id, self.id), data)
+
+        self.refresh_from(**res.pop('ticket'))
+        return res
+
+    @classmethod
+    def build_payment_data(cls, type, amount, tip, **kwargs):
         if type not in Payment.types:
             msg = 'Unknown payment type: \'{}\'. Allowed types: {}'.format(
                 type,
@@ -229,24 +318,13 @@ class Ticket(OmnivoreLocationResource):
                 # TODO: verify required card_info fields
                 raise error.APIError('Missing card_info for payment')
 
-        data = dict(type=type, amount=amount, tip=tip, **kwargs)
-
-        res = client.post(Payment.list_url(self.location_id, self.id), data)
-
-        self.refresh_from(**res.pop('ticket'))
-        return res
-
-    # Retrieving related objects
-
-    @cached_property
-    def payments(self):
-        res = client.get(Payment.list_url(self.location_id, self.id))
-        payments = get_embedded_object(res, 'payments')
-        return [Payment(self.location_id, **p) for p in payments]
+        return dict(type=type, amount=amount, tip=tip, **kwargs)
 
 
 class TicketDiscount(OmnivoreTicketResource):
 
+    __slots__ = ('comment', 'name', 'value', 'discount')
+
     # TODO: apply
 
     @classmethod
@@ -266,6 +344,17 @@ class TicketDiscount(OmnivoreTicketResource):
 
 class TicketItem(OmnivoreTicketResource):
 
+    __slots__ = (
+        'comment',
+        'name',
+        'price_per_unit',
+        'quantity',
+        'sent',
+        '_menu_item',
+        '_modifiers',
+        '_embedded'
+    )
+
     @classmethod
     def list_url(cls, location_id, ticket_id):
         base_url = super(TicketItem, cls).list_url(location_id, ticket_id)
@@ -279,24 +368,32 @@ class TicketItem(OmnivoreTicketResource):
         self.sent = kwargs['sent']
 
         if has_embedded_objects(kwargs):
-            menu_item = get_embedded_object(kwargs, 'menu_item')
-            self.menu_item = MenuItem(self.location_id, **menu_item)
-
-            modifiers = get_embedded_object(kwargs, 'modifiers')
-            self.modifiers = [
-                TicketItemModifier(
-                    self.location_id,
-                    self.ticket_id,
-                    self.id,
-                    **modifier
-                )
-                for modifier
-                in modifiers
-            ]
+            self.set_embedded(kwargs['_embedded'])
+
+    # Embedded objects
+
+    @embedded('menu_item')
+    def menu_item(self, menu_item):
+        return MenuItem(self.location_id, **menu_item)
+
+    @embedded('modifiers')
+    def modifiers(self, modifiers):
+        return [
+            TicketItemModifier(
+                self.location_id,
+                self.ticket_id,
+                self.id,
+                **modifier
+            )
+            for modifier
+            in modifiers
+        ]
 
 
 class TicketItemModifier(OmnivoreTicketItemResource):
 
+    __slots__ = ('comment', 'name', 'price_per_unit', 'quantity', 'modifier')
+
     @classmethod
     def list_url(cls, location_id, ticket_id, item_id):
         base_url = super(TicketItemModifier, cls).list_url(
@@ -319,6 +416,8 @@ class TicketItemModifier(OmnivoreTicketItemResource):
 
 class TicketItemDiscount(OmnivoreTicketItemResource):
 
+    __slots__ = ('comment', 'name', 'value', 'discount')
+
     @classmethod
     def list_url(cls, location_id, ticket_id, item_id):
         base_url = super(TicketItemDiscount, cls).list_url(
@@ -340,6 +439,10 @@ class TicketItemDiscount(OmnivoreTicketItemResource):
 
 class Payment(OmnivoreTicketResource):
 
+    __slots__ = ('type', 'amount', 'tip')
+
+    list_key = 'payments'
+
     types = ['card_not_present', 'card_present', '3rd_party', 'gift_card']
 
     @classmethod
@@ -351,3 +454,8 @@ class Payment(OmnivoreTicketResource):
         self.type = kwargs['type']
         self.amount = kwargs['amount']
         self.tip = kwargs['tip']
+
+
+Ticket.related = {
+    'payments': Payment
+}
@@ -0,0 +1,144 @@
+from __future__ import unicode_literals
+
+import errno
+import random
+import socket
+import time
+
+from email.utils import mktime_tz, parsedate_tz
+
+import requests
+
+from requests.packages.urllib3 import exceptions as urllib3_exceptions
+
+from omnivore.transport import split_timeout
+
+
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+
+
+class RetryPolicy(object):
+    """
+    Decides whether, and after how long, a failed request is retried.
+
+    Delays grow exponentially from `backoff` up to `max_backoff` seconds
+    with full jitter, unless the server sends a `Retry-After` header. No
+    more than `max_attempts` attempts are made, and no retry is scheduled
+    that would end more than `budget` seconds after the first attempt.
+
+    Requests that are not idempotent (e.g. opening a ticket or paying) are
+    only retried when the server cannot have acted on them: the connection
+    was never established, or the server rejected the request outright
+    with one of `rejected_statuses`.
+    """
+
+    retry_statuses = frozenset([429, 500, 502, 503, 504])
+    rejected_statuses = frozenset([429, 503])
+
+    def __init__(self, max_attempts=3, backoff=0.5, max_backoff=10.0,
+                 budget=30.0):
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.budget = budget
+
+    def retry_delay(self, attempt, elapsed, idempotent, status_code=None,
+                    headers=None, exception=None):
+        """
+        Return the number of seconds to wait before the next attempt, or
+        None if the request should not be retried.
+        """
+        if attempt >= self.max_attempts:
+            return None
+
+        retry_after = None
+
+        if exception is not None:
+            if not is_transient_error(exception):
+                return None
+            if not idempotent and not is_connect_error(exception):
+                return None
+        else:
+            if status_code not in self.retry_statuses:
+                return None
+            if not idempotent and status_code not in self.rejected_statuses:
+                return None
+            if status_code in self.rejected_statuses:
+                retry_after = parse_retry_after(headers)
+
+        if retry_after is None:
+            delay = self.backoff_delay(attempt)
+        else:
+            delay = retry_after
+
+        if self.budget is not None and elapsed + delay > self.budget:
+            return None
+
+        return delay
+
+    def cap_timeout(self, timeout, elapsed):
+        """
+        Cut the `(connect, read)` timeout of a retry (see
+        `omnivore.request_timeout`) down to what is left of the budget
+        `elapsed` seconds after the first attempt.
+        """
+        connect, read = split_timeout(timeout)
+
+        if self.budget is None:
+            return connect, read
+
+        remaining = max(self.budget - elapsed, 0.01)
+
+        return (
+            remaining if connect is None else min(connect, remaining),
+            remaining if read is None else min(read, remaining)
+        )
+
+    def backoff_delay(self, attempt):
+        delay = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        return random.uniform(0, delay)
+
+
+def is_transient_error(e):
+    # Tornado reports timeouts and connection failures with code 599
+    return isinstance(e, IOError) or getattr(e, 'code', None) == 599
+
+
+def is_connect_error(e):
+    """
+    Whether the request failed before it could have reached the server.
+    """
+    if isinstance(e, requests.exceptions.ConnectTimeout):
+        return True
+
+    if isinstance(e, requests.exceptions.ConnectionError) and e.args:
+        reason = getattr(e.args[0], 'reason', None)
+        new_connection_error = getattr(
+            urllib3_exceptions,
+            'NewConnectionError',
+            ()
+        )
+        return isinstance(reason, new_connection_error)
+
+    if isinstance(e, socket.error):
+        return e.errno in (errno.ECONNREFUSED, errno.EHOSTUNREACH)
+
+    return False
+
+
+def parse_retry_after(headers):
+    value = (headers or {}).get('Retry-After')
+
+    if not value:
+        return None
+
+    try:
+        return max(0, float(value))
+    except ValueError:
+        pass
+
+    date = parsedate_tz(value)
+    if date is None:
+        return None
+
+    return max(0, mktime_tz(date) - time.time())
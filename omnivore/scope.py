@@ -0,0 +1,30 @@
+from __future__ import unicode_literals
+
+
+class ThreadScope(object):
+    """
+    Object entered with `with`, whose scopes are kept on a stack per thread.
+    Each subclass sets its own `local = threading.local()`. See
+    `omnivore.identity.bind` for how scopes are carried over to other
+    threads.
+    """
+
+    def __enter__(self):
+        self.get_stack().append(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.get_stack().pop()
+
+    @classmethod
+    def get_stack(cls):
+        try:
+            return cls.local.stack
+        except AttributeError:
+            stack = cls.local.stack = []
+            return stack
+
+    @classmethod
+    def current(cls):
+        stack = getattr(cls.local, 'stack', None)
+        return stack[-1] if stack else None
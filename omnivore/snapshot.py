@@ -0,0 +1,186 @@
+from __future__ import unicode_literals
+
+import errno
+import marshal
+import mmap
+import os
+import struct
+import tempfile
+import time
+
+from omnivore.resource import PrintableResource
+from omnivore.resource.menu import Category, MenuItem, Modifier, ModifierGroup
+from omnivore.util import get_attribute_names
+
+
+MAGIC = b'OMNIMENU'
+FORMAT_VERSION = 1
+
+HEADER = struct.Struct(b'<8sHHI')
+
+CLASSES = {
+    cls.__name__: cls
+    for cls
+    in (Category, MenuItem, Modifier, ModifierGroup)
+}
+
+
+class MenuSnapshotStore(object):
+    """
+    Directory of menu snapshots, one file per location, used by
+    `Menu.load_full` to start from disk instead of the network.
+
+    A snapshot is dropped once it is older than `max_age` seconds, when any
+    of the location's menu relations is invalidated, or when it was written
+    by another format or marshal version. The directory is created when the
+    first snapshot is saved.
+    """
+
+    def __init__(self, directory, max_age=None):
+        self.directory = directory
+        self.max_age = max_age
+
+    def get_path(self, location_id):
+        return os.path.join(self.directory, location_id + '.menu')
+
+    def save(self, menu):
+        """
+        Write a loaded menu (see `Menu.load_full`) to disk, replacing any
+        previous snapshot of the location atomically.
+        """
+        groups = {}
+        for item in menu.items:
+            if MenuItem.modifier_groups.is_fresh(item):
+                groups[item.id] = dump_value(item.modifier_groups)
+
+        meta = marshal.dumps({
+            'location_id': menu.location_id,
+            'saved_at': time.time()
+        })
+        body = marshal.dumps({
+            'categories': dump_value(menu.categories),
+            'items': dump_value(menu.items),
+            'modifiers': dump_value(menu.modifiers),
+            'modifier_groups': groups
+        })
+        header = HEADER.pack(MAGIC, FORMAT_VERSION, marshal.version, len(meta))
+
+        try:
+            os.makedirs(self.directory)
+        except OSError, e:
+            if e.errno != errno.EEXIST:
+                raise
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory)
+
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(header)
+                f.write(meta)
+                f.write(body)
+
+            os.rename(tmp_path, self.get_path(menu.location_id))
+        except Exception:
+            os.remove(tmp_path)
+            raise
+
+    def load(self, menu):
+        """
+        Fill `menu` from its snapshot, if there is a valid one. Returns
+        whether it was loaded.
+        """
+        path = self.get_path(menu.location_id)
+
+        try:
+            with open(path, 'rb') as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (IOError, OSError, ValueError):
+            return False
+
+        try:
+            body = self.read(data, menu.location_id)
+        except (EOFError, ValueError, TypeError, KeyError, struct.error):
+            body = None
+        finally:
+            data.close()
+
+        if body is None:
+            self.invalidate(menu.location_id)
+            return False
+
+        menu.categories = load_value(body['categories'])
+        menu.items = load_value(body['items'])
+        menu.modifiers = load_value(body['modifiers'])
+
+        for item in menu.items:
+            groups = body['modifier_groups'].get(item.id)
+            if groups is not None:
+                item.modifier_groups = load_value(groups)
+
+        menu.link()
+        return True
+
+    def read(self, data, location_id):
+        magic, version, marshal_version, meta_size = HEADER.unpack_from(data)
+
+        if (magic, version, marshal_version) != (
+            MAGIC,
+            FORMAT_VERSION,
+            marshal.version
+        ):
+            return None
+
+        meta = marshal.loads(buffer(data, HEADER.size, meta_size))
+
+        if meta['location_id'] != location_id:
+            return None
+
+        age = time.time() - meta['saved_at']
+        if self.max_age is not None and age > self.max_age:
+            return None
+
+        return marshal.loads(buffer(data, HEADER.size + meta_size))
+
+    def invalidate(self, location_id):
+        try:
+            os.remove(self.get_path(location_id))
+        except OSError:
+            pass
+
+
+def dump_value(value):
+    """
+    Convert resources, and lists of them, to `(class name, attributes)`
+    tuples that `marshal` can store.
+    """
+    if isinstance(value, PrintableResource):
+        return (
+            value.__class__.__name__,
+            {
+                name: dump_value(getattr(value, name))
+                for name
+                in get_attribute_names(value.__class__)
+                if hasattr(value, name)
+            }
+        )
+
+    if isinstance(value, list):
+        return [dump_value(v) for v in value]
+
+    return value
+
+
+def load_value(value):
+    if isinstance(value, tuple):
+        cls = CLASSES[value[0]]
+        obj = cls.__new__(cls)
+
+        for name, attr in value[1].items():
+            setattr(obj, name, load_value(attr))
+
+        return obj
+
+    if isinstance(value, list):
+        return [load_value(v) for v in value]
+
+    return value
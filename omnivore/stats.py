@@ -0,0 +1,159 @@
+from __future__ import unicode_literals
+
+import bisect
+import logging
+import threading
+
+from omnivore.scope import ThreadScope
+
+
+logger = logging.getLogger('omnivore')
+
+
+class RequestCounter(ThreadScope):
+    """
+    Counts the HTTP requests, retries included, made inside
+    `with RequestCounter() as counter:`. Counters can be nested.
+    """
+
+    local = threading.local()
+
+    def __init__(self):
+        self.count = 0
+        self.lock = threading.Lock()
+
+    @classmethod
+    def record(cls):
+        for counter in getattr(cls.local, 'stack', ()):
+            with counter.lock:
+                counter.count += 1
+
+
+class RequestEvent(object):
+    """
+    What is known about a request, passed to the `omnivore.request_hooks`.
+    `status_code`, `latency` (in seconds, retries included) and
+    `response_bytes` are only set once the request has completed.
+    """
+
+    def __init__(self, method, url, endpoint, location_id, request_bytes):
+        self.method = method
+        self.url = url
+        self.endpoint = endpoint
+        self.location_id = location_id
+        self.request_bytes = request_bytes
+        self.response_bytes = None
+        self.status_code = None
+        self.latency = None
+        self.retries = 0
+
+
+def run_hooks(name, *args):
+    """
+    Call method `name` of every hook in `omnivore.request_hooks` that has
+    one. Hooks may implement any of `before_request(event)`,
+    `after_response(event)` and `on_error(event, exception)`.
+
+    A hook that raises is logged and does not affect the request.
+    """
+    from omnivore import request_hooks
+
+    for hook in request_hooks:
+        callback = getattr(hook, name, None)
+        if callback is None:
+            continue
+
+        try:
+            callback(*args)
+        except Exception:
+            logger.exception('Request hook %r failed in %s', hook, name)
+
+
+class LatencyHistogram(object):
+    """
+    Request hook collecting latencies per endpoint template, or per endpoint
+    and location with `per_location` set, in logarithmic buckets growing by
+    `growth` from `min_latency` to `max_latency` seconds. Memory use does
+    not depend on the number of requests, and percentiles are accurate to
+    within one bucket.
+    """
+
+    def __init__(self, per_location=False, min_latency=0.001,
+                 max_latency=60.0, growth=1.1):
+        self.per_location = per_location
+        self.bounds = []
+
+        bound = min_latency
+        while bound < max_latency:
+            self.bounds.append(bound)
+            bound *= growth
+        self.bounds.append(max_latency)
+
+        self.counts = {}
+        self.lock = threading.Lock()
+
+    def get_key(self, event):
+        if self.per_location:
+            return (event.endpoint, event.location_id)
+
+        return event.endpoint
+
+    def after_response(self, event):
+        self.add(self.get_key(event), event.latency)
+
+    def on_error(self, event, e):
+        self.add(self.get_key(event), event.latency)
+
+    def add(self, key, latency):
+        bucket = bisect.bisect_left(self.bounds, latency)
+
+        with self.lock:
+            counts = self.counts.get(key)
+            if counts is None:
+                counts = self.counts[key] = [0] * (len(self.bounds) + 1)
+
+            counts[bucket] += 1
+
+    def percentile(self, key, percent):
+        """
+        Upper bound of the bucket holding the `percent`th percentile of
+        the latencies recorded under `key`, or None if there are none.
+        """
+        with self.lock:
+            counts = list(self.counts.get(key, ()))
+
+        total = sum(counts)
+        if not total:
+            return None
+
+        rank = total * percent / 100.0
+        seen = 0
+
+        for bucket, count in enumerate(counts):
+            seen += count
+            if seen >= rank:
+                break
+
+        return self.bounds[min(bucket, len(self.bounds) - 1)]
+
+    def summary(self):
+        """
+        Request count, p50, p95 and p99 latencies of every key.
+        """
+        with self.lock:
+            keys = list(self.counts)
+
+        return {
+            key: {
+                'count': sum(self.counts[key]),
+                'p50': self.percentile(key, 50),
+                'p95': self.percentile(key, 95),
+                'p99': self.percentile(key, 99)
+            }
+            for key
+            in keys
+        }
+
+    def reset(self):
+        with self.lock:
+            self.counts.clear()
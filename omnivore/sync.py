@@ -0,0 +1,174 @@
+from __future__ import unicode_literals
+
+from omnivore import client, error
+from omnivore.resource.ticket import Ticket
+from omnivore.util import map_concurrently
+
+
+CREATED = 'created'
+UPDATED = 'updated'
+CLOSED = 'closed'
+
+
+class TicketEvent(object):
+
+    def __init__(self, type, location_id, ticket_id, ticket):
+        self.type = type
+        self.location_id = location_id
+        self.ticket_id = ticket_id
+        self.ticket = ticket
+
+    def __repr__(self):
+        return '<TicketEvent {} {} at Location {}>'.format(
+            self.type,
+            self.ticket_id,
+            self.location_id
+        )
+
+
+class SyncResult(object):
+
+    def __init__(self):
+        self.events = []
+        self.errors = {}
+
+    @property
+    def failed(self):
+        return sorted(self.errors)
+
+
+class TicketSync(object):
+    """
+    Polls the tickets of locations and reports what changed since the
+    previous poll as `TicketEvent`s: `created` for tickets seen for the
+    first time (including every ticket on the first poll), `updated` when
+    a ticket's version (see `get_version`) changes and `closed` when it
+    closes.
+
+    With `open_only` set (the default), only open tickets are listed, and a
+    ticket that drops out of the list is fetched once to report it closed.
+    Only tickets that are new or changed are built into `Ticket` objects.
+
+    Only the version of each ticket is kept between polls. A location must
+    not be polled from two threads at once.
+    """
+
+    def __init__(self, open_only=True):
+        self.open_only = open_only
+        self.versions = {}
+
+    def get_url(self, location_id):
+        url = Ticket.list_url(location_id)
+
+        if self.open_only:
+            url += '?where=eq(open,true)'
+
+        return url
+
+    def poll(self, location_id):
+        """
+        List the tickets of a location and return the events since the
+        previous poll.
+        """
+        known = self.versions.get(location_id, {})
+        versions = {}
+        events = []
+
+        for data in client.iter_list(self.get_url(location_id), 'tickets'):
+            ticket_id = data['id']
+            version = get_version(data)
+            previous = known.get(ticket_id)
+
+            if not data['open']:
+                if previous is not None:
+                    ticket = Ticket(location_id, **data)
+                    events.append(
+                        TicketEvent(CLOSED, location_id, ticket_id, ticket)
+                    )
+                continue
+
+            versions[ticket_id] = version
+
+            if previous == version:
+                continue
+
+            ticket = Ticket(location_id, **data)
+            event_type = CREATED if previous is None else UPDATED
+            events.append(
+                TicketEvent(event_type, location_id, ticket_id, ticket)
+            )
+
+        if self.open_only:
+            for ticket_id in set(known) - set(versions):
+                events.append(self.closed(location_id, ticket_id))
+
+        self.versions[location_id] = versions
+        return events
+
+    def poll_all(self, location_ids, workers=None):
+        """
+        Poll many locations concurrently on up to `workers` threads
+        (defaulting to `omnivore.max_workers`) and return a `SyncResult`
+        with the events of every location, and the error of each location
+        that could not be polled. Those are polled again from where they
+        were on the next call.
+        """
+        from omnivore import max_workers
+
+        def poll(location_id):
+            try:
+                return self.poll(location_id), None
+            except Exception, e:
+                return [], e
+
+        location_ids = list(location_ids)
+        results = map_concurrently(poll, location_ids, workers or max_workers)
+        result = SyncResult()
+
+        for location_id, (events, e) in zip(location_ids, results):
+            result.events.extend(events)
+
+            if e is not None:
+                result.errors[location_id] = e
+
+        return result
+
+    def closed(self, location_id, ticket_id):
+        """
+        Fetch a ticket that is no longer listed as open.
+        """
+        try:
+            data = client.get(Ticket.retrieve_url(location_id, ticket_id))
+            ticket = Ticket(location_id, **data)
+        except error.InvalidRequestError, e:
+            if e.status_code != 404:
+                raise
+            ticket = None
+
+        return TicketEvent(CLOSED, location_id, ticket_id, ticket)
+
+    def forget(self, location_id=None):
+        """
+        Drop what is known about a location, or about all of them, so that
+        its tickets are reported as created on the next poll.
+        """
+        if location_id is None:
+            self.versions.clear()
+        else:
+            self.versions.pop(location_id, None)
+
+
+def get_version(data):
+    """
+    What identifies a state of a ticket: whether it is open, when it was
+    closed, its totals and the number of items and payments on it.
+    """
+    embedded = data.get('_embedded') or {}
+
+    return (
+        data['open'],
+        data['closed_at'],
+        tuple(sorted((data['totals'] or {}).items())),
+        len(embedded.get('items') or ()),
+        len(embedded.get('payments') or ())
+    )
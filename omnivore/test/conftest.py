@@ -0,0 +1,173 @@
+from __future__ import unicode_literals
+
+import json
+import os
+
+import pytest
+
+import omnivore
+
+from omnivore.transport import MemoryTransport
+
+
+PAYLOADS = os.path.join(os.path.dirname(__file__), 'payloads')
+
+SETTINGS = (
+    'api_base',
+    'api_key',
+    'http_transport',
+    'retry_policy',
+    'request_timeout',
+    'lazy_embedded',
+    'stream_lists',
+    'rate_limiter',
+    'response_cache',
+    'request_coalescer',
+    'menu_snapshots',
+    'resource_registry',
+    'request_hooks'
+)
+
+
+def load_payload(name):
+    with open(os.path.join(PAYLOADS, name + '.json')) as f:
+        return json.load(f)
+
+
+def location(location_id='loc1', **kwargs):
+    data = {
+        'id': location_id,
+        'address': {'city': 'San Francisco'},
+        'name': 'Burger Place',
+        'phone': '4155550100',
+        'website': 'https://example.com'
+    }
+    data.update(kwargs)
+    return data
+
+
+def employee(employee_id='emp1'):
+    return {
+        'id': employee_id,
+        'check_name': 'Sam',
+        'first_name': 'Sam',
+        'last_name': 'Smith',
+        'login': 'sam'
+    }
+
+
+def menu_item(item_id='item1', **kwargs):
+    data = {
+        'id': item_id,
+        'name': 'Burger',
+        'price': 850,
+        'price_levels': [{'id': 'pl1', 'price': 850}],
+        'in_stock': True,
+        'modifier_groups_count': 0
+    }
+    data.update(kwargs)
+    return data
+
+
+def category(category_id='cat1', items=()):
+    return {
+        'id': category_id,
+        'name': 'Burgers',
+        '_embedded': {'items': list(items)}
+    }
+
+
+def modifier(modifier_id='mod1', **kwargs):
+    data = {
+        'id': modifier_id,
+        'name': 'Cheese',
+        'price_per_unit': 100,
+        'price_levels': [{'id': 'pl1', 'price': 100}]
+    }
+    data.update(kwargs)
+    return data
+
+
+def modifier_group(group_id='grp1', options=()):
+    return {
+        'id': group_id,
+        'name': 'Toppings',
+        'minimum': 0,
+        'maximum': 2,
+        'required': False,
+        '_embedded': {'options': list(options)}
+    }
+
+
+def ticket_item(item_id='ti1', **kwargs):
+    data = {
+        'id': item_id,
+        'comment': None,
+        'name': 'Burger',
+        'price_per_unit': 850,
+        'quantity': 1,
+        'sent': True,
+        '_embedded': {'menu_item': menu_item(), 'modifiers': []}
+    }
+    data.update(kwargs)
+    return data
+
+
+def payment(payment_id='pay1', amount=850, tip=0):
+    return {
+        'id': payment_id,
+        'type': '3rd_party',
+        'amount': amount,
+        'tip': tip
+    }
+
+
+def ticket(ticket_id='tkt1', items=(), payments=(), **kwargs):
+    data = {
+        'id': ticket_id,
+        'auto_send': True,
+        'closed_at': None,
+        'guest_count': 1,
+        'name': 'Table 4',
+        'open': True,
+        'opened_at': 1444000000,
+        'ticket_number': 12,
+        'totals': {'total': 850, 'due': 850},
+        '_embedded': {
+            'employee': employee(),
+            'discounts': [],
+            'items': list(items),
+            'order_type': {'id': 'ot1', 'available': True, 'name': 'Dine In'},
+            'payments': list(payments),
+            'revenue_center': {'id': 'rc1', 'default': True, 'name': 'Bar'},
+            'table': None,
+            'voided_items': []
+        }
+    }
+    data.update(kwargs)
+    return data
+
+
+def listing(key, objs):
+    return {'count': len(objs), '_embedded': {key: list(objs)}}
+
+
+@pytest.fixture(autouse=True)
+def settings():
+    """
+    Restore the module settings changed by a test.
+    """
+    saved = dict((name, getattr(omnivore, name)) for name in SETTINGS)
+    omnivore.api_key = 'test-key'
+    omnivore.retry_policy = None
+
+    yield
+
+    for name, value in saved.items():
+        setattr(omnivore, name, value)
+
+
+@pytest.fixture
+def transport():
+    transport = omnivore.http_transport = MemoryTransport()
+    return transport
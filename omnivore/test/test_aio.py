@@ -0,0 +1,235 @@
+from __future__ import unicode_literals
+
+import json
+
+import pytest
+
+import omnivore
+
+from omnivore import error
+from omnivore.coalesce import RequestCoalescer
+from omnivore.retry import RetryPolicy
+from omnivore.test.conftest import (
+    employee,
+    listing,
+    location,
+    menu_item,
+    payment,
+    ticket,
+    ticket_item
+)
+
+pytest.importorskip('tornado')
+
+from tornado import gen, httpserver, testing, web  # noqa: E402
+from tornado.ioloop import IOLoop  # noqa: E402
+
+from omnivore import aio  # noqa: E402
+
+
+class FakeAPI(object):
+    """
+    API served on the test's IOLoop. Responses are added like those of a
+    `MemoryTransport`, and several can be given for a URL to answer its
+    successive requests with; the last one is then kept. Every response is
+    delayed by `delay` seconds.
+    """
+
+    def __init__(self):
+        self.responses = {}
+        self.requests = []
+        self.delay = 0
+
+    def add(self, method, path, *responses):
+        self.responses[(method, path)] = list(responses)
+
+    def respond(self, method, path, body):
+        self.requests.append((method, path, body))
+        responses = self.responses.get((method, path))
+
+        if not responses:
+            return 404, {'error': 'Not found'}
+
+        if len(responses) > 1:
+            return responses.pop(0)
+
+        return responses[0]
+
+
+class FakeAPIHandler(web.RequestHandler):
+
+    SUPPORTED_METHODS = ('GET', 'POST', 'DELETE')
+
+    def initialize(self, api):
+        self.api = api
+
+    @gen.coroutine
+    def handle(self):
+        path = self.request.uri.split('/0.1/', 1)[1]
+        body = json.loads(self.request.body) if self.request.body else None
+        status, data = self.api.respond(self.request.method, path, body)
+
+        if self.api.delay:
+            yield gen.sleep(self.api.delay)
+
+        self.set_status(status)
+        self.set_header('Content-Type', 'application/json')
+        self.finish(json.dumps(data))
+
+    get = post = delete = handle
+
+
+@pytest.fixture
+def io_loop():
+    io_loop = IOLoop()
+    io_loop.make_current()
+
+    yield io_loop
+
+    io_loop.clear_current()
+    io_loop.close(all_fds=True)
+
+
+@pytest.fixture
+def api(io_loop):
+    api = FakeAPI()
+    sock, port = testing.bind_unused_port()
+    server = httpserver.HTTPServer(web.Application([
+        (r'.*', FakeAPIHandler, {'api': api})
+    ]))
+    server.add_sockets([sock])
+
+    omnivore.api_base = 'http://127.0.0.1:{}/'.format(port)
+
+    yield api
+
+    server.stop()
+
+
+def run(io_loop, func, *args, **kwargs):
+    return io_loop.run_sync(lambda: func(*args, **kwargs), timeout=5)
+
+
+def test_get_locations_follows_pages(io_loop, api):
+    api.add('GET', 'locations/', (200, dict(
+        listing('locations', [location('loc1')]),
+        _links={'next': {
+            'href': omnivore.api_base + '0.1/locations/?start=1'
+        }}
+    )))
+    api.add('GET', 'locations/?start=1', (200, listing('locations', [
+        location('loc2')
+    ])))
+
+    locations = run(io_loop, aio.get_locations)
+
+    assert [loc.id for loc in locations] == ['loc1', 'loc2']
+    assert isinstance(locations[0], omnivore.Location)
+
+
+def test_get_related_is_cached(io_loop, api):
+    api.add('GET', 'locations/loc1/', (200, location()))
+    api.add('GET', 'locations/loc1/employees/', (200, listing('employees', [
+        employee()
+    ])))
+
+    loc = run(io_loop, aio.get_location, 'loc1')
+    employees = run(io_loop, aio.get_related, loc, 'employees')
+
+    assert [emp.id for emp in employees] == ['emp1']
+    assert loc.employees is employees
+    assert run(io_loop, aio.get_related, loc, 'employees') is employees
+    assert len(api.requests) == 2
+
+
+def test_open_add_item_and_pay(io_loop, api):
+    item = omnivore.MenuItem('loc1', **menu_item())
+    closed = ticket(items=[ticket_item()], payments=[payment()], open=False)
+
+    api.add('POST', 'locations/loc1/tickets/', (201, ticket()))
+    api.add('POST', 'locations/loc1/tickets/tkt1/items/', (201, ticket(
+        items=[ticket_item()]
+    )))
+    api.add('POST', 'locations/loc1/tickets/tkt1/payments/', (201, dict(
+        payment(),
+        accepted=True,
+        ticket=closed
+    )))
+
+    tkt = run(io_loop, aio.open_ticket, 'loc1', 'emp1', 'ot1', 'rc1', None)
+    run(io_loop, aio.add_item, tkt, item, 1)
+    assert [i.id for i in tkt.items] == ['ti1']
+
+    result = run(io_loop, aio.pay, tkt, '3rd_party', 850, 0,
+                 tender_type='tt1', payment_source='doordash')
+
+    assert result['accepted']
+    assert not tkt.open
+    assert [body for _, _, body in api.requests][1:] == [
+        {'menu_item': 'item1', 'quantity': 1},
+        {
+            'type': '3rd_party',
+            'amount': 850,
+            'tip': 0,
+            'tender_type': 'tt1',
+            'payment_source': 'doordash'
+        }
+    ]
+
+
+def test_retries(io_loop, api):
+    omnivore.retry_policy = RetryPolicy(backoff=0.01)
+    api.add(
+        'GET',
+        'locations/loc1/',
+        (503, {'error': 'Unavailable'}),
+        (200, location())
+    )
+    api.add('POST', 'locations/loc1/tickets/', (500, {'error': 'Boom'}))
+
+    assert run(io_loop, aio.get_location, 'loc1').id == 'loc1'
+    assert len(api.requests) == 2
+
+    # Opening a ticket is not idempotent, so a 500 is not retried
+    with pytest.raises(error.APIError):
+        run(io_loop, aio.open_ticket, 'loc1', 'emp1', 'ot1', 'rc1', None)
+    assert len(api.requests) == 3
+
+
+def test_coalescing(io_loop, api):
+    omnivore.request_coalescer = RequestCoalescer()
+    api.delay = 0.05
+    api.add('GET', 'locations/loc1/', (200, location()))
+    url = omnivore.api_base + '0.1/locations/loc1/'
+
+    @gen.coroutine
+    def get_twice():
+        results = yield [aio.get(url), aio.get(url)]
+        raise gen.Return(results)
+
+    first, second = run(io_loop, get_twice)
+
+    assert first is second
+    assert len(api.requests) == 1
+    assert omnivore.request_coalescer.coalesced == 1
+    assert omnivore.request_coalescer.futures == {}
+
+
+def test_coalesced_requests_time_out(io_loop, api):
+    omnivore.request_coalescer = RequestCoalescer(timeout=0.01)
+    api.delay = 0.2
+    api.add('GET', 'locations/loc1/', (200, location()))
+    url = omnivore.api_base + '0.1/locations/loc1/'
+
+    @gen.coroutine
+    def get_twice():
+        leader = aio.get(url)
+
+        with pytest.raises(error.APIConnectionError):
+            yield aio.get(url)
+
+        result = yield leader
+        raise gen.Return(result)
+
+    assert run(io_loop, get_twice)['id'] == 'loc1'
+    assert len(api.requests) == 1
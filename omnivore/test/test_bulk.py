@@ -0,0 +1,155 @@
+from __future__ import unicode_literals
+
+import threading
+import time
+
+import omnivore
+
+from omnivore.bulk import FairQueue, load_locations
+from omnivore.test.conftest import employee, listing, location
+
+
+def test_keys_take_turns():
+    queue = FairQueue(per_key=2)
+
+    for task in ['a1', 'a2', 'a3']:
+        queue.put('a', task)
+    for task in ['b1', 'b2']:
+        queue.put('b', task)
+
+    assert [queue.get() for _ in range(4)] == [
+        ('a', 'a1'),
+        ('b', 'b1'),
+        ('a', 'a2'),
+        ('b', 'b2')
+    ]
+
+    # 'a' has two tasks running, its third waits for one to be done
+    assert not queue.ready
+
+    queue.task_done('a')
+    assert queue.get() == ('a', 'a3')
+
+    for key in ['a', 'a', 'b', 'b']:
+        queue.task_done(key)
+    assert queue.get() is None
+
+
+def test_tasks_put_by_workers_wake_waiting_workers():
+    queue = FairQueue(per_key=1)
+    queue.put('root', 'root')
+    done = []
+
+    def work():
+        while True:
+            item = queue.get()
+            if item is None:
+                return
+
+            key, task = item
+
+            if task == 'root':
+                # Give the other workers time to wait for a task
+                time.sleep(0.05)
+                queue.put('a', 'a1')
+                queue.put('b', 'b1')
+                queue.put('a', 'a2')
+
+            done.append(task)
+            queue.task_done(key)
+
+    threads = [threading.Thread(target=work) for _ in range(3)]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert not any(thread.is_alive() for thread in threads)
+    assert sorted(done) == ['a1', 'a2', 'b1', 'root']
+
+
+def test_load_locations_by_id(transport):
+    transport.add('GET', 'locations/loc1/', location('loc1'))
+    transport.add('GET', 'locations/loc3/', location('loc3'))
+
+    for location_id in ['loc1', 'loc3']:
+        url = 'locations/{}/'.format(location_id)
+        transport.add('GET', url + 'employees/', listing('employees', [
+            employee()
+        ]))
+        transport.add('GET', url + 'tables/', listing('tables', []))
+
+    transport.add('GET', 'locations/loc3/tables/', {'error': 'Boom'}, 500)
+
+    result = load_locations(
+        ['loc1', 'loc2', 'loc3'],
+        relations=['employees', 'tables'],
+        workers=3
+    )
+
+    assert [loc.id for loc in result.locations] == ['loc1', 'loc3']
+    assert result.failed == ['loc2', 'loc3']
+    assert list(result.errors['loc2']) == ['location']
+    assert list(result.errors['loc3']) == ['tables']
+
+    count = len(transport.requests)
+    loc1 = result.locations[0]
+    assert loc1.employees[0].id == 'emp1'
+    assert loc1.tables == []
+    assert len(transport.requests) == count
+
+
+def test_menu_errors_are_reported_per_relation(transport):
+    transport.add('GET', 'locations/loc1/menu/categories/', listing(
+        'categories',
+        []
+    ))
+    transport.add('GET', 'locations/loc1/menu/modifiers/', listing(
+        'modifiers',
+        []
+    ))
+    transport.add('GET', 'locations/loc1/menu/items/', {'error': 'Boom'}, 500)
+    loc = omnivore.Location(**location('loc1'))
+
+    result = load_locations([loc], relations=['menu'], workers=2)
+
+    assert result.locations == [loc]
+    assert list(result.errors['loc1']) == ['menu.items']
+    assert loc.menu.categories == []
+
+
+def test_requests_per_location_are_capped(transport):
+    lock = threading.Lock()
+    in_flight = {}
+    max_in_flight = {}
+
+    def handler(request):
+        location_id = request.url.split('/locations/', 1)[1].split('/')[0]
+
+        with lock:
+            in_flight[location_id] = in_flight.get(location_id, 0) + 1
+            max_in_flight[location_id] = max(
+                max_in_flight.get(location_id, 0),
+                in_flight[location_id]
+            )
+
+        time.sleep(0.02)
+
+        with lock:
+            in_flight[location_id] -= 1
+
+        return 200, listing(request.url.rstrip('/').split('/')[-1], [])
+
+    transport.handler = handler
+    locations = [omnivore.Location(**location(lid)) for lid in 'abc']
+
+    result = load_locations(
+        locations,
+        relations=['employees', 'tables', 'tender_types'],
+        workers=6,
+        per_location=2
+    )
+
+    assert result.errors == {}
+    assert max_in_flight == {'a': 2, 'b': 2, 'c': 2}
@@ -0,0 +1,106 @@
+from __future__ import unicode_literals
+
+import omnivore
+
+from omnivore import client
+from omnivore.cache import ResponseCache
+from omnivore.test.conftest import location
+
+
+def test_fresh_responses_are_served_from_the_cache(transport):
+    omnivore.response_cache = ResponseCache(ttls={'locations/{id}/': 60})
+    transport.add('GET', 'locations/loc1/', location())
+    url = client.build_url('locations/loc1/')
+
+    first = client.get(url)
+
+    assert client.get(url) is first
+    assert len(transport.requests) == 1
+
+
+def test_expired_responses_are_revalidated(transport):
+    omnivore.response_cache = ResponseCache()
+    url = client.build_url('locations/loc1/')
+
+    def handler(request):
+        if request.headers.get('If-None-Match') == '"v1"':
+            return 304, None
+        return 200, location(), {'ETag': '"v1"'}
+
+    transport.handler = handler
+
+    first = client.get(url)
+
+    assert client.get(url) is first
+    assert transport.requests[1].headers['If-None-Match'] == '"v1"'
+    assert len(transport.requests) == 2
+
+
+def test_changed_responses_replace_cached_ones(transport):
+    omnivore.response_cache = ResponseCache()
+    transport.add('GET', 'locations/loc1/', location(), headers={
+        'Last-Modified': 'Mon, 05 Oct 2015 10:00:00 GMT'
+    })
+    url = client.build_url('locations/loc1/')
+
+    client.get(url)
+    transport.add('GET', 'locations/loc1/', location(name='New name'))
+
+    assert client.get(url)['name'] == 'New name'
+    assert 'If-Modified-Since' in transport.requests[1].headers
+
+
+def test_uncacheable_responses_are_not_kept(transport):
+    omnivore.response_cache = ResponseCache()
+    transport.add('GET', 'locations/loc1/', location())
+    url = client.build_url('locations/loc1/')
+
+    client.get(url)
+    client.get(url)
+
+    assert not omnivore.response_cache.entries
+    assert 'If-None-Match' not in transport.requests[1].headers
+
+
+def test_invalidate(transport):
+    cache = omnivore.response_cache = ResponseCache(default_ttl=60)
+    transport.add('GET', 'locations/loc1/', location())
+    transport.add('GET', 'locations/loc2/', location('loc2'))
+
+    client.get(client.build_url('locations/loc1/'))
+    client.get(client.build_url('locations/loc2/'))
+    cache.invalidate(client.build_url('locations/loc1/'))
+
+    assert [key[1] for key in cache.entries] == [
+        client.build_url('locations/loc2/')
+    ]
+
+
+def test_entries_are_evicted():
+    cache = ResponseCache(max_entries=2, max_bytes=100, default_ttl=60)
+
+    cache.set('a', 'locations/a/', {}, {}, 10)
+    cache.set('b', 'locations/b/', {}, {}, 10)
+    cache.get('a')
+    cache.set('c', 'locations/c/', {}, {}, 10)
+    assert list(cache.entries) == ['a', 'c']
+
+    cache.set('d', 'locations/d/', {}, {}, 95)
+    assert list(cache.entries) == ['d']
+    assert cache.size == 95
+
+
+def test_responses_are_kept_apart_per_api_key(transport):
+    omnivore.response_cache = ResponseCache(default_ttl=60)
+    transport.add('GET', 'locations/loc1/', location())
+    url = client.build_url('locations/loc1/')
+
+    client.get(url)
+
+    with omnivore.OmnivoreClient('other-key', transport=transport):
+        client.get(url)
+
+    assert [r.headers['Api-Key'] for r in transport.requests] == [
+        'test-key',
+        'other-key'
+    ]
@@ -0,0 +1,147 @@
+from __future__ import unicode_literals
+
+import threading
+import time
+
+import pytest
+
+import omnivore
+
+from omnivore import client, error
+from omnivore.coalesce import RequestCoalescer
+from omnivore.test.conftest import location
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+
+    while not condition():
+        assert time.time() < deadline
+        time.sleep(0.001)
+
+
+def call_in_threads(func, count):
+    results = [None] * count
+
+    def run(i):
+        try:
+            results[i] = func()
+        except Exception, e:
+            results[i] = e
+
+    threads = [
+        threading.Thread(target=run, args=(i,))
+        for i
+        in range(count)
+    ]
+    for thread in threads:
+        thread.start()
+
+    return threads, results
+
+
+def test_identical_calls_share_one_call():
+    coalescer = RequestCoalescer()
+    release = threading.Event()
+    calls = []
+
+    def func(value):
+        calls.append(value)
+        release.wait()
+        return {'value': value}
+
+    threads, results = call_in_threads(
+        lambda: coalescer.call('key', func, 1),
+        4
+    )
+    wait_for(lambda: coalescer.coalesced == 3)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [1]
+    assert results == [{'value': 1}] * 4
+    assert all(result is results[0] for result in results)
+
+
+def test_errors_are_raised_by_every_caller():
+    coalescer = RequestCoalescer()
+    release = threading.Event()
+
+    def func():
+        release.wait()
+        raise error.APIError('boom')
+
+    threads, results = call_in_threads(lambda: coalescer.call('key', func), 3)
+    wait_for(lambda: coalescer.coalesced == 2)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert all(isinstance(result, error.APIError) for result in results)
+
+
+def test_waiters_time_out():
+    coalescer = RequestCoalescer(timeout=0.01)
+    release = threading.Event()
+
+    threads, results = call_in_threads(
+        lambda: coalescer.call('key', release.wait),
+        1
+    )
+    wait_for(lambda: coalescer.calls)
+
+    with pytest.raises(error.APIConnectionError):
+        coalescer.call('key', release.wait)
+
+    release.set()
+    threads[0].join()
+    assert results == [True]
+    assert not coalescer.calls
+
+
+def test_concurrent_gets_are_coalesced(transport):
+    coalescer = omnivore.request_coalescer = RequestCoalescer()
+    release = threading.Event()
+
+    def handler(request):
+        release.wait()
+        return 200, location()
+
+    transport.handler = handler
+    url = client.build_url('locations/loc1/')
+
+    threads, results = call_in_threads(lambda: client.get(url), 5)
+    wait_for(lambda: coalescer.coalesced == 4)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(transport.requests) == 1
+    assert [result['id'] for result in results] == ['loc1'] * 5
+
+
+def test_gets_with_other_api_keys_are_not_coalesced(transport):
+    omnivore.request_coalescer = RequestCoalescer()
+    other = omnivore.OmnivoreClient('other-key', transport=transport)
+    release = threading.Event()
+
+    def handler(request):
+        release.wait()
+        return 200, location()
+
+    transport.handler = handler
+    url = client.build_url('locations/loc1/')
+
+    def get_with_other_key():
+        with other:
+            return client.get(url)
+
+    threads, _ = call_in_threads(lambda: client.get(url), 1)
+    threads += call_in_threads(get_with_other_key, 1)[0]
+    wait_for(lambda: len(transport.requests) == 2)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert omnivore.request_coalescer.coalesced == 0
@@ -0,0 +1,99 @@
+from __future__ import unicode_literals
+
+import io
+import json
+
+import pytest
+
+import omnivore
+
+from omnivore import client, codec, error
+from omnivore.test.conftest import listing, ticket
+from omnivore.transport import Response
+
+pytest.importorskip('ijson')
+
+
+def page(key, objs, next_url=None):
+    data = listing(key, objs)
+
+    if next_url is not None:
+        data['_links'] = {'next': {'href': next_url}}
+
+    return data
+
+
+def stream(data):
+    return io.BytesIO(json.dumps(data).encode('utf-8'))
+
+
+def test_streamed_list():
+    objs = [
+        {'id': 'a', 'totals': {'total': 1.5}, 'tags': [1, 2]},
+        {'id': 'b', 'totals': {'total': 2}, 'tags': []}
+    ]
+    streamed = codec.StreamedList(
+        stream(page('tickets', objs, 'https://example.com/next')),
+        'tickets'
+    )
+
+    assert list(streamed) == objs
+    assert streamed.next_url == 'https://example.com/next'
+
+
+def test_decimals_are_read_as_floats():
+    streamed = codec.StreamedList(
+        stream(page('tickets', [{'id': 'a', 'price': 8.5, 'items': [0.25]}])),
+        'tickets'
+    )
+
+    obj, = streamed
+    assert type(obj['price']) is float
+    assert type(obj['items'][0]) is float
+
+
+def test_parse_errors_are_value_errors():
+    streamed = codec.StreamedList(
+        io.BytesIO(b'{"_embedded": {"tickets": [{"id": "a"}, {"id": '),
+        'tickets'
+    )
+
+    with pytest.raises(ValueError):
+        list(streamed)
+
+
+@pytest.fixture(params=['ijson', 'no ijson'])
+def streamed_pages(request, transport, monkeypatch):
+    if request.param == 'no ijson':
+        monkeypatch.setattr(codec, 'ObjectBuilder', None)
+        assert codec.get_ijson() is None
+
+    omnivore.stream_lists = True
+    url = client.build_url('locations/loc1/tickets/')
+
+    transport.add('GET', url, page(
+        'tickets',
+        [ticket('tkt1'), ticket('tkt2')],
+        url + '?start=2'
+    ))
+    transport.add('GET', url + '?start=2', page('tickets', [ticket('tkt3')]))
+
+    return url
+
+
+def test_lists_are_streamed_across_pages(transport, streamed_pages):
+    tickets = list(client.iter_list(streamed_pages, 'tickets'))
+
+    assert [t['id'] for t in tickets] == ['tkt1', 'tkt2', 'tkt3']
+    assert len(transport.requests) == 2
+
+
+def test_truncated_pages_raise_api_errors(transport, streamed_pages):
+    def request(method, url, headers, data=None, stream=False, timeout=None):
+        body = b'{"_embedded": {"tickets": [{"id": "tkt1"}, {"id": '
+        return Response(200, {}, io.BytesIO(body))
+
+    transport.request = request
+
+    with pytest.raises(error.APIError):
+        list(client.iter_list(streamed_pages, 'tickets'))
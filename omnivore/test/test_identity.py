@@ -0,0 +1,52 @@
+from __future__ import unicode_literals
+
+import omnivore
+
+from omnivore.test.conftest import employee, ticket
+
+
+def test_embedded_resources_are_shared_across_tickets():
+    with omnivore.IdentityMap():
+        first = omnivore.Ticket('loc1', **ticket('tkt1'))
+        second = omnivore.Ticket('loc1', **ticket('tkt2'))
+        other_location = omnivore.Ticket('loc2', **ticket('tkt1'))
+
+    assert first is not second
+    assert first.employee is second.employee
+    assert first.revenue_center is second.revenue_center
+    assert first.employee is not other_location.employee
+
+
+def test_resources_are_not_shared_outside_an_identity_map():
+    first = omnivore.Ticket('loc1', **ticket('tkt1'))
+    second = omnivore.Ticket('loc1', **ticket('tkt2'))
+
+    assert first.employee is not second.employee
+
+
+def test_resources_are_refreshed_in_place():
+    renamed = dict(employee(), first_name='Alex')
+    renamed_center = {'id': 'rc1', 'default': False, 'name': 'Patio'}
+
+    with omnivore.IdentityMap() as identity_map:
+        first = omnivore.Ticket('loc1', **ticket('tkt1'))
+        employee_obj = first.employee
+
+        second = omnivore.Ticket('loc1', **ticket('tkt2', _embedded=dict(
+            ticket()['_embedded'],
+            employee=renamed,
+            revenue_center=renamed_center
+        )))
+
+        assert second.employee is employee_obj
+        assert first.employee.first_name == 'Alex'
+        assert first.revenue_center.name == 'Patio'
+
+        again = omnivore.Ticket('loc1', **ticket('tkt1', name='Table 9'))
+
+    assert again is first
+    assert first.employee.first_name == 'Sam'
+    assert first.name == 'Table 9'
+
+    # Two tickets, one employee, one revenue center, one order type
+    assert len(identity_map) == 5
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import pytest
+
+import omnivore
+
+from omnivore.resource.menu import MenuIndex, normalize_name
+from omnivore.snapshot import MenuSnapshotStore
+from omnivore.test.conftest import (
+    category,
+    listing,
+    menu_item,
+    modifier,
+    modifier_group
+)
+
+
+MENU = 'locations/loc1/menu/'
+
+
+@pytest.mark.parametrize('name, normalized', [
+    ('Fish & Chips ', 'fish chips'),
+    ('fish_chips', 'fish chips'),
+    ('Crème  Brûlée', 'creme brulee'),
+    ('COKE', 'coke'),
+    (None, '')
+])
+def test_normalize_name(name, normalized):
+    assert normalize_name(name) == normalized
+
+
+def test_menu_index():
+    burger = omnivore.MenuItem('loc1', **menu_item('item1'))
+    other = omnivore.MenuItem('loc1', **menu_item('item2', name='burger!'))
+    fries = omnivore.MenuItem('loc1', **menu_item('item3', name='Fries'))
+    cheese = omnivore.Modifier('loc1', **modifier())
+    burgers = omnivore.Category('loc1', **category(items=[
+        menu_item('item1'),
+        menu_item('gone')
+    ]))
+
+    index = MenuIndex([burger, other, fries], [burgers], [cheese])
+
+    assert index.items['item3'] is fries
+    assert index.find_items(' BURGER') == [burger, other]
+    assert index.find_items('salad') == []
+    assert index.categories == {'cat1': burgers}
+    assert index.modifiers == {'mod1': cheese}
+
+    # Category items are the menu's own, unless the menu does not have them
+    linked, unknown = index.category_items['cat1']
+    assert linked is burger
+    assert unknown.id == 'gone'
+
+
+def test_menu_index_is_loaded_and_invalidated(transport):
+    transport.add('GET', MENU + 'categories/', listing('categories', [
+        category(items=[menu_item()])
+    ]))
+    transport.add('GET', MENU + 'items/', listing('menu_items', [
+        menu_item()
+    ]))
+    transport.add('GET', MENU + 'modifiers/', listing('modifiers', [
+        modifier()
+    ]))
+    menu = omnivore.Menu('loc1')
+
+    index = menu.index
+    assert index.category_items['cat1'][0] is menu.items[0]
+    assert len(transport.requests) == 3
+
+    menu.invalidate('items')
+    assert menu.index is not index
+    assert len(transport.requests) == 4
+
+
+@pytest.fixture
+def full_menu(transport):
+    transport.add('GET', MENU + 'categories/', listing('categories', [
+        category(items=[menu_item('item1'), menu_item('item2')])
+    ]))
+    transport.add('GET', MENU + 'items/', listing('menu_items', [
+        menu_item('item1', modifier_groups_count=1),
+        menu_item('item2', name='Fries')
+    ]))
+    transport.add('GET', MENU + 'modifiers/', listing('modifiers', [
+        modifier('mod1'),
+        modifier('mod2', name='Bacon')
+    ]))
+    transport.add(
+        'GET',
+        MENU + 'items/item1/modifier_groups/',
+        listing('modifier_groups', [modifier_group(options=[
+            modifier('mod1'),
+            modifier('mod3', name='Off menu')
+        ])])
+    )
+
+
+def test_load_full(transport, full_menu):
+    menu = omnivore.Menu('loc1')
+
+    result = menu.load_full(workers=4)
+
+    assert result.menu is menu
+    assert result.requests == 4
+    assert result.duration >= 0
+
+    # Items without modifier groups are not asked for theirs
+    burger, fries = menu.items
+    assert omnivore.MenuItem.modifier_groups.is_fresh(burger)
+    assert not omnivore.MenuItem.modifier_groups.is_fresh(fries)
+    assert MENU + 'items/item2/modifier_groups/' not in [
+        r.url.split('/0.1/', 1)[1] for r in transport.requests
+    ]
+
+
+def test_load_full_links_options_to_menu_modifiers(transport, full_menu):
+    menu = omnivore.Menu('loc1')
+    menu.load_full()
+
+    cheese, off_menu = menu.items[0].modifier_groups[0].options
+    assert cheese is menu.index.modifiers['mod1']
+    assert off_menu.id == 'mod3'
+
+    # Relinking after the modifiers are reloaded
+    menu.invalidate('modifiers')
+    menu.link()
+
+    options = menu.items[0].modifier_groups[0].options
+    assert options[0] is not cheese
+    assert options[0] is menu.index.modifiers['mod1']
+    assert options[1] is off_menu
+
+
+def test_load_full_uses_snapshots(transport, full_menu, tmpdir):
+    omnivore.menu_snapshots = MenuSnapshotStore(str(tmpdir))
+    omnivore.Menu('loc1').load_full()
+    count = len(transport.requests)
+
+    result = omnivore.Menu('loc1').load_full()
+
+    assert result.requests == 0
+    assert len(transport.requests) == count
+    assert [item.id for item in result.menu.items] == ['item1', 'item2']
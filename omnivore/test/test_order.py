@@ -0,0 +1,170 @@
+from __future__ import unicode_literals
+
+import errno
+import socket
+
+import pytest
+
+import omnivore
+
+from omnivore import error
+from omnivore.test.conftest import location, menu_item, ticket, ticket_item
+
+
+TICKETS = 'locations/loc1/tickets/'
+ITEMS = 'locations/loc1/tickets/tkt1/items/'
+PAYMENTS = 'locations/loc1/tickets/tkt1/payments/'
+VOID = 'locations/loc1/tickets/tkt1/'
+
+TICKET = {
+    'employee_id': 'emp1',
+    'order_type_id': 'ot1',
+    'revenue_center_id': 'rc1',
+    'table_id': None
+}
+
+PAYMENT = {
+    'type': '3rd_party',
+    'tender_type': 'tt1',
+    'payment_source': 'doordash'
+}
+
+
+@pytest.fixture
+def order(transport):
+    transport.add('POST', TICKETS, ticket(), status_code=201)
+    transport.add('POST', ITEMS, ticket(
+        items=[ticket_item('ti1'), ticket_item('ti2')],
+        totals={'total': 1700, 'due': 1700}
+    ), status_code=201)
+    transport.add('POST', PAYMENTS, {
+        'amount_paid': 1700,
+        'accepted': True,
+        'ticket_closed': True,
+        'balance_remaining': 0,
+        'type': '3rd_party',
+        'ticket': ticket(open=False, closed_at=1444000900)
+    }, status_code=201)
+    transport.add('POST', VOID, ticket(open=False))
+
+    item = omnivore.MenuItem('loc1', **menu_item())
+
+    return omnivore.Location(**location()), [
+        {'menu_item': item, 'quantity': 1},
+        {'menu_item': item, 'quantity': 1, 'price_level': 'pl1'}
+    ]
+
+
+def requests_made(transport):
+    return [
+        (request.method, request.url.split('/0.1/', 1)[1])
+        for request
+        in transport.requests
+    ]
+
+
+def test_place_order(transport, order):
+    loc, items = order
+
+    result = loc.place_order(TICKET, items, PAYMENT)
+
+    assert requests_made(transport) == [
+        ('POST', TICKETS),
+        ('POST', ITEMS),
+        ('POST', PAYMENTS)
+    ]
+    assert transport.requests[1].json == [
+        {'menu_item': 'item1', 'quantity': 1},
+        {'menu_item': 'item1', 'quantity': 1, 'price_level': 'pl1'}
+    ]
+    assert transport.requests[2].json == dict(PAYMENT, amount=1700, tip=0)
+
+    assert result.ticket.id == 'tkt1'
+    assert not result.ticket.open
+    assert result.payment['amount_paid'] == 1700
+    assert list(result.timings) == ['open', 'items', 'pay', 'total']
+
+
+@pytest.mark.parametrize('items, payment', [
+    ([{'menu_item': 'item1'}], PAYMENT),
+    (
+        [{'menu_item': omnivore.MenuItem('loc1', **menu_item()),
+          'quantity': 1,
+          'price_level': 'unknown'}],
+        PAYMENT
+    ),
+    ([], {'type': 'cash'}),
+    ([], {'type': '3rd_party', 'tender_type': 'tt1'})
+])
+def test_invalid_orders_make_no_requests(transport, order, items, payment):
+    loc, _ = order
+
+    with pytest.raises(error.OrderError) as info:
+        loc.place_order(TICKET, items, payment)
+
+    assert info.value.stage == 'validate'
+    assert info.value.ticket_id is None
+    assert transport.requests == []
+
+
+def test_ticket_is_voided_when_adding_items_fails(transport, order):
+    loc, items = order
+    transport.add('POST', ITEMS, {'error': 'Item out of stock'}, 400)
+
+    with pytest.raises(error.OrderError) as info:
+        loc.place_order(TICKET, items, PAYMENT)
+
+    assert info.value.stage == 'items'
+    assert info.value.status_code == 400
+    assert info.value.ticket_id == 'tkt1'
+    assert info.value.voided
+    assert requests_made(transport)[-1] == ('POST', VOID)
+    assert transport.requests[-1].json == {'void': True}
+
+
+def test_ticket_is_voided_when_payment_is_declined(transport, order):
+    loc, items = order
+    transport.add('POST', PAYMENTS, {'error': 'Declined'}, 400)
+
+    with pytest.raises(error.OrderError) as info:
+        loc.place_order(TICKET, items, PAYMENT)
+
+    assert info.value.stage == 'pay'
+    assert info.value.voided
+
+
+@pytest.mark.parametrize('failure', [
+    (502, {'error': 'Bad gateway'}),
+    socket.error(errno.ECONNRESET, 'Connection reset')
+])
+def test_ticket_is_kept_when_payment_outcome_is_unknown(transport, order,
+                                                        failure):
+    loc, items = order
+
+    def handler(request):
+        if isinstance(failure, Exception):
+            raise failure
+        return failure
+
+    transport.responses.pop(('POST', PAYMENTS))
+    transport.handler = handler
+
+    with pytest.raises(error.OrderError) as info:
+        loc.place_order(TICKET, items, PAYMENT)
+
+    assert info.value.stage == 'pay'
+    assert info.value.ticket_id == 'tkt1'
+    assert not info.value.voided
+    assert ('POST', VOID) not in requests_made(transport)
+
+
+def test_void_failure_is_reported(transport, order):
+    loc, items = order
+    transport.add('POST', ITEMS, {'error': 'Item out of stock'}, 400)
+    transport.add('POST', VOID, {'error': 'Internal error'}, 500)
+
+    with pytest.raises(error.OrderError) as info:
+        loc.place_order(TICKET, items, PAYMENT)
+
+    assert not info.value.voided
+    assert 'void' in info.value.timings
@@ -0,0 +1,34 @@
+from __future__ import unicode_literals
+
+import pytest
+
+import omnivore
+
+from omnivore.benchmark.server import FakeOmnivore
+
+
+@pytest.fixture(scope='module')
+def fake_omnivore():
+    with FakeOmnivore(locations=3, tickets=25, page_size=10) as server:
+        yield server
+
+
+@pytest.fixture
+def api(fake_omnivore):
+    omnivore.api_base = fake_omnivore.base_url
+    omnivore.http_transport = None
+
+
+def test_lists_follow_every_page(api):
+    locations = omnivore.Location.all()
+    assert len(locations) == 3
+
+    tickets = locations[0].tickets
+    assert len(tickets) == 25
+    assert len(set(t.id for t in tickets)) == 25
+
+
+def test_iter_all_streams_pages(api):
+    loc = omnivore.Location.all()[0]
+
+    assert len(list(loc.iter_tickets())) == 25
@@ -0,0 +1,89 @@
+from __future__ import unicode_literals
+
+import pytest
+
+import omnivore
+
+from omnivore import client, error
+from omnivore.ratelimit import FileBackend, RateLimiter, take_token
+from omnivore.test.conftest import location
+
+
+def test_take_token():
+    state, wait = take_token(None, 2.0, 3.0, 100)
+    assert state == [2, 100] and wait == 0
+
+    state, wait = take_token([0, 100], 2.0, 3.0, 100)
+    assert state == [0, 100] and wait == 0.5
+
+    # Refilled at the rate, up to the capacity
+    state, wait = take_token([0, 100], 2.0, 3.0, 101)
+    assert state == [1, 101] and wait == 0
+
+    state, wait = take_token([0, 100], 2.0, 3.0, 200)
+    assert state == [2, 200] and wait == 0
+
+
+def test_take_token_never_goes_back_in_time():
+    state, wait = take_token([0.5, 100], 1.0, 1.0, 99)
+    assert state == [0.5, 100] and wait == 0.5
+
+
+def test_burst_up_to_capacity():
+    limiter = RateLimiter(rate=1, capacity=3)
+
+    assert [limiter.try_acquire('key') for _ in range(3)] == [0, 0, 0]
+    assert 0 < limiter.try_acquire('key') <= 1
+    assert limiter.try_acquire('other-key') == 0
+
+
+def test_rate_below_one_per_second():
+    limiter = RateLimiter(rate=0.5)
+
+    assert limiter.capacity == 1
+    assert limiter.acquire('key')
+    assert 1.9 < limiter.try_acquire('key') <= 2
+
+
+def test_capacity_below_one_is_rejected():
+    with pytest.raises(ValueError):
+        RateLimiter(rate=0.5, capacity=0.5)
+
+
+def test_per_location():
+    limiter = RateLimiter(rate=1, per_location=True)
+
+    assert limiter.try_acquire('key', 'loc1') == 0
+    assert limiter.try_acquire('key', 'loc2') == 0
+    assert limiter.try_acquire('key', 'loc1') > 0
+
+
+def test_acquire_times_out():
+    limiter = RateLimiter(rate=1)
+    limiter.acquire('key')
+
+    assert not limiter.acquire('key', blocking=False)
+    assert not limiter.acquire('key', timeout=0.01)
+
+
+def test_file_backend_is_shared(tmpdir):
+    path = str(tmpdir.join('buckets.json'))
+    first = RateLimiter(rate=1, capacity=2, backend=FileBackend(path))
+    second = RateLimiter(rate=1, capacity=2, backend=FileBackend(path))
+
+    assert first.try_acquire('key') == 0
+    assert second.try_acquire('key') == 0
+    assert first.try_acquire('key') > 0
+
+
+def test_requests_are_limited(transport):
+    omnivore.rate_limiter = RateLimiter(rate=1, timeout=0)
+    transport.add('GET', 'locations/loc1/', location())
+    url = client.build_url('locations/loc1/')
+
+    client.get(url)
+
+    with pytest.raises(error.RateLimitError):
+        client.get(url)
+
+    assert len(transport.requests) == 1
@@ -0,0 +1,112 @@
+from __future__ import unicode_literals
+
+import time
+
+import omnivore
+
+from omnivore.registry import Registry
+from omnivore.test.conftest import employee, listing, location
+
+
+def test_get_or_load():
+    registry = Registry()
+    loads = []
+
+    def load():
+        loads.append(1)
+        return ['value']
+
+    assert registry.get_or_load('key', load) == ['value']
+    assert registry.get_or_load('key', load) == ['value']
+    assert len(loads) == 1
+
+
+def test_entries_expire():
+    registry = Registry(ttl=60)
+    registry.set('key', ['old'])
+    registry.entries['key'].loaded_at -= 61
+
+    assert registry.get_or_load('key', lambda: ['new']) == ['new']
+
+    # A shorter max_age wins over the registry's ttl
+    time.sleep(0.01)
+    assert registry.get_or_load('key', lambda: ['newer'], 0.001) == ['newer']
+
+
+def test_entries_are_evicted():
+    registry = Registry(max_entries=2)
+
+    registry.set('a', [])
+    registry.set('b', [])
+    registry.get_or_load('a', list)
+    registry.set('c', [])
+
+    assert list(registry.entries) == ['a', 'c']
+
+
+def test_entries_are_evicted_by_size():
+    registry = Registry(max_bytes=1)
+    registry.set('a', [])
+
+    assert not registry.entries
+    assert registry.size == 0
+
+
+def test_invalidate():
+    registry = Registry()
+    for key in [
+        ('s1', 'loc1', 'employees'),
+        ('s1', 'loc1', 'menu.items'),
+        ('s1', 'loc1', 'menu.items.item1.modifier_groups'),
+        ('s2', 'loc1', 'menu.items'),
+        ('s1', 'loc2', 'menu.items')
+    ]:
+        registry.set(key, [])
+
+    registry.invalidate('loc1', prefix='menu.', scope='s1')
+    assert list(registry.entries) == [
+        ('s1', 'loc1', 'employees'),
+        ('s2', 'loc1', 'menu.items'),
+        ('s1', 'loc2', 'menu.items')
+    ]
+
+    registry.invalidate('loc1', 'menu.items')
+    registry.invalidate('loc2')
+    assert list(registry.entries) == [('s1', 'loc1', 'employees')]
+
+
+def test_locations_share_reference_data(transport):
+    omnivore.resource_registry = Registry()
+    transport.add('GET', 'locations/loc1/employees/', listing('employees', [
+        employee()
+    ]))
+
+    first = omnivore.Location(**location())
+    second = omnivore.Location(**location())
+
+    assert first.employees is second.employees
+    assert len(transport.requests) == 1
+
+    second.invalidate('employees')
+    second.employees
+    assert len(transport.requests) == 2
+
+
+def test_clients_do_not_share_reference_data(transport):
+    omnivore.resource_registry = Registry()
+    transport.add('GET', 'locations/loc1/employees/', listing('employees', [
+        employee()
+    ]))
+    other = omnivore.OmnivoreClient('other-key', transport=transport)
+
+    employees = omnivore.Location(**location()).employees
+
+    with other:
+        loc = omnivore.Location(**location())
+
+    assert loc.employees is not employees
+    assert loc.employees[0]._client is other
+    assert [r.headers['Api-Key'] for r in transport.requests] == [
+        'test-key',
+        'other-key'
+    ]
@@ -0,0 +1,122 @@
+from __future__ import unicode_literals
+
+import cPickle
+import pickle
+
+import pytest
+
+import omnivore
+
+from omnivore.test.conftest import (
+    employee,
+    listing,
+    location,
+    payment,
+    ticket,
+    ticket_item
+)
+from omnivore.util import get_embedded_properties
+
+
+@pytest.mark.parametrize('module', [pickle, cPickle])
+@pytest.mark.parametrize('protocol', [0, 1, 2])
+def test_pickle(transport, module, protocol):
+    transport.add('GET', 'locations/loc1/employees/', listing('employees', [
+        employee()
+    ]))
+
+    loc = omnivore.Location(**location())
+    loc.employees
+    tkt = omnivore.Ticket(
+        'loc1',
+        **ticket(items=[ticket_item()], payments=[payment()])
+    )
+
+    loc = module.loads(module.dumps(loc, protocol))
+    tkt = module.loads(module.dumps(tkt, protocol))
+
+    assert loc.name == 'Burger Place'
+    assert loc.employees[0].login == 'sam'
+    assert tkt.open
+    assert tkt.employee.id == 'emp1'
+    assert tkt.items[0].menu_item.name == 'Burger'
+    assert tkt.payments[0].amount == 850
+    assert len(transport.requests) == 1
+
+
+def test_unpickled_resource_is_bound_to_current_client():
+    omnivore_client = omnivore.OmnivoreClient('other-key')
+
+    with omnivore_client:
+        tkt = omnivore.Ticket('loc1', **ticket())
+
+    data = pickle.dumps(tkt)
+
+    assert pickle.loads(data)._client is None
+
+    with omnivore_client:
+        assert pickle.loads(data)._client is omnivore_client
+
+
+def embedded_names(obj):
+    return sorted(
+        prop.name
+        for prop
+        in get_embedded_properties(obj.__class__)
+        if prop.is_fresh(obj)
+    )
+
+
+def test_embedded_objects_are_built_right_away():
+    tkt = omnivore.Ticket('loc1', **ticket(items=[ticket_item()]))
+
+    assert tkt._embedded is None
+    assert embedded_names(tkt) == [
+        'discounts',
+        'employee',
+        'items',
+        'order_type',
+        'payments',
+        'revenue_center',
+        'table',
+        'voided_items'
+    ]
+
+
+def test_lazy_embedded_objects_are_built_on_first_access():
+    omnivore.lazy_embedded = True
+    data = ticket(items=[ticket_item()])
+
+    with omnivore.IdentityMap() as identity_map:
+        tkt = omnivore.Ticket('loc1', **data)
+
+        assert embedded_names(tkt) == []
+        assert tkt._embedded is data['_embedded']
+        assert len(identity_map) == 1
+
+        assert tkt.items[0].menu_item.name == 'Burger'
+        assert tkt.employee.id == 'emp1'
+
+    assert embedded_names(tkt) == ['employee', 'items']
+    assert tkt._embedded is data['_embedded']
+
+    # The ticket, its item, the item's menu item and the employee
+    assert len(identity_map) == 4
+
+
+@pytest.mark.parametrize('lazy', [False, True])
+def test_payments_fall_back_to_related_endpoint(transport, lazy):
+    omnivore.lazy_embedded = lazy
+    transport.add(
+        'GET',
+        'locations/loc1/tickets/tkt1/payments/',
+        listing('payments', [payment()])
+    )
+    data = ticket()
+    del data['_embedded']['payments']
+
+    tkt = omnivore.Ticket('loc1', **data)
+    assert transport.requests == []
+
+    assert [p.id for p in tkt.payments] == ['pay1']
+    assert len(transport.requests) == 1
@@ -0,0 +1,197 @@
+from __future__ import unicode_literals
+
+import errno
+import socket
+import threading
+import time
+
+import pytest
+
+import omnivore
+
+from omnivore import client, error
+from omnivore.retry import RetryPolicy, is_connect_error, parse_retry_after
+from omnivore.test.conftest import location, ticket
+
+
+def respond(*responses):
+    """
+    Transport handler giving `responses` in turn, raising those that are
+    exceptions.
+    """
+    responses = list(responses)
+
+    def handler(request):
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    return handler
+
+
+@pytest.fixture
+def policy():
+    policy = omnivore.retry_policy = RetryPolicy(backoff=0)
+    return policy
+
+
+def test_get_is_retried(transport, policy):
+    transport.handler = respond(
+        (503, {'error': 'busy'}),
+        socket.error(errno.ECONNRESET, 'Connection reset'),
+        (200, location())
+    )
+
+    assert omnivore.Location.get('loc1').id == 'loc1'
+    assert len(transport.requests) == 3
+
+
+def test_attempts_are_limited(transport, policy):
+    transport.handler = lambda request: (502, {'error': 'bad gateway'})
+
+    with pytest.raises(error.APIError):
+        omnivore.Location.get('loc1')
+
+    assert len(transport.requests) == policy.max_attempts
+
+
+def test_post_is_not_retried_after_server_error(transport, policy):
+    transport.handler = respond((500, {'error': 'boom'}), (201, ticket()))
+
+    with pytest.raises(error.APIError):
+        omnivore.Ticket.open('loc1', 'emp1', 'ot1', 'rc1', None)
+
+    assert len(transport.requests) == 1
+
+
+def test_post_is_retried_when_rejected(transport, policy):
+    transport.handler = respond(
+        (429, {'error': 'slow down'}, {'Retry-After': '0'}),
+        socket.error(errno.ECONNREFUSED, 'Connection refused'),
+        (201, ticket())
+    )
+
+    assert omnivore.Ticket.open('loc1', 'emp1', 'ot1', 'rc1', None).id
+    assert len(transport.requests) == 3
+
+
+def test_post_is_not_retried_after_connection_reset(transport, policy):
+    transport.handler = respond(
+        socket.error(errno.ECONNRESET, 'Connection reset'),
+        (201, ticket())
+    )
+
+    with pytest.raises(error.APIConnectionError):
+        omnivore.Ticket.open('loc1', 'emp1', 'ot1', 'rc1', None)
+
+    assert len(transport.requests) == 1
+
+
+def test_no_retries_without_policy(transport):
+    transport.handler = respond((503, {'error': 'busy'}), (200, location()))
+
+    with pytest.raises(error.APIError):
+        omnivore.Location.get('loc1')
+
+    assert len(transport.requests) == 1
+
+
+def test_retry_delay():
+    policy = RetryPolicy(max_attempts=3, backoff=1, max_backoff=3, budget=10)
+
+    assert 0 <= policy.retry_delay(1, 0, True, status_code=500) <= 1
+    assert 0 <= policy.retry_delay(2, 0, True, status_code=500) <= 2
+    assert policy.retry_delay(3, 0, True, status_code=500) is None
+    assert policy.retry_delay(1, 0, True, status_code=400) is None
+
+    headers = {'Retry-After': '4'}
+    assert policy.retry_delay(1, 0, True, 503, headers) == 4
+    assert policy.retry_delay(1, 0, False, 503, headers) == 4
+    assert policy.retry_delay(1, 7, True, 503, headers) is None
+
+
+def test_parse_retry_after():
+    epoch = 'Thu, 01 Jan 1970 00:00:00 GMT'
+
+    assert parse_retry_after({'Retry-After': '2.5'}) == 2.5
+    assert parse_retry_after({'Retry-After': epoch}) == 0
+    assert parse_retry_after({'Retry-After': 'soon'}) is None
+    assert parse_retry_after(None) is None
+
+
+def test_is_connect_error():
+    assert is_connect_error(socket.error(errno.ECONNREFUSED, 'refused'))
+    assert not is_connect_error(socket.error(errno.ECONNRESET, 'reset'))
+    assert not is_connect_error(ValueError())
+
+
+def test_timeout_is_passed_to_transport(transport, policy):
+    omnivore.request_timeout = (2, 20)
+    transport.handler = respond((503, {'error': 'busy'}), (200, location()))
+
+    client.get(client.build_url('locations/loc1/'))
+
+    assert transport.requests[0].timeout == (2, 20)
+    assert transport.requests[1].timeout == (2, 20)
+
+
+def test_retries_are_cut_to_the_budget(transport):
+    omnivore.retry_policy = RetryPolicy(backoff=0, budget=5)
+    omnivore.request_timeout = 30
+    transport.handler = respond((503, {'error': 'busy'}), (200, location()))
+
+    client.get(client.build_url('locations/loc1/'))
+
+    assert transport.requests[0].timeout == 30
+    assert all(0 < t <= 5 for t in transport.requests[1].timeout)
+
+
+def test_cap_timeout():
+    policy = RetryPolicy(budget=10)
+
+    assert policy.cap_timeout((3, 30), 4) == (3, 6)
+    assert policy.cap_timeout(None, 4) == (6, 6)
+    assert policy.cap_timeout((3, 30), 12) == (0.01, 0.01)
+    assert RetryPolicy(budget=None).cap_timeout(5, 100) == (5, 5)
+
+
+@pytest.fixture
+def silent_server():
+    """
+    Server accepting connections and never answering.
+    """
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    sock.listen(5)
+    conns = []
+
+    def accept():
+        while True:
+            try:
+                conns.append(sock.accept()[0])
+            except socket.error:
+                return
+
+    thread = threading.Thread(target=accept)
+    thread.daemon = True
+    thread.start()
+
+    yield 'http://127.0.0.1:{}/'.format(sock.getsockname()[1])
+
+    sock.close()
+    for conn in conns:
+        conn.close()
+
+
+def test_requests_time_out(silent_server):
+    omnivore.api_base = silent_server
+    omnivore.http_transport = None
+    omnivore.request_timeout = (1, 0.1)
+
+    start = time.time()
+
+    with pytest.raises(error.APIConnectionError):
+        omnivore.Location.get('loc1')
+
+    assert time.time() - start < 1
@@ -0,0 +1,138 @@
+from __future__ import unicode_literals
+
+import marshal
+import os
+import time
+
+import pytest
+
+import omnivore
+
+from omnivore import snapshot
+from omnivore.snapshot import MenuSnapshotStore
+from omnivore.test.conftest import (
+    category,
+    menu_item,
+    modifier,
+    modifier_group
+)
+
+
+def loaded_menu():
+    menu = omnivore.Menu('loc1')
+    menu.modifiers = [omnivore.Modifier('loc1', **modifier())]
+    menu.categories = [
+        omnivore.Category('loc1', **category(items=[menu_item()]))
+    ]
+
+    item = omnivore.MenuItem('loc1', **menu_item(modifier_groups_count=1))
+    item.modifier_groups = [omnivore.ModifierGroup(
+        'loc1',
+        'item1',
+        **modifier_group(options=[modifier()])
+    )]
+    menu.items = [
+        item,
+        omnivore.MenuItem('loc1', **menu_item('item2', name='Fries'))
+    ]
+
+    return menu
+
+
+@pytest.fixture
+def store(tmpdir):
+    return MenuSnapshotStore(str(tmpdir))
+
+
+def test_round_trip(store):
+    store.save(loaded_menu())
+    menu = omnivore.Menu('loc1')
+
+    assert store.load(menu)
+
+    item, fries = menu.items
+    assert (item.id, item.name, item.price_level_ids) == (
+        'item1',
+        'Burger',
+        frozenset(['pl1'])
+    )
+    assert fries.name == 'Fries'
+    assert not omnivore.MenuItem.modifier_groups.is_fresh(fries)
+    assert [i.id for i in menu.categories[0].items] == ['item1']
+
+    # Options are linked to the menu's modifiers
+    group, = item.modifier_groups
+    assert group.options[0] is menu.modifiers[0]
+
+
+def test_snapshot_of_another_location_is_not_loaded(store):
+    store.save(loaded_menu())
+    os.rename(store.get_path('loc1'), store.get_path('loc2'))
+
+    assert not store.load(omnivore.Menu('loc2'))
+    assert not os.path.exists(store.get_path('loc2'))
+
+
+@pytest.mark.parametrize('module, name', [
+    (snapshot, 'FORMAT_VERSION'),
+    (marshal, 'version')
+])
+def test_other_versions_are_dropped(store, monkeypatch, module, name):
+    store.save(loaded_menu())
+    monkeypatch.setattr(module, name, getattr(module, name) + 1)
+
+    assert not store.load(omnivore.Menu('loc1'))
+    assert not os.path.exists(store.get_path('loc1'))
+
+
+def test_expired_snapshots_are_dropped(store, monkeypatch):
+    store.max_age = 60
+    store.save(loaded_menu())
+    assert store.load(omnivore.Menu('loc1'))
+
+    now = time.time()
+    monkeypatch.setattr(time, 'time', lambda: now + 61)
+
+    assert not store.load(omnivore.Menu('loc1'))
+    assert not os.path.exists(store.get_path('loc1'))
+
+
+@pytest.mark.parametrize('corrupt', [
+    lambda data: data[:10],
+    lambda data: data[:-5],
+    lambda data: data[:snapshot.HEADER.size] + b'\xff' * 100
+])
+def test_corrupt_snapshots_are_dropped(store, corrupt):
+    store.save(loaded_menu())
+    path = store.get_path('loc1')
+
+    with open(path, 'rb') as f:
+        data = f.read()
+    with open(path, 'wb') as f:
+        f.write(corrupt(data))
+
+    assert not store.load(omnivore.Menu('loc1'))
+    assert not os.path.exists(path)
+
+
+def test_missing_and_empty_snapshots(store):
+    assert not store.load(omnivore.Menu('loc1'))
+
+    open(store.get_path('loc1'), 'wb').close()
+    assert not store.load(omnivore.Menu('loc1'))
+
+
+def test_directory_is_created(tmpdir):
+    store = MenuSnapshotStore(str(tmpdir.join('menus', 'v1')))
+    store.save(loaded_menu())
+
+    assert store.load(omnivore.Menu('loc1'))
+
+
+def test_invalidating_the_menu_drops_its_snapshot(store):
+    omnivore.menu_snapshots = store
+    store.save(loaded_menu())
+
+    omnivore.Menu('loc1').invalidate('items')
+
+    assert not os.path.exists(store.get_path('loc1'))
@@ -0,0 +1,152 @@
+from __future__ import unicode_literals
+
+import errno
+import logging
+import socket
+
+import pytest
+
+import omnivore
+
+from omnivore import error
+from omnivore.stats import LatencyHistogram, RequestEvent
+from omnivore.test.conftest import location
+
+
+class Recorder(object):
+
+    def __init__(self):
+        self.calls = []
+
+    def before_request(self, event):
+        self.calls.append(('before_request', event.status_code))
+
+    def after_response(self, event):
+        self.calls.append(('after_response', event.status_code))
+
+    def on_error(self, event, e):
+        self.calls.append(('on_error', type(e)))
+
+
+class Failing(object):
+
+    def before_request(self, event):
+        raise ValueError('before')
+
+    def on_error(self, event, e):
+        raise ValueError('on error')
+
+
+def test_hooks_see_every_request(transport):
+    recorder = Recorder()
+    events = []
+    recorder.after_response = lambda event: events.append(event)
+    omnivore.request_hooks = [recorder]
+    transport.add('GET', 'locations/loc1/', location())
+
+    omnivore.Location.get('loc1')
+
+    assert recorder.calls == [('before_request', None)]
+
+    event, = events
+    assert (event.method, event.endpoint, event.location_id) == (
+        'GET',
+        'locations/{id}/',
+        'loc1'
+    )
+    assert event.status_code == 200
+    assert event.latency >= 0
+    assert event.response_bytes > 0
+    assert event.retries == 0
+
+
+def test_on_error(transport):
+    recorder = Recorder()
+    omnivore.request_hooks = [recorder]
+
+    def handler(request):
+        raise socket.error(errno.ECONNRESET, 'Connection reset')
+
+    transport.handler = handler
+
+    with pytest.raises(error.APIConnectionError):
+        omnivore.Location.get('loc1')
+
+    assert recorder.calls == [
+        ('before_request', None),
+        ('on_error', error.APIConnectionError)
+    ]
+
+
+def test_failing_hooks_are_logged(transport, caplog):
+    recorder = Recorder()
+    omnivore.request_hooks = [Failing(), recorder]
+    transport.add('GET', 'locations/loc1/', location())
+
+    with caplog.at_level(logging.ERROR, logger='omnivore'):
+        assert omnivore.Location.get('loc1').id == 'loc1'
+
+    assert 'failed in before_request' in caplog.text
+    assert recorder.calls == [
+        ('before_request', None),
+        ('after_response', 200)
+    ]
+
+
+def test_failing_on_error_hook_keeps_the_original_exception(transport,
+                                                            caplog):
+    omnivore.request_hooks = [Failing()]
+
+    def handler(request):
+        raise socket.error(errno.ECONNRESET, 'Connection reset')
+
+    transport.handler = handler
+
+    with caplog.at_level(logging.ERROR, logger='omnivore'):
+        with pytest.raises(error.APIConnectionError):
+            omnivore.Location.get('loc1')
+
+    assert 'failed in on_error' in caplog.text
+
+
+def event(endpoint, latency, location_id='loc1'):
+    event = RequestEvent('GET', '', endpoint, location_id, 0)
+    event.latency = latency
+    return event
+
+
+def test_latency_percentiles():
+    histogram = LatencyHistogram(min_latency=0.125, max_latency=10, growth=2)
+
+    assert histogram.bounds == [0.125, 0.25, 0.5, 1, 2, 4, 8, 10]
+    assert histogram.percentile('locations/', 50) is None
+
+    for latency in [0.1] * 50 + [0.3] * 45 + [3] * 4 + [60]:
+        histogram.after_response(event('locations/', latency))
+
+    assert histogram.percentile('locations/', 50) == 0.125
+    assert histogram.percentile('locations/', 95) == 0.5
+    assert histogram.percentile('locations/', 99) == 4
+    assert histogram.percentile('locations/', 100) == 10
+
+    histogram.on_error(event('locations/{id}/', 1), ValueError())
+
+    assert histogram.summary() == {
+        'locations/': {'count': 100, 'p50': 0.125, 'p95': 0.5, 'p99': 4},
+        'locations/{id}/': {'count': 1, 'p50': 1, 'p95': 1, 'p99': 1}
+    }
+
+    histogram.reset()
+    assert histogram.summary() == {}
+
+
+def test_latencies_per_location():
+    histogram = LatencyHistogram(per_location=True)
+
+    histogram.after_response(event('locations/{id}/', 0.1, 'loc1'))
+    histogram.after_response(event('locations/{id}/', 0.1, 'loc2'))
+
+    assert sorted(histogram.summary()) == [
+        ('locations/{id}/', 'loc1'),
+        ('locations/{id}/', 'loc2')
+    ]
@@ -0,0 +1,129 @@
+from __future__ import unicode_literals
+
+from omnivore.sync import TicketSync
+from omnivore.test.conftest import listing, payment, ticket
+
+
+def set_tickets(transport, location_id, *tickets):
+    transport.add(
+        'GET',
+        'locations/{}/tickets/'.format(location_id),
+        listing('tickets', tickets)
+    )
+
+
+def summarize(events):
+    return sorted((e.type, e.location_id, e.ticket_id) for e in events)
+
+
+def test_poll(transport):
+    sync = TicketSync()
+
+    set_tickets(transport, 'loc1', ticket('tkt1'), ticket('tkt2'))
+    events = sync.poll('loc1')
+    assert summarize(events) == [
+        ('created', 'loc1', 'tkt1'),
+        ('created', 'loc1', 'tkt2')
+    ]
+    assert events[0].ticket.id == events[0].ticket_id
+
+    assert sync.poll('loc1') == []
+
+    set_tickets(
+        transport,
+        'loc1',
+        ticket('tkt1', payments=[payment()]),
+        ticket('tkt2'),
+        ticket('tkt3')
+    )
+    assert summarize(sync.poll('loc1')) == [
+        ('created', 'loc1', 'tkt3'),
+        ('updated', 'loc1', 'tkt1')
+    ]
+
+
+def test_only_open_tickets_are_listed(transport):
+    set_tickets(transport, 'loc1')
+    TicketSync().poll('loc1')
+
+    assert transport.requests[0].url.endswith('?where=eq(open,true)')
+
+
+def test_tickets_no_longer_listed_are_closed(transport):
+    sync = TicketSync()
+    set_tickets(transport, 'loc1', ticket('tkt1'), ticket('tkt2'))
+    sync.poll('loc1')
+
+    set_tickets(transport, 'loc1')
+    transport.add(
+        'GET',
+        'locations/loc1/tickets/tkt1/',
+        ticket('tkt1', open=False, closed_at=1444003600)
+    )
+    events = sync.poll('loc1')
+
+    assert summarize(events) == [
+        ('closed', 'loc1', 'tkt1'),
+        ('closed', 'loc1', 'tkt2')
+    ]
+
+    tickets = dict((e.ticket_id, e.ticket) for e in events)
+    assert tickets['tkt1'].closed_at == 1444003600
+    assert tickets['tkt2'] is None
+
+    assert sync.poll('loc1') == []
+
+
+def test_closed_tickets_listed_when_polling_all_tickets(transport):
+    sync = TicketSync(open_only=False)
+    set_tickets(transport, 'loc1', ticket('tkt1'), ticket('tkt2', open=False))
+
+    assert summarize(sync.poll('loc1')) == [('created', 'loc1', 'tkt1')]
+
+    set_tickets(transport, 'loc1', ticket('tkt1', open=False))
+    assert summarize(sync.poll('loc1')) == [('closed', 'loc1', 'tkt1')]
+    assert len(transport.requests) == 2
+
+
+def test_poll_all_and_forget(transport):
+    sync = TicketSync()
+    set_tickets(transport, 'loc1', ticket('tkt1'))
+    set_tickets(transport, 'loc2', ticket('tkt2'))
+
+    result = sync.poll_all(['loc1', 'loc2'], workers=2)
+    assert summarize(result.events) == [
+        ('created', 'loc1', 'tkt1'),
+        ('created', 'loc2', 'tkt2')
+    ]
+    assert result.errors == {}
+
+    sync.forget('loc1')
+    assert summarize(sync.poll_all(['loc1', 'loc2']).events) == [
+        ('created', 'loc1', 'tkt1')
+    ]
+
+
+def test_failed_locations_are_polled_again(transport):
+    sync = TicketSync()
+    set_tickets(transport, 'loc1', ticket('tkt1'))
+    set_tickets(transport, 'loc2', ticket('tkt2'))
+    sync.poll_all(['loc1', 'loc2'])
+
+    set_tickets(transport, 'loc1', ticket('tkt1'), ticket('tkt3'))
+    transport.add(
+        'GET',
+        'locations/loc2/tickets/',
+        {'error': 'Internal error'},
+        500
+    )
+    result = sync.poll_all(['loc1', 'loc2'], workers=2)
+
+    assert summarize(result.events) == [('created', 'loc1', 'tkt3')]
+    assert result.failed == ['loc2']
+    assert result.errors['loc2'].status_code == 500
+
+    set_tickets(transport, 'loc2', ticket('tkt2'), ticket('tkt4'))
+    result = sync.poll_all(['loc1', 'loc2'])
+
+    assert summarize(result.events) == [('created', 'loc2', 'tkt4')]
+    assert result.errors == {}
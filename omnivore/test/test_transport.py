@@ -0,0 +1,190 @@
+from __future__ import unicode_literals
+
+import errno
+import json
+import socket
+import threading
+import time
+
+import pytest
+
+from omnivore.transport import HTTP2Transport
+
+pytest.importorskip('hyper')
+
+from h2.config import H2Configuration  # noqa: E402
+from h2.connection import H2Connection  # noqa: E402
+from h2.events import RequestReceived  # noqa: E402
+
+
+class H2Server(object):
+    """
+    HTTP/2 server speaking prior knowledge over plain TCP, answering every
+    request with its path as JSON.
+
+    Answers are held until `hold` requests are open on a connection (or no
+    request came for a second), to check that requests are multiplexed. A
+    `silent` server never answers the connection preface, and with
+    `reset_first` the first connection is closed on its first request.
+    """
+
+    def __init__(self, hold=1, silent=False, reset_first=False):
+        self.hold = hold
+        self.silent = silent
+        self.reset_first = reset_first
+        self.connections = []
+        self.max_open = 0
+
+        self.sock = socket.socket()
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.listen(5)
+        self.base_url = 'http://127.0.0.1:{}/'.format(
+            self.sock.getsockname()[1]
+        )
+
+        thread = threading.Thread(target=self.accept)
+        thread.daemon = True
+        thread.start()
+
+    def accept(self):
+        while True:
+            try:
+                sock = self.sock.accept()[0]
+            except socket.error:
+                return
+
+            self.connections.append(sock)
+
+            if not self.silent:
+                thread = threading.Thread(target=self.serve, args=(sock,))
+                thread.daemon = True
+                thread.start()
+
+    def serve(self, sock):
+        reset = self.reset_first and len(self.connections) == 1
+        conn = H2Connection(config=H2Configuration(client_side=False))
+        conn.initiate_connection()
+        sock.sendall(conn.data_to_send())
+        sock.settimeout(1)
+        pending = []
+
+        while True:
+            try:
+                data = sock.recv(65535)
+            except socket.timeout:
+                data = None
+            except socket.error:
+                return
+
+            if data == b'':
+                return
+
+            for event in conn.receive_data(data or b''):
+                if isinstance(event, RequestReceived):
+                    if reset:
+                        sock.close()
+                        return
+
+                    pending.append(event)
+
+            self.max_open = max(self.max_open, len(pending))
+
+            if pending and (data is None or len(pending) >= self.hold):
+                for event in pending:
+                    self.respond(conn, event)
+                pending = []
+
+            sock.sendall(conn.data_to_send())
+
+    def respond(self, conn, event):
+        path = dict(event.headers)[b':path'].decode('utf-8')
+        body = json.dumps({'path': path}).encode('utf-8')
+
+        conn.send_headers(event.stream_id, [
+            (b':status', b'200'),
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode('ascii'))
+        ])
+        conn.send_data(event.stream_id, body, end_stream=True)
+
+    def close(self):
+        self.sock.close()
+        for sock in self.connections:
+            sock.close()
+
+
+@pytest.fixture
+def h2_server():
+    servers = []
+
+    def start(**kwargs):
+        server = H2Server(**kwargs)
+        servers.append(server)
+        return server
+
+    yield start
+
+    for server in servers:
+        server.close()
+
+
+@pytest.fixture
+def http2_transport():
+    transport = HTTP2Transport()
+    yield transport
+    transport.close()
+
+
+def get(transport, url, timeout=(1, 5)):
+    res = transport.request('GET', url, {'Api-Key': 'test-key'},
+                            timeout=timeout)
+    return res.status_code, json.loads(res.content)
+
+
+def test_concurrent_requests_share_one_connection(h2_server,
+                                                  http2_transport):
+    server = h2_server(hold=20)
+    results = {}
+
+    def fetch(i):
+        url = '{}locations/loc{}/'.format(server.base_url, i)
+        results[i] = get(http2_transport, url)
+
+    threads = [threading.Thread(target=fetch, args=(i,)) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert results == dict(
+        (i, (200, {'path': '/locations/loc{}/'.format(i)}))
+        for i
+        in range(20)
+    )
+    assert len(server.connections) == 1
+    assert server.max_open == 20
+
+
+def test_connect_timeout(h2_server, http2_transport):
+    server = h2_server(silent=True)
+    start = time.time()
+
+    with pytest.raises(socket.timeout):
+        get(http2_transport, server.base_url, timeout=(0.2, 5))
+
+    assert time.time() - start < 1
+    assert http2_transport.connections == {}
+    assert http2_transport.connecting == {}
+
+
+def test_failed_connection_is_dropped(h2_server, http2_transport):
+    server = h2_server(reset_first=True)
+
+    with pytest.raises(socket.error) as info:
+        get(http2_transport, server.base_url)
+
+    assert info.value.errno == errno.ECONNRESET
+    assert http2_transport.connections == {}
+
+    assert get(http2_transport, server.base_url) == (200, {'path': '/'})
+    assert len(server.connections) == 2
@@ -0,0 +1,98 @@
+from __future__ import unicode_literals
+
+import logging
+import threading
+
+import pytest
+
+import omnivore
+
+from omnivore import util
+from omnivore.test.conftest import location
+
+
+class Counter(object):
+
+    def __init__(self, fail=False):
+        self.calls = 0
+        self.fail = fail
+        self._cached = {}
+
+    @util.cached_property(ttl=60, stale_while_revalidate=True)
+    def value(self):
+        self.calls += 1
+        if self.fail:
+            raise ValueError('boom')
+        return self.calls
+
+
+@pytest.fixture
+def foreground(monkeypatch):
+    # Run background refreshes right away
+    monkeypatch.setattr(util, 'BackgroundCall', lambda f, *args: f(*args))
+
+
+def expire(obj, name):
+    value, cached_at = obj._cached[name]
+    obj._cached[name] = (value, cached_at - 61)
+
+
+def test_stale_value_is_served_while_revalidating(foreground):
+    counter = Counter()
+
+    assert counter.value == 1
+    expire(counter, 'value')
+
+    assert counter.value == 1
+    assert counter.calls == 2
+    assert counter.value == 2
+
+
+def test_failed_revalidation_is_logged_and_retried(foreground, caplog):
+    counter = Counter()
+    counter.value
+    expire(counter, 'value')
+    counter.fail = True
+
+    with caplog.at_level(logging.WARNING, logger='omnivore'):
+        assert counter.value == 1
+
+    assert 'Could not refresh Counter.value' in caplog.text
+    assert not Counter.value.is_fresh(counter)
+
+    counter.fail = False
+    assert counter.value == 1
+    assert counter.value == 3
+
+
+def test_ttl_without_stale_while_revalidate():
+    counter = Counter()
+    Counter.value.stale_while_revalidate = False
+
+    try:
+        counter.value
+        expire(counter, 'value')
+        assert counter.value == 2
+        assert Counter.value.is_fresh(counter)
+    finally:
+        Counter.value.stale_while_revalidate = True
+
+
+def test_concurrently_set_properties_are_kept():
+    names = ['employees', 'order_types', 'revenue_centers', 'tables']
+
+    for _ in range(20):
+        loc = omnivore.Location(**location())
+        assert loc._cached == {}
+
+        threads = [
+            threading.Thread(target=setattr, args=(loc, name, []))
+            for name
+            in names
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sorted(loc._cached) == names
@@ -0,0 +1,234 @@
+from __future__ import unicode_literals
+
+import json
+import logging
+import threading
+
+import pytest
+import requests
+
+import omnivore
+
+from omnivore.registry import Registry
+from omnivore.test.conftest import (
+    employee,
+    listing,
+    load_payload,
+    location,
+    menu_item,
+    payment,
+    ticket,
+    ticket_item
+)
+from omnivore.webhook import (
+    SIGNATURE_HEADER,
+    WebhookReceiver,
+    WebhookServer,
+    sign
+)
+
+
+@pytest.fixture
+def loaded(transport):
+    transport.add('GET', 'locations/loc1/', location())
+    transport.add('GET', 'locations/loc1/tickets/', listing('tickets', [
+        ticket(items=[ticket_item()], payments=[payment()])
+    ]))
+    transport.add('GET', 'locations/loc1/employees/', listing('employees', [
+        employee()
+    ]))
+    transport.add('GET', 'locations/loc1/menu/items/', listing('menu_items', [
+        menu_item()
+    ]))
+
+    identity_map = omnivore.IdentityMap()
+
+    with identity_map:
+        loc = omnivore.Location.get('loc1')
+        loc.tickets
+
+    return identity_map, loc
+
+
+def test_ticket_updated_refreshes_loaded_ticket(loaded):
+    identity_map, loc = loaded
+    loaded_ticket = loc.tickets[0]
+
+    events = []
+    receiver = WebhookReceiver(
+        identity_map,
+        callback=lambda *args: events.append(args)
+    )
+    resource = receiver.handle(load_payload('ticket_updated'))
+
+    assert resource is loaded_ticket
+    assert loaded_ticket.guest_count == 2
+    assert loaded_ticket.totals['due'] == 1700
+    assert loc.tickets == [loaded_ticket]
+    assert events == [('ticket.updated', 'loc1', loaded_ticket)]
+
+
+def test_ticket_created_is_added_to_location(loaded):
+    identity_map, loc = loaded
+
+    WebhookReceiver(identity_map).handle(load_payload('ticket_created'))
+
+    assert [t.id for t in loc.tickets] == ['tkt1', 'tkt2']
+
+
+def test_ticket_items_are_added_and_voided(loaded):
+    identity_map, loc = loaded
+    loaded_ticket = loc.tickets[0]
+    receiver = WebhookReceiver(identity_map)
+
+    receiver.handle(load_payload('ticket_item_created'))
+    assert [i.id for i in loaded_ticket.items] == ['ti1', 'ti2']
+    assert loaded_ticket.items[1].comment == 'No onions'
+
+    receiver.handle(load_payload('ticket_item_voided'))
+    assert [i.id for i in loaded_ticket.items] == ['ti2']
+
+
+def test_payment_created_is_added_to_ticket(loaded):
+    identity_map, loc = loaded
+
+    WebhookReceiver(identity_map).handle(load_payload('payment_created'))
+
+    payments = loc.tickets[0].payments
+    assert [p.id for p in payments] == ['pay1', 'pay2']
+    assert payments[1].tip == 170
+
+
+def test_ticket_responses_are_dropped(transport):
+    from omnivore.cache import ResponseCache
+
+    omnivore.response_cache = ResponseCache(default_ttl=60)
+    transport.add('GET', 'locations/loc1/tickets/', listing('tickets', [
+        ticket()
+    ]))
+
+    omnivore.Location(**location()).tickets
+    WebhookReceiver().handle(load_payload('ticket_updated'))
+    omnivore.Location(**location()).tickets
+
+    assert len(transport.requests) == 2
+
+
+def test_menu_updated_reloads_only_the_menu(loaded, transport):
+    identity_map, loc = loaded
+    omnivore.resource_registry = Registry()
+
+    with identity_map:
+        loc.employees
+        menu = loc.menu
+        item = menu.items[0]
+
+    transport.add('GET', 'locations/loc1/menu/items/', listing('menu_items', [
+        menu_item(name='Cheeseburger')
+    ]))
+    count = len(transport.requests)
+
+    WebhookReceiver(identity_map).handle(load_payload('menu_updated'))
+
+    relations = [key[2] for key in omnivore.resource_registry.entries]
+    assert relations == ['employees']
+
+    with identity_map:
+        assert loc.menu is menu
+        assert menu.items[0] is item
+
+    assert item.name == 'Cheeseburger'
+    assert len(transport.requests) == count + 1
+
+
+def test_unknown_type_is_rejected():
+    with pytest.raises(ValueError):
+        WebhookReceiver().handle({'type': 'table.updated', 'location_id': 'x'})
+
+
+def test_verify():
+    body = json.dumps(load_payload('menu_updated')).encode('utf-8')
+    receiver = WebhookReceiver(secret='s3cret')
+
+    assert receiver.verify(body, sign('s3cret', body))
+    assert not receiver.verify(body, sign('other', body))
+    assert not receiver.verify(body + b' ', sign('s3cret', body))
+    assert not receiver.verify(body, None)
+
+    assert WebhookReceiver().verify(body, None)
+
+
+def serve(receiver):
+    server = WebhookServer(('127.0.0.1', 0), receiver)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+
+    return server, 'http://127.0.0.1:{}/'.format(server.server_address[1])
+
+
+@pytest.fixture
+def server():
+    events = []
+    server, url = serve(WebhookReceiver(
+        callback=lambda *args: events.append(args),
+        secret='s3cret'
+    ))
+
+    yield url, events
+
+    server.shutdown()
+    server.server_close()
+
+
+def test_server_applies_signed_payloads(server):
+    url, events = server
+    body = json.dumps(load_payload('menu_updated')).encode('utf-8')
+
+    res = requests.post(url, data=body, headers={
+        SIGNATURE_HEADER: sign('s3cret', body)
+    })
+
+    assert res.status_code == 200
+    assert events == [('menu.updated', 'loc1', None)]
+
+
+def test_server_rejects_unsigned_payloads(server):
+    url, events = server
+    body = json.dumps(load_payload('menu_updated')).encode('utf-8')
+
+    assert requests.post(url, data=body).status_code == 401
+    assert requests.post(url, data=body, headers={
+        SIGNATURE_HEADER: sign('other', body)
+    }).status_code == 401
+    assert events == []
+
+
+def test_server_rejects_invalid_payloads(server):
+    url, events = server
+
+    for body in (b'not json', b'{"type": "menu.updated"}'):
+        res = requests.post(url, data=body, headers={
+            SIGNATURE_HEADER: sign('s3cret', body)
+        })
+        assert res.status_code == 400
+
+    assert events == []
+
+
+def test_server_logs_failures(caplog):
+    def callback(*args):
+        raise RuntimeError('boom')
+
+    server, url = serve(WebhookReceiver(callback=callback))
+    body = json.dumps(load_payload('menu_updated')).encode('utf-8')
+
+    try:
+        with caplog.at_level(logging.ERROR, logger='omnivore'):
+            assert requests.post(url, data=body).status_code == 500
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert 'Could not apply webhook payload' in caplog.text
+    assert 'RuntimeError: boom' in caplog.text
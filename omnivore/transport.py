@@ -0,0 +1,357 @@
+"""
+Transports send the HTTP requests of `omnivore.client`. A transport has a
+`request(method, url, headers, data, stream, timeout)` method, where the
+timeout is a `(connect, read)` tuple in seconds, returning a response
+with `status_code`, `headers`, `content`, `raw` (a file-like object to read
+a streamed body from) and `close()`, a `close()` method dropping its
+connections, and an `errors` tuple of the exceptions it raises when the API
+cannot be reached.
+
+Set `omnivore.http_transport` to use another transport than the default
+pooled `RequestsTransport`.
+"""
+from __future__ import unicode_literals
+
+import errno
+import io
+import socket
+import threading
+import urlparse
+
+import requests
+
+from requests.structures import CaseInsensitiveDict
+
+from omnivore import codec
+from omnivore.util import BackgroundCall
+
+
+def split_timeout(timeout):
+    """
+    Turn a timeout given as a single number (or None) into a `(connect,
+    read)` tuple.
+    """
+    if isinstance(timeout, (tuple, list)):
+        return tuple(timeout)
+
+    return timeout, timeout
+
+
+class Response(object):
+    """
+    Response of transports not built on `requests`. The body is read from
+    `raw` when `content` is first accessed.
+    """
+
+    def __init__(self, status_code, headers, raw):
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers)
+        self.raw = raw
+        self._content = None
+
+    @property
+    def content(self):
+        if self._content is None:
+            self._content = self.raw.read()
+
+        return self._content
+
+    def close(self):
+        self.raw.close()
+
+
+class RequestsTransport(object):
+    """
+    HTTP/1.1 transport with a pool of keep-alive connections per host,
+    sized by `omnivore.pool_*` unless given explicitly.
+
+    A single HTTPAdapter (and so a single urllib3 pool manager) is shared by
+    every thread, while each thread gets its own lightweight Session on top
+    of it, since Session objects themselves are not guaranteed to be
+    thread-safe.
+    """
+
+    errors = (requests.exceptions.RequestException,)
+
+    def __init__(self, pool_connections=None, pool_maxsize=None,
+                 pool_block=None):
+        import omnivore
+
+        self.adapter = requests.adapters.HTTPAdapter(
+            pool_connections=pool_connections or omnivore.pool_connections,
+            pool_maxsize=pool_maxsize or omnivore.pool_maxsize,
+            pool_block=(
+                omnivore.pool_block if pool_block is None else pool_block
+            )
+        )
+        self.local = threading.local()
+
+    def get_session(self):
+        session = getattr(self.local, 'session', None)
+
+        if session is None:
+            session = requests.Session()
+            session.mount('https://', self.adapter)
+            session.mount('http://', self.adapter)
+
+            self.local.session = session
+
+        return session
+
+    def request(self, method, url, headers, data=None, stream=False,
+                timeout=None):
+        return self.get_session().request(
+            method,
+            url,
+            headers=headers,
+            data=data,
+            stream=stream,
+            timeout=split_timeout(timeout)
+        )
+
+    def close(self):
+        self.adapter.close()
+
+
+class HTTP2Transport(object):
+    """
+    HTTP/2 transport built on hyper, keeping a single connection per host
+    that concurrent requests from any number of threads are multiplexed
+    over. HTTPS hosts must support HTTP/2 through ALPN; plain HTTP hosts are
+    spoken to in HTTP/2 directly (prior knowledge), without an upgrade.
+
+    A connection that fails is dropped, and the next request to its host
+    opens a new one. Connections are opened within the connect timeout of
+    the request that needs them, and the read timeout of each request is
+    applied to the connection's socket while it is being sent.
+    """
+
+    def __init__(self):
+        try:
+            from h2.exceptions import H2Error
+            from hyper import HTTP20Connection
+            from hyper.common.exceptions import ConnectionResetError
+            from hyper.http20.exceptions import HTTP20Error
+        except ImportError:
+            raise ImportError(
+                'HTTP2Transport requires hyper. Install it with '
+                '"pip install omnivore[http2]".'
+            )
+
+        self.connection_class = HTTP20Connection
+        self.errors = (socket.error, H2Error, HTTP20Error)
+        self.reset_error = ConnectionResetError
+        self.connections = {}
+        self.connecting = {}
+        self.lock = threading.Lock()
+
+    def get_connection(self, scheme, netloc):
+        key = (scheme, netloc)
+
+        with self.lock:
+            conn = self.connections.get(key)
+
+            if conn is None:
+                conn = self.connection_class(
+                    netloc,
+                    secure=scheme == 'https'
+                )
+                self.connections[key] = conn
+
+        return conn
+
+    def forget_connection(self, conn):
+        with self.lock:
+            for key, other in self.connections.items():
+                if other is conn:
+                    del self.connections[key]
+
+            self.connecting.pop(conn, None)
+
+    def drop_connection(self, conn):
+        self.forget_connection(conn)
+        conn.close()
+
+    def fail(self, conn, e):
+        self.drop_connection(conn)
+
+        # On Python 2, hyper reports a connection closed by the server with
+        # its own exception rather than a socket.error
+        if isinstance(e, self.reset_error):
+            raise socket.error(errno.ECONNRESET, 'Connection reset by peer')
+
+        raise
+
+    def connect(self, conn, timeout):
+        # hyper has no timeouts of its own: connect on another thread so that
+        # a hung connection attempt can be given up on, then time reads out
+        # on the connection's socket. Every thread waits for the same
+        # attempt, as the connection cannot be used until it is done
+        with self.lock:
+            call = self.connecting.get(conn)
+
+            if call is None:
+                call = self.connecting[conn] = BackgroundCall(conn.connect)
+
+        call.thread.join(timeout[0])
+
+        if call.thread.is_alive():
+            # The connecting thread holds the connection's lock, so it
+            # cannot be closed: shut its socket down, if it got one, to let
+            # the thread fail and leave it behind
+            self.forget_connection(conn)
+
+            sock = conn._sock
+            if sock is not None:
+                try:
+                    sock._sck.shutdown(socket.SHUT_RDWR)
+                except socket.error:
+                    pass
+
+            raise socket.timeout('Timed out connecting to the API.')
+
+        try:
+            call.result()
+        except self.errors + (self.reset_error,), e:
+            self.fail(conn, e)
+
+        sock = conn._sock
+        if sock is not None:
+            sock._sck.settimeout(timeout[1])
+
+    def request(self, method, url, headers, data=None, stream=False,
+                timeout=None):
+        parts = urlparse.urlsplit(url)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+
+        conn = self.get_connection(parts.scheme, parts.netloc)
+        self.connect(conn, split_timeout(timeout))
+
+        try:
+            stream_id = conn.request(
+                method,
+                path,
+                body=data,
+                headers={
+                    name.lower(): value
+                    for name, value
+                    in headers.items()
+                }
+            )
+            res = conn.get_response(stream_id)
+
+            body = res
+            if not stream:
+                body = io.BytesIO(res.read())
+        except self.errors + (self.reset_error,), e:
+            self.fail(conn, e)
+
+        return Response(res.status, get_headers(res), body)
+
+    def close(self):
+        with self.lock:
+            conns, self.connections = self.connections.values(), {}
+            self.connecting = {}
+
+        for conn in conns:
+            conn.close()
+
+
+def get_headers(res):
+    headers = {}
+
+    for name, value in res.headers.items():
+        name = name.decode('latin-1')
+        value = value.decode('latin-1')
+
+        if name in headers:
+            headers[name] += ', ' + value
+        else:
+            headers[name] = value
+
+    return headers
+
+
+class MemoryRequest(object):
+
+    def __init__(self, method, url, headers, data, timeout):
+        self.method = method
+        self.url = url
+        self.headers = headers
+        self.data = data
+        self.timeout = timeout
+
+    @property
+    def json(self):
+        if self.data is None:
+            return None
+
+        return codec.loads(self.data)
+
+    def __repr__(self):
+        return '<MemoryRequest {} {}>'.format(self.method, self.url)
+
+
+class MemoryTransport(object):
+    """
+    Transport answering requests from memory, for tests. Responses are
+    registered with `add` for a method and a URL, either absolute or
+    relative to the API root (e.g. 'locations/abc/'), ignoring the query
+    string if no response was added for the URL including it. Anything
+    else is passed to `handler(request)`, if given, which returns a
+    `(status_code, json)` or `(status_code, json, headers)` tuple, and
+    otherwise gets a 404.
+
+    Every request is recorded in `requests` as a `MemoryRequest`.
+    """
+
+    errors = ()
+
+    def __init__(self, handler=None):
+        self.handler = handler
+        self.responses = {}
+        self.requests = []
+
+    def add(self, method, url, json=None, status_code=200, headers=None):
+        self.responses[(method, url)] = (status_code, json, headers)
+
+    def find(self, request):
+        from omnivore.client import build_url
+
+        url = request.url
+        prefix = build_url('')
+        urls = [url, url.split('?', 1)[0]]
+
+        for url in list(urls):
+            if url.startswith(prefix):
+                urls.append(url[len(prefix):])
+
+        for url in urls:
+            response = self.responses.get((request.method, url))
+            if response is not None:
+                return response
+
+        if self.handler is not None:
+            return self.handler(request)
+
+        return (404, {'error': 'Not found'})
+
+    def request(self, method, url, headers, data=None, stream=False,
+                timeout=None):
+        request = MemoryRequest(method, url, headers, data, timeout)
+        self.requests.append(request)
+
+        response = self.find(request)
+        status_code, json = response[:2]
+        headers = response[2] if len(response) > 2 else None
+
+        content = b'' if json is None else codec.dumps(json)
+        if not isinstance(content, bytes):
+            content = content.encode('utf-8')
+
+        return Response(status_code, headers or {}, io.BytesIO(content))
+
+    def close(self):
+        pass
@@ -1,31 +1,357 @@
+import functools
+import logging
+import sys
+import threading
+import time
+import types
+
+from multiprocessing.pool import ThreadPool
+
+from omnivore.identity import bind
+
+
+logger = logging.getLogger('omnivore')
+
+
 class CachedProperty(object):
     """
-    A property that is only computed once per instance and then replaces
-    itself with an ordinary attribute. Deleting the attribute resets the
-    property.
+    A property that is only computed once per instance and then cached on
+    it. Assigning to the attribute replaces the cached value, and deleting
+    it (or calling `invalidate`) resets the property.
+
+    With a `ttl`, a cached value older than `ttl` seconds is recomputed on
+    the next access. If `stale_while_revalidate` is also set, that access
+    returns the expired value right away and recomputes it in the
+    background instead. A background refresh that fails is logged, and the
+    value stays expired so that the next access tries again. Both can be
+    changed on the class at any time, e.g.
+    `Location.tickets.ttl = 30`.
 
-    Taken from https://github.com/bottlepy/bottle/blob/master/bottle.py
+    Values are kept in the instance's `_cached` dict, so this works with
+    classes that define `__slots__`. Resources that declare a `_cached` slot
+    get the dict when they are created (see `PrintableResource`), so that
+    properties set concurrently from several threads are all kept.
+
+    Based on https://github.com/bottlepy/bottle/blob/master/bottle.py
     """
 
-    # TODO: allow refresh
+    def __init__(self, func=None, ttl=None, stale_while_revalidate=False):
+        self.ttl = ttl
+        self.stale_while_revalidate = stale_while_revalidate
+
+        if func is not None:
+            self(func)
 
-    def __init__(self, func):
+    def __call__(self, func):
         self.__doc__ = getattr(func, '__doc__')
         self.func = func
+        self.name = func.__name__
+        return self
 
     def __get__(self, obj, cls):
         if obj is None:
             return self
 
-        value = obj.__dict__[self.func.__name__] = self.func(obj)
+        try:
+            value, cached_at = obj._cached[self.name]
+        except (AttributeError, KeyError):
+            return self.refresh(obj)
+
+        if self.ttl is not None and time.time() - cached_at >= self.ttl:
+            if not self.stale_while_revalidate:
+                return self.refresh(obj)
+
+            # Keep serving the stale value until the refresh completes
+            pending = obj._cached[self.name] = (value, time.time())
+            BackgroundCall(self.revalidate, obj, pending, cached_at)
+
+        return value
+
+    def __set__(self, obj, value):
+        obj._cached[self.name] = (value, time.time())
+
+    def __delete__(self, obj):
+        self.invalidate(obj)
+
+    def refresh(self, obj):
+        value = call_bound(obj, self.func, obj)
+        self.__set__(obj, value)
         return value
 
+    def revalidate(self, obj, pending, cached_at):
+        try:
+            self.refresh(obj)
+        except Exception:
+            logger.warning(
+                'Could not refresh %s.%s in the background',
+                obj.__class__.__name__,
+                self.name,
+                exc_info=True
+            )
+
+            # Unless the value was replaced in the meantime
+            cache = obj._cached
+            if cache.get(self.name) is pending:
+                cache[self.name] = (pending[0], cached_at)
+
+    def invalidate(self, obj):
+        getattr(obj, '_cached', {}).pop(self.name, None)
+
+    def is_fresh(self, obj):
+        try:
+            _, cached_at = obj._cached[self.name]
+        except (AttributeError, KeyError):
+            return False
+
+        return self.ttl is None or time.time() - cached_at < self.ttl
+
+
 cached_property = CachedProperty
 
 
+class EmbeddedProperty(object):
+    """
+    An attribute built from the object's embedded HAL data on first access
+    and then kept in `slot`. The raw data is read from the object's
+    `_embedded` attribute under `key`. If it is not there and `related` is
+    set, the value is fetched with `obj.get_related(name)` instead.
+    """
+
+    ttl = None
+
+    def __init__(self, key, build, related=False):
+        self.__doc__ = getattr(build, '__doc__')
+        self.key = key
+        self.build = build
+        self.related = related
+        self.name = build.__name__
+        self.slot = '_' + build.__name__
+
+    def __get__(self, obj, cls):
+        if obj is None:
+            return self
+
+        try:
+            return getattr(obj, self.slot)
+        except AttributeError:
+            pass
+
+        embedded = getattr(obj, '_embedded', None)
+
+        if embedded is not None and self.key in embedded:
+            value = call_bound(obj, self.build, obj, embedded[self.key])
+        elif self.related:
+            value = call_bound(obj, obj.get_related, self.name)
+        else:
+            raise AttributeError(self.name)
+
+        setattr(obj, self.slot, value)
+        return value
+
+    def __set__(self, obj, value):
+        setattr(obj, self.slot, value)
+
+    def __delete__(self, obj):
+        self.invalidate(obj)
+
+    def invalidate(self, obj):
+        try:
+            delattr(obj, self.slot)
+        except AttributeError:
+            pass
+
+    def is_fresh(self, obj):
+        return hasattr(obj, self.slot)
+
+    def is_embedded(self, obj):
+        embedded = getattr(obj, '_embedded', None)
+        return embedded is not None and self.key in embedded
+
+
+def embedded(key, related=False):
+    return lambda build: EmbeddedProperty(key, build, related)
+
+
+def get_cached_properties(cls):
+    return [
+        name
+        for name
+        in dir(cls)
+        if isinstance(
+            getattr(cls, name, None),
+            (CachedProperty, EmbeddedProperty)
+        )
+    ]
+
+
+_embedded_properties = {}
+
+
+def get_embedded_properties(cls):
+    try:
+        return _embedded_properties[cls]
+    except KeyError:
+        props = _embedded_properties[cls] = [
+            getattr(cls, name)
+            for name
+            in dir(cls)
+            if isinstance(getattr(cls, name, None), EmbeddedProperty)
+        ]
+        return props
+
+
+class ClassMethodAndAttribute(object):
+    """
+    Lets a classmethod share its name with an instance attribute, which is
+    stored under `slot`. `Ticket.open(...)` opens a ticket, while
+    `ticket.open` tells whether it is open.
+    """
+
+    def __init__(self, func, slot):
+        self.__doc__ = getattr(func, '__doc__')
+        self.method = classmethod(func)
+        self.slot = slot
+
+    def __get__(self, obj, cls):
+        if obj is None:
+            return self.method.__get__(obj, cls)
+
+        return getattr(obj, self.slot)
+
+    def __set__(self, obj, value):
+        setattr(obj, self.slot, value)
+
+
+def classmethod_and_attribute(slot):
+    return lambda func: ClassMethodAndAttribute(func, slot)
+
+
+def get_attribute_names(cls):
+    """
+    Public attribute names declared through `__slots__` on `cls` and its
+    bases, base classes first.
+    """
+    names = []
+
+    for base in reversed(cls.__mro__):
+        for name in base.__dict__.get('__slots__', ()):
+            if not name.startswith('_'):
+                names.append(name)
+
+        for name, value in base.__dict__.items():
+            if isinstance(value, (ClassMethodAndAttribute, EmbeddedProperty)):
+                names.append(name)
+
+    return names
+
+
+def get_slots(cls):
+    """
+    `(name, descriptor)` pairs of every slot declared on `cls` and its
+    bases, public or not.
+    """
+    return [
+        (name, base.__dict__[name])
+        for base
+        in cls.__mro__
+        for name
+        in base.__dict__.get('__slots__', ())
+    ]
+
+
+def call_with(omnivore_client, func, *args, **kwargs):
+    """
+    Call `func` inside `omnivore_client`, unless it is None. If `func`
+    returns a generator, each of its items is produced inside the client.
+    """
+    if omnivore_client is None:
+        return func(*args, **kwargs)
+
+    with omnivore_client:
+        result = func(*args, **kwargs)
+
+    if isinstance(result, types.GeneratorType):
+        return omnivore_client.iterate(result)
+
+    return result
+
+
+def call_bound(obj, func, *args, **kwargs):
+    """
+    Call `func` inside the client that resource `obj` is bound to, if any.
+    """
+    return call_with(getattr(obj, '_client', None), func, *args, **kwargs)
+
+
+def bound(func):
+    """
+    Decorate a resource method to run inside the client the resource is
+    bound to, see `call_bound`.
+    """
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        return call_bound(self, func, self, *args, **kwargs)
+
+    return wrapper
+
+
+class BackgroundCall(object):
+    """
+    Calls `func(*args)` on a daemon thread. `result()` waits for the call to
+    finish, then returns its value or re-raises its exception.
+    """
+
+    def __init__(self, func, *args):
+        self.value = None
+        self.exc_info = None
+
+        self.thread = threading.Thread(
+            target=self.run,
+            args=(bind(func), args)
+        )
+        self.thread.daemon = True
+        self.thread.start()
+
+    def run(self, func, args):
+        try:
+            self.value = func(*args)
+        except Exception:
+            self.exc_info = sys.exc_info()
+
+    def result(self):
+        self.thread.join()
+
+        if self.exc_info is not None:
+            raise self.exc_info[0], self.exc_info[1], self.exc_info[2]
+
+        return self.value
+
+
+def map_concurrently(func, items, workers):
+    """
+    Like `map(func, items)`, but runs the calls on up to `workers` threads.
+    """
+    items = list(items)
+
+    if workers <= 1 or len(items) <= 1:
+        return map(func, items)
+
+    pool = ThreadPool(min(workers, len(items)))
+
+    try:
+        return pool.map(bind(func), items)
+    finally:
+        pool.close()
+        pool.join()
+
+
 def get_embedded_object(obj, key):
     return obj['_embedded'][key]
 
 
+def get_link(obj, rel):
+    return obj.get('_links', {}).get(rel, {}).get('href')
+
+
 def has_embedded_objects(obj):
     return '_embedded' in obj
@@ -0,0 +1,259 @@
+"""
+Receiver for Omnivore webhooks, applying pushed changes to resources that
+have already been loaded instead of polling for them.
+
+Payloads are JSON objects of the form:
+
+    {
+        "type": "ticket.updated",
+        "location_id": "...",
+        "ticket_id": "...",
+        "data": {...}
+    }
+
+where `type` starts with `ticket.`, `ticket_item.`, `payment.` or `menu.`,
+`ticket_id` is only needed for ticket items and payments, and `data` is the
+resource as returned by the API (menu events need none).
+
+When the receiver has a secret, payloads must be signed with it: the
+`X-Omnivore-Signature` header holds the hex HMAC-SHA256 of the request body
+keyed with the secret (see `sign`).
+"""
+from __future__ import unicode_literals
+
+import BaseHTTPServer
+import SocketServer
+import hashlib
+import hmac
+import logging
+
+from omnivore import client, codec
+from omnivore.resource.base import Location
+from omnivore.resource.menu import MenuItem
+from omnivore.resource.ticket import Payment, Ticket, TicketItem
+from omnivore.util import call_with
+
+
+SIGNATURE_HEADER = 'X-Omnivore-Signature'
+
+logger = logging.getLogger('omnivore')
+
+
+class WebhookReceiver(object):
+    """
+    Applies webhook payloads to the resources of `identity_map`: tickets,
+    ticket items and payments are rebuilt inside it, so that objects loaded
+    in it are refreshed in place, and they are added to (or replaced in) the
+    `tickets`, `items` and `payments` lists of their parents. Cached ticket
+    responses (see `omnivore.response_cache`) are dropped.
+
+    On menu events, the location's menu is dropped from the response cache,
+    `omnivore.resource_registry` and `omnivore.menu_snapshots`, and the menu
+    and menu items loaded in `identity_map` are reloaded on next access.
+
+    `callback(type, location_id, resource)` is called for each payload once
+    it has been applied, with the built resource, or None for menu events.
+
+    Payloads are applied inside `omnivore_client`, if given, so that built
+    resources are bound to it and its response cache is the one updated.
+
+    With a `secret`, `verify` only accepts request bodies signed with it.
+    """
+
+    def __init__(self, identity_map=None, callback=None,
+                 omnivore_client=None, secret=None):
+        self.identity_map = identity_map
+        self.callback = callback
+        self.omnivore_client = omnivore_client
+        self.secret = secret
+
+    def verify(self, body, signature):
+        """
+        Return whether `signature` is the signature of the raw request
+        `body`, or True if the receiver has no secret.
+        """
+        if self.secret is None:
+            return True
+
+        if not signature:
+            return False
+
+        if not isinstance(signature, bytes):
+            signature = signature.encode('utf-8')
+
+        return hmac.compare_digest(sign(self.secret, body), signature.strip())
+
+    def handle(self, payload):
+        return call_with(self.omnivore_client, self.apply, payload)
+
+    def apply(self, payload):
+        event_type = payload['type']
+        kind, _, action = event_type.partition('.')
+        location_id = payload['location_id']
+
+        if kind == 'menu':
+            resource = None
+            self.apply_menu(location_id)
+        elif kind == 'ticket':
+            resource = self.build(Ticket, location_id, payload)
+            self.apply_ticket(resource)
+        elif kind == 'ticket_item':
+            resource = self.build(TicketItem, location_id, payload)
+            self.apply_ticket_object(resource, 'items', action)
+        elif kind == 'payment':
+            resource = self.build(Payment, location_id, payload)
+            self.apply_ticket_object(resource, 'payments', action)
+        else:
+            raise ValueError('Unknown webhook type: {}'.format(event_type))
+
+        if self.callback is not None:
+            self.callback(event_type, location_id, resource)
+
+        return resource
+
+    def build(self, cls, location_id, payload):
+        args = (location_id,)
+        if cls is not Ticket:
+            args += (payload['ticket_id'],)
+
+        if self.identity_map is None:
+            return cls(*args, **payload['data'])
+
+        with self.identity_map:
+            return cls(*args, **payload['data'])
+
+    def find(self, *key):
+        if self.identity_map is None:
+            return None
+
+        return self.identity_map.objects.get(key)
+
+    def find_all(self, cls, location_id):
+        if self.identity_map is None:
+            return []
+
+        with self.identity_map.lock:
+            return [
+                obj
+                for key, obj
+                in self.identity_map.objects.items()
+                if key[0] is cls and key[1] == location_id
+            ]
+
+    def apply_ticket(self, ticket):
+        self.invalidate_responses(ticket.location_id)
+
+        location = self.find(Location, ticket.location_id)
+
+        if location is not None and Location.tickets.is_fresh(location):
+            add_or_replace(location.tickets, ticket)
+
+    def apply_ticket_object(self, obj, name, action):
+        self.invalidate_responses(obj.location_id)
+
+        ticket = self.find(Ticket, obj.location_id, obj.ticket_id)
+        if ticket is None:
+            return
+
+        prop = getattr(Ticket, name)
+        if not (prop.is_fresh(ticket) or prop.is_embedded(ticket)):
+            return
+
+        objs = getattr(ticket, name)
+
+        if action in ('deleted', 'voided'):
+            objs[:] = [o for o in objs if o.id != obj.id]
+        else:
+            add_or_replace(objs, obj)
+
+    def apply_menu(self, location_id):
+        from omnivore import menu_snapshots, resource_registry
+
+        self.invalidate_responses(location_id, 'menu/')
+
+        if resource_registry is not None:
+            resource_registry.invalidate(location_id, prefix='menu.')
+
+        if menu_snapshots is not None:
+            menu_snapshots.invalidate(location_id)
+
+        location = self.find(Location, location_id)
+        if location is not None and Location.menu.is_fresh(location):
+            location.menu.invalidate()
+
+        for item in self.find_all(MenuItem, location_id):
+            item.invalidate()
+
+    def invalidate_responses(self, location_id, path='tickets/'):
+        response_cache = client.get_client().response_cache
+
+        if response_cache is not None:
+            url = Location.retrieve_url(location_id) + path
+            response_cache.invalidate(url)
+
+
+def sign(secret, body):
+    """
+    Hex HMAC-SHA256 signature of a request body.
+    """
+    if not isinstance(secret, bytes):
+        secret = secret.encode('utf-8')
+
+    return hmac.new(secret, body, hashlib.sha256).hexdigest()
+
+
+def add_or_replace(objs, obj):
+    for i, other in enumerate(objs):
+        if other.id == obj.id:
+            objs[i] = obj
+            return
+
+    objs.append(obj)
+
+
+class WebhookRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    def do_POST(self):
+        receiver = self.server.receiver
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length)
+
+        try:
+            if not receiver.verify(body, self.headers.get(SIGNATURE_HEADER)):
+                self.send_response(401)
+            else:
+                receiver.handle(codec.loads(body))
+                self.send_response(200)
+        except (ValueError, KeyError, TypeError):
+            self.send_response(400)
+        except Exception:
+            logger.exception('Could not apply webhook payload')
+            self.send_response(500)
+
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class WebhookServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """
+    HTTP server handing every POSTed payload to `receiver`, e.g.:
+
+        receiver = WebhookReceiver(identity_map, secret='xxx')
+        server = WebhookServer(('', 8080), receiver)
+        server.serve_forever()
+
+    Payloads that `receiver.verify` rejects get a 401.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, receiver):
+        BaseHTTPServer.HTTPServer.__init__(
+            self,
+            address,
+            WebhookRequestHandler
+        )
+        self.receiver = receiver
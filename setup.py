@@ -22,8 +22,20 @@ setup(
     author='Alex Grover',
     author_email='alex.grover@doordash.com',
     url='https://github.com/doordash/omnivore',
-    packages=['omnivore', 'omnivore.resource', 'omnivore.test'],
+    packages=[
+        'omnivore',
+        'omnivore.benchmark',
+        'omnivore.resource',
+        'omnivore.test'
+    ],
+    package_data={'omnivore.test': ['payloads/*.json']},
     install_requires=['requests >= 2.8.1'],
+    extras_require={
+        'aio': ['tornado >= 4.1, < 6'],
+        'fast': ['ujson'],
+        'http2': ['hyper'],
+        'stream': ['ijson < 3'],
+    },
     test_suite='pytest',  # 'omnivore.test.all?'
     tests_require=['pytest'],  # TODO: stripe uses unittest2 and mock?
     classifiers=[